@@ -0,0 +1,295 @@
+# Author: Daniel Glauber
+# File: benchmark.py
+# Description: Contains the benchmark harness, which runs fixed-seed scenarios and compares their behaviour and throughput with a baseline.
+import contextlib
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+from individual import Individual
+from sga import SGAController
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_FILE = os.path.join(PACKAGE_DIRECTORY, "tests", "baseline.json")
+DEFAULT_SEED_COUNT = 30
+# Significance level below which a difference between two distributions is reported
+BENCHMARK_ALPHA = 0.01
+COMMAND_RECORD = "record"
+COMMAND_COMPARE = "compare"
+COMMAND_STARTUP = "startup"
+DEFAULT_STARTUP_REPEATS = 21
+# What a short run does before its first generation: import the program, load its settings and build the controller
+STARTUP_SCRIPT = ("import sga, settings_loader as sl; "
+                  "sl.load_settings(['sga.py', 'settings.dat']); sga.SGAController()")
+# Each scenario is a settings file and the settings changed for the benchmark.
+# Bisection searches the population size itself, so every scenario runs a fixed population.
+SCENARIOS = {
+    "onemax": ("gasettings.dat", {"bisection": 0, "bisectionMaxGeneration": 100}),
+    "trap": ("settings.dat", {"bisection": 0, "populationSizeN": 800}),
+    "trap-plus": ("settings.dat", {"bisection": 0, "populationSizeN": 800, "replacementStrategy": 1}),
+}
+
+
+def load_scenario_settings(scenario: str) -> Dict[str, Any]:
+    """
+    Loads the settings of a scenario from its settings file.
+
+    Args:
+        scenario (str): The name of the scenario.
+
+    Returns:
+        Dict[str, Any]: The complete settings of the scenario.
+    """
+    settings_file, changes = SCENARIOS[scenario]
+    sl.ga_settings.clear()
+    sl.load_settings(["sga.py", os.path.join(PACKAGE_DIRECTORY, settings_file)],
+                     os.path.join(PACKAGE_DIRECTORY, sl.DEFAULT_SETTINGS_FILE))
+    return dict(sl.ga_settings, **changes)
+
+
+def run_scenario(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one seed of a scenario through the SGAController until the target fitness is reached
+    or bisectionMaxGeneration generations have run.
+
+    Args:
+        settings (Dict[str, Any]): The complete settings of the run.
+
+    Returns:
+        Dict[str, Any]: Whether the run succeeded, the generations and evaluations it used, and its time in seconds.
+    """
+    sl.ga_settings.clear()
+    sl.ga_settings.update(settings)
+    max_generations = settings["bisectionMaxGeneration"]
+    evaluations = Individual.evaluation_count
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        controller = SGAController()
+    population = controller.population
+    controller.initialize_population()
+    target_fitness = population.get_target_fitness()
+    generation = 1
+    while population.get_best_fitness()["fitness"] < target_fitness and generation < max_generations:
+        population.select_mating_parents()
+        population.replace_current_population()
+        generation += 1
+    seconds = time.perf_counter() - start
+    return {"succeeded": population.get_best_fitness()["fitness"] >= target_fitness,
+            "generations": generation,
+            "evaluations": Individual.evaluation_count - evaluations,
+            "seconds": seconds}
+
+
+def run_benchmark(scenario: str, seed_count: int) -> List[Dict[str, Any]]:
+    """
+    Runs a scenario on seed_count consecutive seeds, starting from the seed in its settings file.
+
+    Args:
+        scenario (str): The name of the scenario.
+        seed_count (int): The number of seeds.
+
+    Returns:
+        List[Dict[str, Any]]: The result of every run, in seed order.
+    """
+    settings = load_scenario_settings(scenario)
+    return [run_scenario(dict(settings, randSeed=settings["randSeed"] + index)) for index in range(seed_count)]
+
+
+def generations_to_success(results: List[Dict[str, Any]]) -> List[int]:
+    """
+    Returns the generations every run needed to reach the target. Runs that never reached it count as one generation
+    more than the limit, so they rank behind every successful run.
+
+    Args:
+        results (List[Dict[str, Any]]): The results of the runs.
+
+    Returns:
+        List[int]: The generations of every run.
+    """
+    return [result["generations"] if result["succeeded"] else result["generations"] + 1 for result in results]
+
+
+def throughput(results: List[Dict[str, Any]]) -> List[float]:
+    """
+    Returns the evaluations per second of every run.
+
+    Args:
+        results (List[Dict[str, Any]]): The results of the runs.
+
+    Returns:
+        List[float]: The evaluations per second of every run.
+    """
+    return [result["evaluations"] / result["seconds"] for result in results]
+
+
+def mann_whitney_u(sample_a: Sequence[float], sample_b: Sequence[float]) -> Tuple[float, float]:
+    """
+    Runs a two-sided Mann-Whitney U test, which asks whether values from one sample tend to be larger than values
+    from the other without assuming a distribution. The p-value uses the normal approximation with a correction for
+    ties and for continuity, which is accurate from about 10 values per sample.
+
+    Args:
+        sample_a (Sequence[float]): The first sample.
+        sample_b (Sequence[float]): The second sample.
+
+    Returns:
+        Tuple[float, float]: The U statistic of sample_a and the p-value.
+    """
+    count_a, count_b = len(sample_a), len(sample_b)
+    combined = sorted([(value, 0) for value in sample_a] + [(value, 1) for value in sample_b])
+    total = count_a + count_b
+    rank_sum_a = 0.0
+    tie_correction = 0.0
+    start = 0
+    # Tied values share the mean of the ranks they cover
+    while start < total:
+        end = start
+        while end < total and combined[end][0] == combined[start][0]:
+            end += 1
+        tied = end - start
+        mean_rank = (start + end + 1) / 2
+        rank_sum_a += mean_rank * sum(1 for index in range(start, end) if combined[index][1] == 0)
+        tie_correction += tied ** 3 - tied
+        start = end
+    u_statistic = rank_sum_a - count_a * (count_a + 1) / 2
+    mean = count_a * count_b / 2
+    variance = count_a * count_b / 12 * ((total + 1) - tie_correction / (total * (total - 1)))
+    if variance <= 0:
+        # Every value is the same, so the samples cannot differ
+        return u_statistic, 1.0
+    z_score = max(0.0, abs(u_statistic - mean) - 0.5) / math.sqrt(variance)
+    return u_statistic, math.erfc(z_score / math.sqrt(2))
+
+
+def compare_results(baseline: List[Dict[str, Any]], current: List[Dict[str, Any]],
+                    alpha: float = BENCHMARK_ALPHA) -> Dict[str, Any]:
+    """
+    Compares the runs of a scenario with the runs recorded in the baseline.
+    A change of the generations-to-success distribution means the algorithm behaves differently;
+    a change of throughput only means it runs faster or slower.
+
+    Args:
+        baseline (List[Dict[str, Any]]): The runs recorded in the baseline.
+        current (List[Dict[str, Any]]): The runs of the current code.
+        alpha (float, optional): The significance level. Defaults to BENCHMARK_ALPHA.
+
+    Returns:
+        Dict[str, Any]: The medians, p-values, throughput ratio, and whether the behaviour changed.
+    """
+    baseline_generations, current_generations = generations_to_success(baseline), generations_to_success(current)
+    baseline_throughput, current_throughput = throughput(baseline), throughput(current)
+    generations_p = mann_whitney_u(baseline_generations, current_generations)[1]
+    return {"baselineMedianGenerations": median(baseline_generations),
+            "currentMedianGenerations": median(current_generations),
+            "baselineSuccesses": sum(result["succeeded"] for result in baseline),
+            "currentSuccesses": sum(result["succeeded"] for result in current),
+            "generationsP": generations_p,
+            "behaviourChanged": generations_p < alpha,
+            "throughputRatio": median(current_throughput) / median(baseline_throughput),
+            "throughputP": mann_whitney_u(baseline_throughput, current_throughput)[1]}
+
+
+def median(values: Sequence[float]) -> float:
+    """
+    Returns the median of some values.
+
+    Args:
+        values (Sequence[float]): The values.
+
+    Returns:
+        float: The median.
+    """
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def record_baseline(baseline_file: str, seed_count: int) -> None:
+    """
+    Runs every scenario and writes the results to a baseline file.
+
+    Args:
+        baseline_file (str): The path to the baseline file.
+        seed_count (int): The number of seeds of every scenario.
+    """
+    baseline = {}
+    for scenario in SCENARIOS:
+        baseline[scenario] = run_benchmark(scenario, seed_count)
+        print(f"{scenario}: median generations {median(generations_to_success(baseline[scenario]))}, "
+              f"median evaluations per second {median(throughput(baseline[scenario])):.0f}")
+    with open(baseline_file, "w") as file:
+        json.dump(baseline, file, indent=1)
+    print(f"Saved to {baseline_file}")
+
+
+def compare_baseline(baseline_file: str) -> bool:
+    """
+    Runs every scenario of a baseline file on the same seeds and compares the results with it.
+
+    Args:
+        baseline_file (str): The path to the baseline file.
+
+    Returns:
+        bool: Whether every scenario behaves as in the baseline.
+    """
+    with open(baseline_file) as file:
+        baseline = json.load(file)
+    unchanged = True
+    for scenario, baseline_results in baseline.items():
+        comparison = compare_results(baseline_results, run_benchmark(scenario, len(baseline_results)))
+        unchanged = unchanged and not comparison["behaviourChanged"]
+        print(f"{scenario}: median generations {comparison['baselineMedianGenerations']} -> "
+              f"{comparison['currentMedianGenerations']} (p = {comparison['generationsP']:.3f}), "
+              f"successes {comparison['baselineSuccesses']} -> {comparison['currentSuccesses']}, "
+              f"throughput x{comparison['throughputRatio']:.2f} (p = {comparison['throughputP']:.3f})"
+              f"{', behaviour changed' if comparison['behaviourChanged'] else ''}")
+    return unchanged
+
+
+def measure_startup(repeats: int) -> Dict[str, float]:
+    """
+    Measures the cold start of the program in fresh interpreters, against the start of an interpreter that does nothing.
+
+    Args:
+        repeats (int): The number of interpreters started for each measurement.
+
+    Returns:
+        Dict[str, float]: The median milliseconds of the empty interpreter, of the program's start, and of the difference.
+    """
+    def median_milliseconds(arguments: List[str]) -> float:
+        timings = []
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + arguments, cwd=PACKAGE_DIRECTORY, check=True, stdout=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+        return median(timings)
+
+    interpreter = median_milliseconds(["-c", "pass"])
+    startup = median_milliseconds(["-c", STARTUP_SCRIPT])
+    return {"interpreter": interpreter, "startup": startup, "overhead": startup - interpreter}
+
+
+if __name__ == "__main__":
+    """
+    Records a baseline: python3 benchmark.py record [baseline file] [seeds]
+    Compares with a baseline: python3 benchmark.py compare [baseline file]
+    Measures the cold start: python3 benchmark.py startup [repeats]
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else COMMAND_COMPARE
+    baseline_file = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BASELINE_FILE
+    if command == COMMAND_STARTUP:
+        timings = measure_startup(int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_STARTUP_REPEATS)
+        print(f"Cold start {timings['startup']:.1f} ms, of which the interpreter takes {timings['interpreter']:.1f} ms "
+              f"and the program {timings['overhead']:.1f} ms")
+    elif command == COMMAND_RECORD:
+        record_baseline(baseline_file, int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SEED_COUNT)
+    elif command == COMMAND_COMPARE:
+        sys.exit(0 if compare_baseline(baseline_file) else 1)
+    else:
+        print(f"Unknown command {command}, expected {COMMAND_RECORD}, {COMMAND_COMPARE} or {COMMAND_STARTUP}")
+        sys.exit(1)
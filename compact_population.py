@@ -0,0 +1,132 @@
+# Author: Daniel Glauber
+# File: compact_population.py
+# Description: Contains the CompactPopulation class, which simulates a population with a probability vector (compact GA).
+import os
+from itertools import compress
+from operator import ne
+from typing import Any, List, Optional
+from individual import Individual, calculate_fitness
+from population import Population, FULL_DEBUG, LIMITED_DEBUG, logger
+
+# Constants for magic numbers and strings
+CHECKPOINT_FILE_NAME = "checkpoint_probabilities.txt"
+
+
+class CompactPopulation(Population):
+    """
+    Class CompactPopulation is a compact GA. Instead of individuals it keeps, for every gene, how many of
+    populationSizeN virtual individuals hold a 1, so memory is O(stringSizeN) whatever the population size.
+    Each competition samples two individuals from the vector and moves every gene where they differ one individual
+    towards the winner. A generation is populationSizeN / 2 competitions, which is populationSizeN evaluations like a
+    generation of the simple GA, so bisection and the generation limits keep their meaning for the virtual size.
+    The current generation only holds the best and worst individual sampled in the last generation.
+    """
+
+    def reload_settings(self) -> None:
+        super().reload_settings()
+        # Number of virtual individuals holding a 1 at every gene, starting from probability one half
+        self.ones_counts = [self.population_size // 2] * self.string_size
+
+    def create_surrogate(self) -> Optional[Any]:
+        # There are no bred children to pre-screen
+        return None
+
+    def sample_solution(self) -> bytearray:
+        """
+        Samples a solution from the probability vector.
+
+        Returns:
+            bytearray: The new solution.
+        """
+        random = self.rng.random
+        size = self.population_size
+        return bytearray([random() * size < count for count in self.ones_counts])
+
+    def run_competitions(self, count: int) -> None:
+        """
+        Runs competitions between pairs of sampled individuals, updating the probability vector after each one.
+        The best and worst individual sampled become the current generation.
+
+        Args:
+            count (int): The number of competitions.
+        """
+        ones_counts = self.ones_counts
+        positions = range(self.string_size)
+        fitness_function = self._fitnessFunction
+        best = worst = None
+        total_fitness = 0
+        for competition in range(count):
+            solution_a, solution_b = self.sample_solution(), self.sample_solution()
+            fitness_a = calculate_fitness(fitness_function, solution_a)
+            fitness_b = calculate_fitness(fitness_function, solution_b)
+            total_fitness += fitness_a + fitness_b
+            if fitness_a >= fitness_b:
+                winner, loser = (solution_a, fitness_a), (solution_b, fitness_b)
+            else:
+                winner, loser = (solution_b, fitness_b), (solution_a, fitness_a)
+            # Only the genes where the two individuals differ move
+            for index in compress(positions, map(ne, winner[0], loser[0])):
+                ones_counts[index] += 1 if winner[0][index] else -1
+            if best is None or winner[1] > best[1]:
+                best = winner
+            if worst is None or loser[1] < worst[1]:
+                worst = loser
+            if self.full_debug == FULL_DEBUG:
+                logger.info(f"Winner: {winner[0]}, Fitness: {winner[1]}; Loser: {loser[0]}, Fitness: {loser[1]}")
+        Individual.evaluation_count += 2 * count
+        self.current_average_fitness = total_fitness / (2 * count)
+        self.next_generation = [Individual(fitness_function, best[0], best[1], copy_solution=False),
+                                Individual(fitness_function, worst[0], worst[1], copy_solution=False)]
+
+    def initialize_random_starting_population(self) -> None:
+        """
+        Starts a new probability vector and runs the competitions of the first generation.
+        """
+        self.current_generation = []
+        self.next_generation = []
+        self.reload_settings()
+        self.select_mating_parents()
+        self.replace_current_population()
+        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
+            logger.info(f"Initial probability vector: {self.probabilities()}")
+
+    def select_mating_parents(self) -> None:
+        """
+        Runs the competitions of one generation.
+        """
+        self.run_competitions(max(1, self.population_size // 2))
+
+    def probabilities(self) -> List[float]:
+        """
+        Returns the probability vector.
+
+        Returns:
+            List[float]: The probability of a 1 at every gene.
+        """
+        return [count / self.population_size for count in self.ones_counts]
+
+    def get_average_fitness(self) -> float:
+        # Average fitness of every individual sampled in the last generation
+        return self.current_average_fitness
+
+    def get_diversity(self) -> float:
+        """
+        Calculates the diversity of the virtual population from the probability vector.
+        Each locus contributes 4p(1-p), as in Population.get_diversity.
+
+        Returns:
+            float: The average locus diversity, 0.0 once every gene has converged.
+        """
+        size = self.population_size
+        return sum(4 * count * (size - count) for count in self.ones_counts) / (size * size * self.string_size)
+
+    def checkpoint(self) -> str:
+        """
+        Writes the population size and the number of virtual individuals holding a 1 at every gene.
+
+        Returns:
+            str: The path of the checkpoint file.
+        """
+        with open(CHECKPOINT_FILE_NAME, "w") as file:
+            file.write("\n".join(map(str, [self.population_size] + self.ones_counts)))
+        return os.path.abspath(CHECKPOINT_FILE_NAME)
@@ -0,0 +1,111 @@
+# Author: Daniel Glauber
+# File: control.py
+# Description: Contains the ControlChannel class, which reads commands for a running GA from a control file.
+import os
+import signal
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Constants for magic numbers and strings
+NO_CONTROL_FILE = "none"
+COMMAND_STOP = "stop"
+COMMAND_CHECKPOINT = "checkpoint"
+COMMAND_STATS = "stats"
+COMMENT_PREFIX = "#"
+# Shortest time between two looks at the control file
+CONTROL_POLL_SECONDS = 0.5
+
+
+class ControlChannel:
+    """
+    Class ControlChannel watches a control file for commands written by an operator while a run is going.
+    Each line of the file is a command (stop, checkpoint or stats) or a setting and its new value, as in a settings file.
+    The file is read again whenever its modification time changes, so rewriting it sends a new set of commands,
+    and a file left over from an earlier run is not replayed.
+    Between looks at the file a poll only reads the clock. On systems with SIGUSR1 the signal asks for a look
+    at the file and for the statistics straight away.
+    """
+
+    def __init__(self, control_file: str, poll_seconds: float = CONTROL_POLL_SECONDS) -> None:
+        """
+        Initializes the channel and installs the SIGUSR1 handler when it can.
+
+        Args:
+            control_file (str): The path of the control file.
+            poll_seconds (float, optional): The shortest time between two looks at the file. Defaults to CONTROL_POLL_SECONDS.
+        """
+        self.control_file = control_file
+        self.poll_seconds = poll_seconds
+        self.last_modified = self.modified_time()
+        self.next_poll = time.monotonic() + poll_seconds
+        self.signalled = False
+        self.previous_handler = None
+        # Signal handlers can only be installed from the main thread
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            self.previous_handler = signal.signal(signal.SIGUSR1, self.handle_signal)
+
+    def handle_signal(self, signal_number: int, frame: object) -> None:
+        """
+        Marks the channel so the next poll reads the file and reports the statistics.
+
+        Args:
+            signal_number (int): The signal received.
+            frame (object): The interrupted stack frame.
+        """
+        self.signalled = True
+
+    def modified_time(self) -> Optional[int]:
+        """
+        Returns the modification time of the control file.
+
+        Returns:
+            int: The modification time in nanoseconds, or None if the file does not exist.
+        """
+        try:
+            return os.stat(self.control_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def read_commands(self) -> List[Tuple[str, List[str]]]:
+        """
+        Reads the commands in the control file, skipping blank lines and comments.
+
+        Returns:
+            List[Tuple[str, List[str]]]: Every command with its arguments.
+        """
+        try:
+            with open(self.control_file) as file:
+                lines = file.read().splitlines()
+        except OSError as error:
+            print(f"Could not read control file {self.control_file}: {error}")
+            return []
+        return [(words[0], words[1:]) for words in map(str.split, lines) if words and not words[0].startswith(COMMENT_PREFIX)]
+
+    def poll(self) -> List[Tuple[str, List[str]]]:
+        """
+        Returns the commands sent since the last poll.
+
+        Returns:
+            List[Tuple[str, List[str]]]: The new commands with their arguments, usually none.
+        """
+        if not self.signalled and time.monotonic() < self.next_poll:
+            return []
+        signalled, self.signalled = self.signalled, False
+        self.next_poll = time.monotonic() + self.poll_seconds
+        commands = []
+        modified = self.modified_time()
+        if modified is not None and modified != self.last_modified:
+            self.last_modified = modified
+            commands = self.read_commands()
+        if signalled and (COMMAND_STATS, []) not in commands:
+            commands.append((COMMAND_STATS, []))
+        return commands
+
+    def close(self) -> None:
+        """
+        Puts back the SIGUSR1 handler that was installed before the channel.
+        """
+        if self.previous_handler is not None:
+            signal.signal(signal.SIGUSR1, self.previous_handler)
+            self.previous_handler = None
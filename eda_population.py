@@ -0,0 +1,183 @@
+# Author: Daniel Glauber
+# File: eda_population.py
+# Description: Contains the EDAPopulation class, which samples every generation from a probabilistic model of the selected individuals.
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+from individual import Individual
+from population import Population, FULL_DEBUG, LIMITED_DEBUG, logger
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+EDA_MODEL_OFF = 0
+EDA_MODEL_UMDA = 1
+EDA_MODEL_ECGA = 2
+EDA_MODEL_COMPACT = 3
+# Largest group of genes the linkage model builds, which bounds the cost of counting the values of a group
+ECGA_MAX_GROUP_SIZE = 16
+
+
+def group_cost(codes: Sequence[int], group_size: int) -> float:
+    """
+    Calculates the combined complexity of one group of a marginal product model: the bits needed to store
+    its probability table plus the bits needed to compress the values of the group in the selected individuals.
+
+    Args:
+        codes (Sequence[int]): The value of the group in every selected individual, as packed bits.
+        group_size (int): The number of genes in the group.
+
+    Returns:
+        float: The complexity in bits.
+    """
+    count = len(codes)
+    compressed = count * math.log2(count) - sum(occurrences * math.log2(occurrences)
+                                                for occurrences in Counter(codes).values())
+    return compressed + math.log2(count + 1) * ((1 << group_size) - 1)
+
+
+def learn_linkage_groups(columns: List[bytes]) -> List[List[int]]:
+    """
+    Learns a marginal product model in the style of the extended compact GA. Every gene starts in a group of its own,
+    and the two groups whose merge lowers the combined complexity the most are merged until no merge lowers it.
+    The gain of every pair of groups is kept between merges, so only the pairs of the new group are measured again.
+
+    Args:
+        columns (List[bytes]): The value of every gene in the selected individuals, one column per gene.
+
+    Returns:
+        List[List[int]]: The groups of genes.
+    """
+    # Every group holds its genes, the packed values of its genes in each individual, and its complexity
+    groups = {locus: ([locus], list(column), group_cost(column, 1)) for locus, column in enumerate(columns)}
+    next_id = len(columns)
+
+    def merge_gain(id_a: int, id_b: int) -> Optional[float]:
+        loci_a, codes_a, cost_a = groups[id_a]
+        loci_b, codes_b, cost_b = groups[id_b]
+        if len(loci_a) + len(loci_b) > ECGA_MAX_GROUP_SIZE:
+            return None
+        shift = len(loci_b)
+        merged = [(code_a << shift) | code_b for code_a, code_b in zip(codes_a, codes_b)]
+        return group_cost(merged, len(loci_a) + len(loci_b)) - cost_a - cost_b
+
+    gains = {}
+    ids = list(groups)
+    for index, id_a in enumerate(ids):
+        for id_b in ids[index + 1:]:
+            gain = merge_gain(id_a, id_b)
+            if gain is not None and gain < 0:
+                gains[(id_a, id_b)] = gain
+    while gains:
+        id_a, id_b = min(gains, key=gains.get)
+        loci_a, codes_a, cost_a = groups.pop(id_a)
+        loci_b, codes_b, cost_b = groups.pop(id_b)
+        shift = len(loci_b)
+        codes = [(code_a << shift) | code_b for code_a, code_b in zip(codes_a, codes_b)]
+        groups[next_id] = (loci_a + loci_b, codes, group_cost(codes, len(loci_a) + len(loci_b)))
+        gains = {pair: gain for pair, gain in gains.items() if id_a not in pair and id_b not in pair}
+        for other_id in groups:
+            if other_id != next_id:
+                gain = merge_gain(other_id, next_id)
+                if gain is not None and gain < 0:
+                    gains[(other_id, next_id)] = gain
+        next_id += 1
+    return sorted(sorted(loci) for loci, codes, cost in groups.values())
+
+
+class EDAPopulation(Population):
+    """
+    Class EDAPopulation is an estimation of distribution engine. Each generation it selects individuals by tournament,
+    learns how their genes are distributed, and samples the next generation from that model instead of using crossover.
+    UMDA treats every gene as independent. ECGA also learns which genes are linked and samples each linked group as a
+    whole, so the building blocks of a deceptive problem are not cut apart.
+    Both models are marginal product models, and sampling copies each group from a randomly chosen selected individual,
+    which draws it from the observed frequencies of the group.
+    """
+
+    def reload_settings(self) -> None:
+        super().reload_settings()
+        self.eda_model = sl.get_setting("edaModel")
+        self.model_statistics = None
+
+    def create_surrogate(self) -> Optional[Any]:
+        # Children are sampled from the model, so there are no bred candidates to pre-screen
+        return None
+
+    def select_individuals(self, count: int) -> List[bytearray]:
+        """
+        Selects individuals by tournament selection with replacement.
+
+        Args:
+            count (int): The number of individuals to select.
+
+        Returns:
+            List[bytearray]: The solutions of the selected individuals.
+        """
+        generation = self.current_generation
+        fitness = [individual.get_solution_fitness() for individual in generation]
+        positions = range(len(generation))
+        choices = self.rng.choices
+        size = self.tournament_selection_size
+        return [generation[max(choices(positions, k=size), key=fitness.__getitem__)].get_solution() for index in range(count)]
+
+    def build_model(self, columns: List[bytes]) -> List[List[int]]:
+        """
+        Builds the groups of the model from the selected individuals.
+
+        Args:
+            columns (List[bytes]): The value of every gene in the selected individuals, one column per gene.
+
+        Returns:
+            List[List[int]]: The groups of genes sampled together.
+        """
+        if self.eda_model == EDA_MODEL_ECGA:
+            return learn_linkage_groups(columns)
+        return [[locus] for locus in range(len(columns))]
+
+    def sample_solutions(self, groups: List[List[int]], columns: List[bytes], count: int) -> List[bytearray]:
+        """
+        Samples new solutions from the model, one column at a time.
+
+        Args:
+            groups (List[List[int]]): The groups of genes sampled together.
+            columns (List[bytes]): The value of every gene in the selected individuals, one column per gene.
+            count (int): The number of solutions to sample.
+
+        Returns:
+            List[bytearray]: The new solutions.
+        """
+        donors_range = range(len(columns[0]))
+        sampled_columns = [b""] * len(columns)
+        for loci in groups:
+            donors = self.rng.choices(donors_range, k=count)
+            for locus in loci:
+                sampled_columns[locus] = bytes(map(columns[locus].__getitem__, donors))
+        return [bytearray(row) for row in zip(*sampled_columns)]
+
+    def select_mating_parents(self) -> None:
+        """
+        Builds the next generation from the model of the selected individuals, keeping the eliteCount best individuals.
+        """
+        elite_count = max(0, min(self.elite_count, self.population_size - 1))
+        selected = self.select_individuals(self.population_size)
+        columns = [bytes(column) for column in zip(*selected)]
+        groups = self.build_model(columns)
+        children = Individual.from_solutions(self._fitnessFunction,
+                                             self.sample_solutions(groups, columns, self.population_size - elite_count))
+        Individual.evaluate_many(children)
+        self.next_generation = children + self.select_elites(elite_count)
+        self.model_statistics = self.get_model_statistics(groups)
+        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
+            logger.info(f"Linkage groups: {[group for group in groups if len(group) > 1]}")
+
+    def get_model_statistics(self, groups: List[List[int]]) -> Dict[str, int]:
+        """
+        Summarizes the groups of the model.
+
+        Args:
+            groups (List[List[int]]): The groups of genes sampled together.
+
+        Returns:
+            Dict[str, int]: The number of groups and the size of the largest group.
+        """
+        return {"groups": len(groups), "largestGroup": max(map(len, groups))}
@@ -0,0 +1,333 @@
+# Author: Daniel Glauber
+# File: genome_storage.py
+# Description: Contains the bit-packed genome matrix used to store populations outside of Python objects.
+import mmap
+import os
+import struct
+from typing import Any, Iterator, Tuple
+from rng import BIT_CHARACTERS_TO_BYTES
+
+# Constants for magic numbers and strings
+GENOME_MATRIX_MAGIC = b"SGAP"
+# Magic, population size and string size
+GENOME_MATRIX_HEADER = struct.Struct("<4sII")
+FITNESS_ITEM_FORMAT = "i"
+FITNESS_ITEM_SIZE = struct.calcsize(FITNESS_ITEM_FORMAT)
+# Translates the bytes 0 and 1 to the characters '0' and '1'
+BYTES_TO_BIT_CHARACTERS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def packed_size(string_size: int) -> int:
+    """
+    Returns the number of bytes used by one bit-packed solution.
+
+    Args:
+        string_size (int): The size of the solution.
+
+    Returns:
+        int: The number of bytes.
+    """
+    return (string_size + 7) // 8
+
+
+def solution_as_integer(solution: bytearray) -> int:
+    """
+    Packs a solution of one byte per bit into an integer, so Hamming distances are one XOR and a bit count.
+
+    Args:
+        solution (bytearray): The solution to pack.
+
+    Returns:
+        int: The packed solution, with the first bit as the most significant.
+    """
+    return int(solution.translate(BYTES_TO_BIT_CHARACTERS) or b"0", 2)
+
+
+def pack_solution(solution: bytearray) -> bytes:
+    """
+    Packs a solution of one byte per bit into eight bits per byte.
+
+    Args:
+        solution (bytearray): The solution to pack.
+
+    Returns:
+        bytes: The packed solution.
+    """
+    return solution_as_integer(solution).to_bytes(packed_size(len(solution)), "big")
+
+
+def unpack_solution(packed: bytes, string_size: int) -> bytearray:
+    """
+    Unpacks a bit-packed solution into one byte per bit.
+
+    Args:
+        packed (bytes): The packed solution.
+        string_size (int): The size of the solution.
+
+    Returns:
+        bytearray: The unpacked solution.
+    """
+    return bytearray(format(int.from_bytes(packed, "big"), f"0{string_size}b").encode().translate(BIT_CHARACTERS_TO_BYTES))
+
+
+class GenomeMatrix:
+    """
+    Class GenomeMatrix stores the solutions of a population bit-packed in a flat buffer,
+    with their fitness values in a parallel array after the solutions.
+    The buffer can be a memory-mapped file or shared memory, so the same layout serves as
+    large population storage, as a checkpoint file and as memory shared between processes.
+    """
+
+    def __init__(self, buffer: Any, population_size: int, string_size: int, initialize_header: bool = True) -> None:
+        """
+        Initializes a GenomeMatrix over an existing buffer.
+
+        Args:
+            buffer (Any): A writable buffer of at least required_size(population_size, string_size) bytes.
+            population_size (int): The number of solutions.
+            string_size (int): The size of each solution.
+            initialize_header (bool, optional): Whether to write the header. Defaults to True.
+        """
+        self.buffer = buffer
+        self.population_size = population_size
+        self.string_size = string_size
+        self.row_size = packed_size(string_size)
+        view = memoryview(buffer)
+        if initialize_header:
+            view[:GENOME_MATRIX_HEADER.size] = GENOME_MATRIX_HEADER.pack(GENOME_MATRIX_MAGIC, population_size, string_size)
+        genomes_start = GENOME_MATRIX_HEADER.size
+        fitness_start = GenomeMatrix.fitness_offset(population_size, string_size)
+        self.genomes = view[genomes_start:genomes_start + population_size * self.row_size]
+        self.fitness = view[fitness_start:fitness_start + population_size * FITNESS_ITEM_SIZE].cast(FITNESS_ITEM_FORMAT)
+
+    @staticmethod
+    def fitness_offset(population_size: int, string_size: int) -> int:
+        """
+        Returns the offset of the fitness array, aligned to the size of a fitness value.
+
+        Args:
+            population_size (int): The number of solutions.
+            string_size (int): The size of each solution.
+
+        Returns:
+            int: The offset in bytes.
+        """
+        genomes_end = GENOME_MATRIX_HEADER.size + population_size * packed_size(string_size)
+        return -(-genomes_end // FITNESS_ITEM_SIZE) * FITNESS_ITEM_SIZE
+
+    @staticmethod
+    def required_size(population_size: int, string_size: int) -> int:
+        """
+        Returns the number of bytes needed to store a population.
+
+        Args:
+            population_size (int): The number of solutions.
+            string_size (int): The size of each solution.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return GenomeMatrix.fitness_offset(population_size, string_size) + population_size * FITNESS_ITEM_SIZE
+
+    @staticmethod
+    def read_header(buffer: Any) -> Tuple[int, int]:
+        """
+        Reads the population size and string size from a buffer holding a GenomeMatrix.
+
+        Args:
+            buffer (Any): The buffer to read.
+
+        Returns:
+            Tuple[int, int]: The population size and string size.
+        """
+        magic, population_size, string_size = GENOME_MATRIX_HEADER.unpack_from(buffer)
+        if magic != GENOME_MATRIX_MAGIC:
+            raise ValueError("Buffer does not hold a genome matrix")
+        return population_size, string_size
+
+    def get_packed(self, index: int) -> memoryview:
+        """
+        Returns the packed solution at an index without copying it.
+
+        Args:
+            index (int): The index of the solution.
+
+        Returns:
+            memoryview: The packed solution.
+        """
+        start = index * self.row_size
+        return self.genomes[start:start + self.row_size]
+
+    def get_solution(self, index: int) -> bytearray:
+        """
+        Returns the unpacked solution at an index.
+
+        Args:
+            index (int): The index of the solution.
+
+        Returns:
+            bytearray: The solution.
+        """
+        return unpack_solution(self.get_packed(index), self.string_size)
+
+    def set_solution(self, index: int, solution: bytearray, fitness: int) -> None:
+        """
+        Stores a solution and its fitness at an index.
+
+        Args:
+            index (int): The index to store the solution at.
+            solution (bytearray): The solution.
+            fitness (int): The fitness of the solution.
+        """
+        start = index * self.row_size
+        self.genomes[start:start + self.row_size] = pack_solution(solution)
+        self.fitness[index] = fitness
+
+    def copy_row(self, source: "GenomeMatrix", source_index: int, index: int) -> None:
+        """
+        Copies a packed solution and its fitness from another matrix without unpacking it.
+
+        Args:
+            source (GenomeMatrix): The matrix to copy from.
+            source_index (int): The index in the source matrix.
+            index (int): The index to store the solution at.
+        """
+        start = index * self.row_size
+        self.genomes[start:start + self.row_size] = source.get_packed(source_index)
+        self.fitness[index] = source.fitness[source_index]
+
+    def iter_solutions(self, start: int = 0, stop: int = None) -> Iterator[bytearray]:
+        """
+        Streams the unpacked solutions in a range of indexes.
+
+        Args:
+            start (int, optional): The first index. Defaults to 0.
+            stop (int, optional): The index to stop before. Defaults to the population size.
+
+        Yields:
+            bytearray: The next solution.
+        """
+        stop = self.population_size if stop is None else stop
+        for index in range(start, stop):
+            yield self.get_solution(index)
+
+    def to_bytes(self) -> bytes:
+        """
+        Copies the header, solutions and fitness values of the matrix.
+        The copy can be loaded again with GenomeMatrix.from_bytes.
+
+        Returns:
+            bytes: The contents of the matrix.
+        """
+        return bytes(self.buffer[:GenomeMatrix.required_size(self.population_size, self.string_size)])
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "GenomeMatrix":
+        """
+        Creates a matrix over a copy of the contents written by to_bytes.
+
+        Args:
+            data (bytes): The contents of a matrix.
+
+        Returns:
+            GenomeMatrix: The matrix.
+        """
+        population_size, string_size = GenomeMatrix.read_header(data)
+        return GenomeMatrix(bytearray(data), population_size, string_size, initialize_header=False)
+
+    def release(self) -> None:
+        """
+        Releases the views into the buffer so that the buffer can be closed.
+        """
+        self.fitness.release()
+        self.genomes.release()
+
+
+class MappedGenomeFile:
+    """
+    Class MappedGenomeFile keeps a GenomeMatrix in a memory-mapped file.
+    The file is a self-describing copy of the population, so it can be reopened as a checkpoint.
+    """
+
+    def __init__(self, path: str, population_size: int = None, string_size: int = None) -> None:
+        """
+        Creates a new mapped file, or opens an existing one when no sizes are given.
+
+        Args:
+            path (str): The path of the file.
+            population_size (int, optional): The number of solutions of a new file.
+            string_size (int, optional): The size of each solution of a new file.
+        """
+        self.path = path
+        create = population_size is not None
+        with open(path, "w+b" if create else "r+b") as file:
+            if create:
+                file.truncate(GenomeMatrix.required_size(population_size, string_size))
+            self.mmap = mmap.mmap(file.fileno(), 0)
+        if not create:
+            population_size, string_size = GenomeMatrix.read_header(self.mmap)
+        self.matrix = GenomeMatrix(self.mmap, population_size, string_size, initialize_header=create)
+
+    def flush(self) -> None:
+        """
+        Writes the mapped pages back to the file.
+        """
+        self.mmap.flush()
+
+    def close(self, delete: bool = False) -> None:
+        """
+        Closes the mapping, optionally deleting the file.
+
+        Args:
+            delete (bool, optional): Whether to delete the file. Defaults to False.
+        """
+        self.matrix.release()
+        self.mmap.close()
+        if delete:
+            os.remove(self.path)
+
+
+class SharedGenomeMemory:
+    """
+    Class SharedGenomeMemory keeps a GenomeMatrix in a named shared memory block,
+    so worker processes can attach to the same population by name instead of receiving copies of it.
+    """
+
+    def __init__(self, name: str = None, population_size: int = None, string_size: int = None) -> None:
+        """
+        Creates a new shared memory block, or attaches to an existing one when no sizes are given.
+
+        Args:
+            name (str, optional): The name of the block to attach to. Defaults to None, which creates a new block.
+            population_size (int, optional): The number of solutions of a new block.
+            string_size (int, optional): The size of each solution of a new block.
+        """
+        # Importing multiprocessing is slow, so it waits until shared memory is used
+        from multiprocessing import shared_memory
+        create = population_size is not None
+        if create:
+            self.shared_memory = shared_memory.SharedMemory(create=True,
+                                                            size=GenomeMatrix.required_size(population_size, string_size))
+        else:
+            self.shared_memory = shared_memory.SharedMemory(name=name)
+            population_size, string_size = GenomeMatrix.read_header(self.shared_memory.buf)
+        self.name = self.shared_memory.name
+        self.matrix = GenomeMatrix(self.shared_memory.buf, population_size, string_size, initialize_header=create)
+
+    def flush(self) -> None:
+        """
+        Shared memory has no backing file, so there is nothing to write back.
+        """
+        pass
+
+    def close(self, delete: bool = False) -> None:
+        """
+        Detaches from the block, optionally removing it.
+
+        Args:
+            delete (bool, optional): Whether to remove the block. Only its creator should do this. Defaults to False.
+        """
+        self.matrix.release()
+        self.shared_memory.close()
+        if delete:
+            self.shared_memory.unlink()
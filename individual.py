@@ -1,69 +1,125 @@
 # Author: Daniel Glauber
 # File: individual.py
 # Description: Contains the Individual class, which represents a single solution in the population.
+from array import array
+from typing import Iterable, List, Optional, Tuple
+from trap import TrapFunction
 
 # Constants for magic numbers and strings
 FITNESS_FUNCTION_SIMPLE = 0
 FITNESS_FUNCTION_COMPLEX = 1
+TRAP_PARTITION_SIZE = 4
+
+# Trap function scored by FITNESS_FUNCTION_COMPLEX, replaced by set_trap_function when the settings change it
+trap_function = TrapFunction()
 
 # Class Individual represents a single solution in population
 class Individual:
     """
     Class Individual represents a single solution in the population.
+    The solution is stored as a bytearray with one byte per bit, and the fitness is only
+    evaluated when it is first read after the solution changes.
     """
+    __slots__ = ("_fitness_function_value", "_solution", "_solution_fitness", "_fitness_evaluated", "_shared")
+
+    # Number of fitness evaluations performed by all individuals
+    evaluation_count = 0
+    # Number of solution buffers copied, and number of copies avoided by sharing a buffer
+    solution_copies = 0
+    solution_shares = 0
 
-    def __init__(self, fitness_function: int, starting_solution: list[int] = [], solution_fitness: int = None) -> None:
+    def __init__(self, fitness_function: int, starting_solution: Optional[Iterable[int]] = None, solution_fitness: int = None,
+                 copy_solution: bool = True) -> None:
         """
         Initializes an Individual instance.
 
         Args:
             fitness_function (int): The fitness function to use.
-            starting_solution (list[int], optional): The initial solution. Defaults to [].
-            solution_fitness (int, optional): The fitness of the initial solution. Defaults to None.
+            starting_solution (Iterable[int], optional): The initial solution. Defaults to an empty solution.
+            solution_fitness (int, optional): The fitness of the initial solution. Defaults to None,
+                which evaluates the fitness the first time it is read.
+            copy_solution (bool, optional): Whether to copy starting_solution. Pass False to hand over
+                a freshly built bytearray, or the typed array of an integer or float genome,
+                that nothing else references. Defaults to True.
         """
         self._fitness_function_value = fitness_function
-        self._solution = starting_solution.copy()
-        self._fitness_evaluated = False
+        if starting_solution is None:
+            self._solution = bytearray()
+        elif copy_solution or not isinstance(starting_solution, (bytearray, array)):
+            self._solution = bytearray(starting_solution)
+            Individual.solution_copies += 1
+        else:
+            self._solution = starting_solution
+        self._shared = False
         self._solution_fitness = solution_fitness
-        if len(self._solution) > 0:
-            self.evaluate_solution_fitness(solution_fitness)
+        self._fitness_evaluated = solution_fitness is not None
 
-    # Getter and setter for _fitness_function_value
-    @property
-    def fitness_function_value(self) -> int:
-        return self._fitness_function_value
+    @classmethod
+    def from_solutions(cls, fitness_function: int, solutions: Iterable[bytearray]) -> List["Individual"]:
+        """
+        Creates many individuals at once, taking ownership of the given solutions without copying them.
 
-    @fitness_function_value.setter
-    def fitness_function_value(self, value: int) -> None:
-        self._fitness_function_value = value
+        Args:
+            fitness_function (int): The fitness function to use.
+            solutions (Iterable[bytearray]): The solutions of the new individuals.
 
-    # Getter and setter for _solution
-    @property
-    def solution(self) -> list[int]:
-        return self._solution
+        Returns:
+            List[Individual]: The new individuals, with their fitness not yet evaluated.
+        """
+        new = cls.__new__
+        individuals = []
+        for solution in solutions:
+            individual = new(cls)
+            individual._fitness_function_value = fitness_function
+            individual._solution = solution
+            individual._shared = False
+            individual._solution_fitness = None
+            individual._fitness_evaluated = False
+            individuals.append(individual)
+        return individuals
 
-    @solution.setter
-    def solution(self, solution: list[int]) -> None:
-        self._solution = solution.copy()
-        self._fitness_evaluated = False
+    @classmethod
+    def evaluate_many(cls, individuals: Iterable["Individual"]) -> None:
+        """
+        Evaluates the fitness of every individual whose fitness is stale in a single pass.
 
-    # Getter and setter for _fitness_evaluated
-    @property
-    def fitness_evaluated(self) -> bool:
-        return self._fitness_evaluated
+        Args:
+            individuals (Iterable[Individual]): The individuals to evaluate.
+        """
+        stale = [individual for individual in individuals if not individual._fitness_evaluated]
+        Individual.evaluation_count += len(stale)
+        # Trap genomes are scored together in one pass
+        trapped = [individual for individual in stale if individual._fitness_function_value == FITNESS_FUNCTION_COMPLEX]
+        for individual, fitness in zip(trapped, trap_function.evaluate_many([individual._solution for individual in trapped])):
+            individual._solution_fitness = fitness
+            individual._fitness_evaluated = True
+        for individual in stale:
+            if not individual._fitness_evaluated:
+                individual._solution_fitness = calculate_fitness(individual._fitness_function_value, individual._solution)
+                individual._fitness_evaluated = True
 
-    @fitness_evaluated.setter
-    def fitness_evaluated(self, evaluated: bool) -> None:
-        self._fitness_evaluated = evaluated
+    @classmethod
+    def clone(cls, parent: "Individual") -> "Individual":
+        """
+        Creates a copy-on-write clone of an individual.
+        The clone shares the parent's solution buffer and fitness, and whichever of the two
+        is mutated first copies the buffer before changing it.
 
-    # Getter for _solution_fitness
-    @property
-    def solution_fitness(self) -> int:
-        if self._fitness_evaluated:
-            return self._solution_fitness
-        else:
-            self.evaluate_solution_fitness()
-            return self._solution_fitness
+        Args:
+            parent (Individual): The individual to clone.
+
+        Returns:
+            Individual: The clone.
+        """
+        clone = cls.__new__(cls)
+        clone._fitness_function_value = parent._fitness_function_value
+        clone._solution = parent._solution
+        clone._solution_fitness = parent._solution_fitness
+        clone._fitness_evaluated = parent._fitness_evaluated
+        clone._shared = True
+        parent._shared = True
+        Individual.solution_shares += 1
+        return clone
 
     def get_fitness_function_value(self) -> int:
         """
@@ -82,24 +138,26 @@ class Individual:
             value (int): The fitness function value to set.
         """
         self._fitness_function_value = value
+        self._fitness_evaluated = False
 
-    def get_solution(self) -> list[int]:
+    def get_solution(self) -> bytearray:
         """
         Returns the solution.
 
         Returns:
-            list[int]: The solution.
+            bytearray: The solution.
         """
         return self._solution
 
-    def set_solution(self, solution: list[int]) -> None:
+    def set_solution(self, solution: Iterable[int]) -> None:
         """
         Sets the solution.
 
         Args:
-            solution (list[int]): The solution to set.
+            solution (Iterable[int]): The solution to set.
         """
-        self._solution = solution.copy()
+        self._solution = bytearray(solution)
+        self._shared = False
         self._fitness_evaluated = False
 
     def is_fitness_evaluated(self) -> bool:
@@ -120,6 +178,32 @@ class Individual:
         """
         self._fitness_evaluated = evaluated
 
+    def get_solution_fitness(self) -> int:
+        """
+        Returns the fitness of the solution, evaluating it first if the solution changed.
+
+        Returns:
+            int: The fitness of the solution.
+        """
+        if not self._fitness_evaluated:
+            self.evaluate_solution_fitness()
+        return self._solution_fitness
+
+    # Properties share the getter and setter methods above
+    fitness_function_value = property(get_fitness_function_value, set_fitness_function_value)
+    solution = property(get_solution, set_solution)
+    fitness_evaluated = property(is_fitness_evaluated, set_fitness_evaluated)
+    solution_fitness = property(get_solution_fitness)
+
+    def get_objectives(self) -> Tuple[int, ...]:
+        """
+        Returns the objective vector of the solution for multi-objective mode, reusing the evaluated fitness.
+
+        Returns:
+            Tuple[int, ...]: The objective values, all maximized.
+        """
+        return calculate_objectives(self._fitness_function_value, self._solution, self.get_solution_fitness())
+
     def solution_as_string(self) -> str:
         """
         Returns the solution as a string.
@@ -129,22 +213,27 @@ class Individual:
         """
         return ",".join([str(x) for x in self._solution])
 
-    def mutate_solution(self, indexes_to_mutate_bool_list: list[bool], full_debug: bool = False) -> None:
+    def mutate_solution(self, indexes_to_mutate: List[int], full_debug: bool = False) -> None:
         """
-        Mutates the solution based on the provided boolean list.
+        Mutates the solution by flipping the bits at the provided indexes.
+        The fitness is marked stale and evaluated again the next time it is read.
 
         Args:
-            indexes_to_mutate_bool_list (list[bool]): List indicating which indexes to mutate.
+            indexes_to_mutate (List[int]): The indexes of the bits to flip.
             full_debug (bool, optional): Whether to print debug information. Defaults to False.
         """
-        if any(indexes_to_mutate_bool_list):
+        if indexes_to_mutate:
             if full_debug is True:
                 print(f"Before Mutation: {self.solution_as_string()}")
-            for index, mutate_boolean in enumerate(indexes_to_mutate_bool_list):
-                if mutate_boolean is True:
-                    # XOR operation to flip the bit (0 to 1 or 1 to 0)
-                    self._solution[index] = self._solution[index] ^ 1
-            self.evaluate_solution_fitness()
+            if self._shared:
+                # The buffer is shared with a clone, so take a private copy before writing to it
+                self._solution = self._solution.copy()
+                self._shared = False
+                Individual.solution_copies += 1
+            for index in indexes_to_mutate:
+                # XOR operation to flip the bit (0 to 1 or 1 to 0)
+                self._solution[index] = self._solution[index] ^ 1
+            self._fitness_evaluated = False
             if full_debug is True:
                 print(f"After Mutation: {self.solution_as_string()}\n")
 
@@ -157,37 +246,59 @@ class Individual:
         """
         if solution_fitness is not None:
             self._solution_fitness = solution_fitness
+            self._fitness_evaluated = True
         else:
-            if self._fitness_function_value == FITNESS_FUNCTION_SIMPLE:
-                # Simple fitness function: sum of the solution elements
-                self._solution_fitness = sum(self._solution)
-                self._fitness_evaluated = True
-            elif self._fitness_function_value == FITNESS_FUNCTION_COMPLEX:
-                # Complex fitness function: sum of fitness values from a lookup table
-                fitness_lookup = {
-                    0: 3,
-                    1: 2,
-                    2: 1,
-                    3: 0,
-                    4: 4
-                }
-                # Partition the solution into chunks of 4 and sum their fitness values
-                self._solution_fitness = sum([fitness_lookup[sum(partition)]
-                                             for partition in
-                                             (self._solution[i:i+4]
-                                              for i in
-                                              range(0, len(self._solution), 4))])
-                self._fitness_evaluated = True
+            Individual.evaluation_count += 1
+            self._solution_fitness = calculate_fitness(self._fitness_function_value, self._solution)
+            self._fitness_evaluated = True
 
-    def get_solution_fitness(self) -> int:
-        """
-        Returns the fitness of the solution.
 
-        Returns:
-            int: The fitness of the solution.
-        """
-        if self._fitness_evaluated is True:
-            return self._solution_fitness
-        else:
-            self.evaluate_solution_fitness()
-            return self._solution_fitness
+def calculate_fitness(fitness_function: int, solution: bytearray) -> int:
+    """
+    Calculates the fitness of a solution.
+
+    Args:
+        fitness_function (int): The fitness function to use.
+        solution (bytearray): The solution to evaluate.
+
+    Returns:
+        int: The fitness of the solution.
+    """
+    if fitness_function == FITNESS_FUNCTION_SIMPLE:
+        # Simple fitness function: sum of the solution elements
+        return sum(solution)
+    # Complex fitness function: the sum of a deceptive trap over the blocks of the solution
+    return trap_function.evaluate(solution)
+
+
+def set_trap_function(block_size: int, deception: int, linkage: int) -> None:
+    """
+    Replaces the trap function scored by the complex fitness function, keeping the current one if nothing changed.
+
+    Args:
+        block_size (int): The number of bits in a block.
+        deception (int): The fitness of a block of all 0s.
+        linkage (int): Whether blocks are tight or loose.
+    """
+    global trap_function
+    if (trap_function.block_size, trap_function.deception, trap_function.linkage) != (block_size, deception, linkage):
+        trap_function = TrapFunction(block_size, deception, linkage)
+
+
+def calculate_objectives(fitness_function: int, solution: bytearray, solution_fitness: int = None) -> Tuple[int, ...]:
+    """
+    Calculates the objective vector of a solution for multi-objective mode.
+    Both objectives are maximized: the fitness, and the number of 0s, which trades off against the
+    fitness by favouring genomes of low weight.
+
+    Args:
+        fitness_function (int): The fitness function to use.
+        solution (bytearray): The solution to evaluate.
+        solution_fitness (int, optional): The fitness of the solution if it is already evaluated. Defaults to None.
+
+    Returns:
+        Tuple[int, ...]: The objective values.
+    """
+    if solution_fitness is None:
+        solution_fitness = calculate_fitness(fitness_function, solution)
+    return solution_fitness, len(solution) - sum(solution)
@@ -0,0 +1,609 @@
+# Author: Daniel Glauber
+# File: island.py
+# Description: Contains the island model, which evolves several populations that exchange migrants over a pluggable transport.
+import heapq
+import multiprocessing
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, List, Optional, Tuple
+from genome_storage import FITNESS_ITEM_FORMAT, FITNESS_ITEM_SIZE, pack_solution, packed_size, unpack_solution
+from individual import Individual
+from population import Population
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+ISLAND_TRANSPORT_IN_PROCESS = 0
+ISLAND_TRANSPORT_QUEUES = 1
+ISLAND_TRANSPORT_TCP = 2
+NO_ISLAND_HOSTS = "none"
+LOOPBACK_HOST = "127.0.0.1"
+MESSAGE_MIGRANTS = 0
+MESSAGE_REPORT = 1
+MESSAGE_STOP = 2
+# Kind, source island, generation and migrant count
+MIGRANTS_HEADER = struct.Struct("<BHIH")
+# Kind, source island, generation, evaluations, finished flag and best fitness
+REPORT_HEADER = struct.Struct("<BHIQBi")
+STOP_MESSAGE = bytes([MESSAGE_STOP])
+# Length prefix of a message on a TCP connection
+FRAME_HEADER = struct.Struct("<I")
+# Seconds between polls of a transport with nothing to read
+POLL_INTERVAL = 0.002
+# Seconds a TCP sender keeps trying to reach an island or coordinator that is not listening yet
+CONNECT_TIMEOUT = 30.0
+# Settings that pick another kind of population, which islands do not use
+SINGLE_POPULATION_SETTINGS = ("genomeType", "edaModel", "objectiveMode", "populationStorage")
+
+
+def encode_migrants(island_id: int, generation: int, individuals: List[Individual]) -> bytes:
+    """
+    Encodes migrants as their fitness values followed by their bit-packed genomes.
+
+    Args:
+        island_id (int): The island sending the migrants.
+        generation (int): The generation of the sending island.
+        individuals (List[Individual]): The migrants.
+
+    Returns:
+        bytes: The message.
+    """
+    fitness_values = array(FITNESS_ITEM_FORMAT, [individual.get_solution_fitness() for individual in individuals])
+    return (MIGRANTS_HEADER.pack(MESSAGE_MIGRANTS, island_id, generation, len(individuals)) + fitness_values.tobytes()
+            + b"".join(pack_solution(individual.get_solution()) for individual in individuals))
+
+
+def decode_migrants(message: bytes, string_size: int) -> Tuple[int, List[Tuple[bytearray, int]]]:
+    """
+    Decodes a migrants message.
+
+    Args:
+        message (bytes): The message.
+        string_size (int): The size of the genomes.
+
+    Returns:
+        Tuple[int, List[Tuple[bytearray, int]]]: The sending island, and the genome and fitness of each migrant.
+    """
+    kind, island_id, generation, count = MIGRANTS_HEADER.unpack_from(message)
+    offset = MIGRANTS_HEADER.size
+    fitness_values = array(FITNESS_ITEM_FORMAT, message[offset:offset + count * FITNESS_ITEM_SIZE])
+    offset += count * FITNESS_ITEM_SIZE
+    size = packed_size(string_size)
+    solutions = [unpack_solution(message[offset + index * size:offset + (index + 1) * size], string_size)
+                 for index in range(count)]
+    return island_id, list(zip(solutions, fitness_values))
+
+
+def encode_report(island_id: int, generation: int, evaluations: int, finished: bool, best: Individual) -> bytes:
+    """
+    Encodes the progress of an island for the coordinator.
+
+    Args:
+        island_id (int): The island.
+        generation (int): Its current generation.
+        evaluations (int): The fitness evaluations it has performed.
+        finished (bool): True if the island has stopped.
+        best (Individual): Its best individual.
+
+    Returns:
+        bytes: The message.
+    """
+    return (REPORT_HEADER.pack(MESSAGE_REPORT, island_id, generation, evaluations, finished, best.get_solution_fitness())
+            + pack_solution(best.get_solution()))
+
+
+class InProcessTransport:
+    """
+    Class InProcessTransport delivers messages between islands stepped in the same process.
+    Endpoints 0 to islandCount - 1 are the islands and endpoint islandCount is the coordinator.
+    """
+
+    def __init__(self, endpoint_count: int) -> None:
+        """
+        Creates an inbox for every endpoint.
+
+        Args:
+            endpoint_count (int): The number of islands plus one for the coordinator.
+        """
+        self.inboxes = [deque() for endpoint in range(endpoint_count)]
+
+    def send(self, destination: int, message: bytes) -> None:
+        self.inboxes[destination].append(message)
+
+    def receive(self, endpoint: int) -> List[bytes]:
+        """
+        Takes every message that has arrived for an endpoint, without waiting.
+
+        Args:
+            endpoint (int): The receiving endpoint.
+
+        Returns:
+            List[bytes]: The messages.
+        """
+        inbox = self.inboxes[endpoint]
+        messages = []
+        while inbox:
+            messages.append(inbox.popleft())
+        return messages
+
+    def close(self) -> None:
+        pass
+
+
+class QueueTransport:
+    """
+    Class QueueTransport delivers messages between processes on one host through multiprocessing queues.
+    Each endpoint reads its own queue; a queue's feeder thread does the writing, so sends never wait for the receiver.
+    """
+
+    def __init__(self, queues: List[Any]) -> None:
+        """
+        Uses one queue per endpoint, created by the parent process before the islands start.
+
+        Args:
+            queues (List[multiprocessing.Queue]): The inbox of every endpoint.
+        """
+        self.queues = queues
+
+    def send(self, destination: int, message: bytes) -> None:
+        self.queues[destination].put(message)
+
+    def receive(self, endpoint: int) -> List[bytes]:
+        """
+        Takes every message that has arrived for an endpoint, without waiting.
+
+        Args:
+            endpoint (int): The receiving endpoint.
+
+        Returns:
+            List[bytes]: The messages.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.queues[endpoint].get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self) -> None:
+        pass
+
+
+class TcpTransport:
+    """
+    Class TcpTransport delivers length-prefixed messages over TCP, so islands can run on different hosts.
+    A listener thread accepts connections and reader threads fill the inbox; a sender thread owns the
+    outgoing connections, so a slow or unreachable peer never blocks evolution.
+    """
+
+    def __init__(self, addresses: List[Tuple[str, int]], endpoint: int) -> None:
+        """
+        Starts listening on the endpoint's own address.
+
+        Args:
+            addresses (List[Tuple[str, int]]): The host and port of every endpoint.
+            endpoint (int): The endpoint this transport receives for.
+        """
+        self.addresses = addresses
+        self.endpoint = endpoint
+        self.inbox = deque()
+        self.outbox = queue.Queue()
+        self.connections = {}
+        self.closed = False
+        host, port = addresses[endpoint]
+        # Loopback islands stay unreachable from other hosts
+        self.listener = socket.create_server((LOOPBACK_HOST if host == LOOPBACK_HOST else "", port))
+        threading.Thread(target=self.accept_connections, name="island-listener", daemon=True).start()
+        self.sender = threading.Thread(target=self.send_messages, name="island-sender", daemon=True)
+        self.sender.start()
+
+    def accept_connections(self) -> None:
+        """
+        Starts a reader thread for every peer that connects.
+        """
+        while not self.closed:
+            try:
+                connection, address = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.read_messages, args=(connection,), name="island-reader", daemon=True).start()
+
+    def read_messages(self, connection: socket.socket) -> None:
+        """
+        Reads messages from a peer into the inbox until it disconnects.
+
+        Args:
+            connection (socket.socket): The connection to read.
+        """
+        stream = connection.makefile("rb")
+        with connection, stream:
+            while True:
+                header = stream.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return
+                (length,) = FRAME_HEADER.unpack(header)
+                message = stream.read(length)
+                if len(message) < length:
+                    return
+                self.inbox.append(message)
+
+    def connect(self, destination: int) -> Optional[socket.socket]:
+        """
+        Connects to an endpoint, retrying while it starts up.
+
+        Args:
+            destination (int): The endpoint to connect to.
+
+        Returns:
+            socket.socket: The connection, or None if the endpoint could not be reached.
+        """
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        while not self.closed:
+            try:
+                connection = socket.create_connection(self.addresses[destination])
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return connection
+            except OSError:
+                if time.monotonic() > deadline:
+                    return None
+                time.sleep(POLL_INTERVAL * 50)
+        return None
+
+    def send_messages(self) -> None:
+        """
+        Writes queued messages to their endpoints, keeping one connection per endpoint.
+        Messages to an endpoint that cannot be reached are dropped, since migration is best effort.
+        """
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                break
+            destination, message = item
+            connection = self.connections.get(destination)
+            if connection is None:
+                connection = self.connect(destination)
+                if connection is None:
+                    continue
+                self.connections[destination] = connection
+            try:
+                connection.sendall(FRAME_HEADER.pack(len(message)) + message)
+            except OSError:
+                connection.close()
+                del self.connections[destination]
+        for connection in self.connections.values():
+            connection.close()
+
+    def send(self, destination: int, message: bytes) -> None:
+        self.outbox.put((destination, message))
+
+    def receive(self, endpoint: int) -> List[bytes]:
+        """
+        Takes every message that has arrived, without waiting.
+
+        Args:
+            endpoint (int): The receiving endpoint, which must be this transport's endpoint.
+
+        Returns:
+            List[bytes]: The messages.
+        """
+        messages = []
+        while self.inbox:
+            messages.append(self.inbox.popleft())
+        return messages
+
+    def close(self) -> None:
+        """
+        Sends the queued messages, then closes the connections and stops listening.
+        """
+        self.outbox.put(None)
+        self.sender.join()
+        self.closed = True
+        self.listener.close()
+
+
+class Island:
+    """
+    Class Island evolves one Population and exchanges its best individuals with the next island in a ring.
+    Migration is asynchronous: migrants are sent without waiting, and the ones that have arrived
+    replace the worst individuals at the island's next generation.
+    """
+
+    def __init__(self, island_id: int, island_count: int, transport: Any) -> None:
+        """
+        Creates the island's population on its own random stream.
+
+        Args:
+            island_id (int): The island.
+            island_count (int): The number of islands.
+            transport (InProcessTransport | QueueTransport | TcpTransport): The transport to the other islands.
+        """
+        self.island_id = island_id
+        self.island_count = island_count
+        self.coordinator = island_count
+        self.transport = transport
+        self.population = Population(island_id)
+        self.migration_interval = max(1, sl.get_setting("migrationInterval"))
+        self.migration_size = sl.get_setting("migrationSize")
+        self.max_generations = sl.get_setting("islandMaxGenerations")
+        self.generation = 0
+        self.evaluations = 0
+        self.finished = False
+
+    def start(self) -> None:
+        """
+        Initializes the population and reports it to the coordinator.
+        """
+        evaluations = Individual.evaluation_count
+        self.population.initialize_random_starting_population()
+        self.generation = 1
+        self.evaluations += Individual.evaluation_count - evaluations
+        self.report()
+
+    def step(self) -> None:
+        """
+        Evolves one generation, taking in arrived migrants first and sending migrants every migrationInterval generations.
+        """
+        evaluations = Individual.evaluation_count
+        self.receive_messages()
+        if not self.finished:
+            self.population.select_mating_parents()
+            self.population.replace_current_population()
+            # Evaluate the children now, so their evaluations are counted for this island
+            Individual.evaluate_many(self.population.current_generation)
+            self.generation += 1
+            if self.migration_size > 0 and self.generation % self.migration_interval == 0:
+                migrants = heapq.nlargest(self.migration_size, self.population.current_generation,
+                                          key=Individual.get_solution_fitness)
+                self.transport.send((self.island_id + 1) % self.island_count,
+                                    encode_migrants(self.island_id, self.generation, migrants))
+            if self.max_generations and self.generation >= self.max_generations:
+                self.finished = True
+        self.evaluations += Individual.evaluation_count - evaluations
+        self.report()
+
+    def receive_messages(self) -> None:
+        """
+        Replaces the worst individuals with arrived migrants and stops when the coordinator says so.
+        """
+        for message in self.transport.receive(self.island_id):
+            if message[0] == MESSAGE_STOP:
+                self.finished = True
+            elif message[0] == MESSAGE_MIGRANTS:
+                source, migrants = decode_migrants(message, self.population.string_size)
+                generation = self.population.current_generation
+                worst = heapq.nsmallest(len(migrants), range(len(generation)),
+                                        key=lambda index: generation[index].get_solution_fitness())
+                for index, (solution, fitness) in zip(worst, migrants):
+                    generation[index] = Individual(self.population._fitnessFunction, solution, fitness, copy_solution=False)
+
+    def report(self) -> None:
+        """
+        Sends the island's generation, evaluations and best individual to the coordinator.
+        """
+        best = max(self.population.current_generation, key=Individual.get_solution_fitness)
+        self.transport.send(self.coordinator, encode_report(self.island_id, self.generation, self.evaluations,
+                                                            self.finished, best))
+
+    def run(self) -> None:
+        """
+        Evolves until the island reaches islandMaxGenerations or the coordinator stops it.
+        """
+        self.start()
+        while not self.finished:
+            self.step()
+        self.transport.close()
+
+
+class Coordinator:
+    """
+    Class Coordinator follows the reports of every island, keeps the global best, and stops all islands
+    when the target fitness is reached, maxEvaluations is spent, or every island has finished.
+    """
+
+    def __init__(self, island_count: int, transport: Any, string_size: int, target_fitness: Optional[int]) -> None:
+        """
+        Initializes the coordinator.
+
+        Args:
+            island_count (int): The number of islands.
+            transport (InProcessTransport | QueueTransport | TcpTransport): The transport to the islands.
+            string_size (int): The size of the genomes.
+            target_fitness (int): The fitness that counts as success, or None if it is unknown.
+        """
+        self.island_count = island_count
+        self.endpoint = island_count
+        self.transport = transport
+        self.string_size = string_size
+        self.target_fitness = target_fitness
+        self.max_evaluations = sl.get_setting("maxEvaluations")
+        self.generations = [0] * island_count
+        self.evaluations = [0] * island_count
+        self.finished = [False] * island_count
+        self.best_fitness = None
+        self.best_solution = None
+        self.best_island = None
+        self.succeeded = False
+        self.stopped = False
+
+    def poll(self) -> None:
+        """
+        Reads the arrived reports, printing every improvement of the global best, and stops the islands when the run is over.
+        """
+        for message in self.transport.receive(self.endpoint):
+            kind, island_id, generation, evaluations, finished, best_fitness = REPORT_HEADER.unpack_from(message)
+            self.generations[island_id] = generation
+            self.evaluations[island_id] = evaluations
+            self.finished[island_id] = bool(finished)
+            if self.best_fitness is None or best_fitness > self.best_fitness:
+                self.best_fitness = best_fitness
+                self.best_solution = unpack_solution(message[REPORT_HEADER.size:], self.string_size)
+                self.best_island = island_id
+                print(f"Global best {best_fitness} from island {island_id} at generation {generation}, "
+                      f"evaluations {sum(self.evaluations)}")
+        if self.stopped:
+            return
+        self.succeeded = self.target_fitness is not None and self.best_fitness is not None and self.best_fitness >= self.target_fitness
+        out_of_evaluations = self.max_evaluations > 0 and sum(self.evaluations) >= self.max_evaluations
+        if self.succeeded or out_of_evaluations or all(self.finished):
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        Tells every island to stop.
+        """
+        self.stopped = True
+        for island_id in range(self.island_count):
+            self.transport.send(island_id, STOP_MESSAGE)
+
+    def run(self, processes: Optional[List[Any]] = None) -> None:
+        """
+        Polls the reports until every island has stopped.
+
+        Args:
+            processes (List[multiprocessing.Process], optional): The island processes on this host, so the
+                coordinator also stops waiting when they have all exited. Defaults to None.
+        """
+        while not all(self.finished):
+            if processes and not any(process.is_alive() for process in processes):
+                break
+            self.poll()
+            time.sleep(POLL_INTERVAL)
+        self.poll()
+
+    def print_summary(self) -> None:
+        """
+        Prints the global best and whether the run succeeded.
+        """
+        print(f"Global Best Fitness = {self.best_fitness}")
+        print(f"Global Best Solution = {','.join(str(bit) for bit in self.best_solution)}")
+        print(f"Global Best was on island {self.best_island}")
+        print(f"Generations per island: {', '.join(str(generation) for generation in self.generations)}")
+        print(f"Evaluations: {sum(self.evaluations)}")
+        print("SUCCESS\n" if self.succeeded else "FAILED\n")
+
+
+def island_addresses(island_count: int) -> List[Tuple[str, int]]:
+    """
+    Returns the TCP address of every island and of the coordinator, from islandHosts and islandBasePort.
+
+    Args:
+        island_count (int): The number of islands.
+
+    Returns:
+        List[Tuple[str, int]]: The addresses, with endpoint islandCount being the coordinator.
+    """
+    base_port = sl.get_setting("islandBasePort")
+    island_hosts = sl.get_setting("islandHosts")
+    if island_hosts == NO_ISLAND_HOSTS:
+        hosts = [LOOPBACK_HOST] * (island_count + 1)
+    else:
+        hosts = island_hosts.split(",")
+        if len(hosts) != island_count + 1:
+            raise ValueError("islandHosts must list a host for every island followed by the coordinator's host")
+    return [(host, base_port + endpoint) for endpoint, host in enumerate(hosts)]
+
+
+def run_island_process(island_id: int, island_count: int, transport_kind: int, queues: Optional[List[Any]]) -> None:
+    """
+    Runs one island in a worker process.
+
+    Args:
+        island_id (int): The island.
+        island_count (int): The number of islands.
+        transport_kind (int): ISLAND_TRANSPORT_QUEUES or ISLAND_TRANSPORT_TCP.
+        queues (List[multiprocessing.Queue]): The endpoint queues of the queue transport.
+    """
+    if transport_kind == ISLAND_TRANSPORT_QUEUES:
+        transport = QueueTransport(queues)
+    else:
+        transport = TcpTransport(island_addresses(island_count), island_id)
+    Island(island_id, island_count, transport).run()
+
+
+def warn_ignored_settings() -> None:
+    """
+    Prints a notice when a setting picks a kind of population that islands do not use.
+    Every island evolves a Population of bit genomes, whatever those settings say.
+    """
+    if any(sl.get_setting(key) != 0 for key in SINGLE_POPULATION_SETTINGS):
+        print("Every island evolves a single-objective, in-memory population of bit genomes, "
+              "so genomeType, edaModel, objectiveMode and populationStorage are ignored")
+
+
+def run_island_model() -> Coordinator:
+    """
+    Runs islandCount islands with the transport chosen by islandTransport and prints the global result.
+    In-process islands are stepped in turn, so their runs are reproducible; the other transports run
+    every island in its own process on this host.
+
+    Returns:
+        Coordinator: The coordinator, holding the global best.
+    """
+    island_count = sl.get_setting("islandCount")
+    transport_kind = sl.get_setting("islandTransport")
+    string_size = sl.get_setting("stringSizeN")
+    target_fitness = Population(0).get_target_fitness()
+    print(f"Running {island_count} islands")
+    warn_ignored_settings()
+    if transport_kind == ISLAND_TRANSPORT_IN_PROCESS:
+        transport = InProcessTransport(island_count + 1)
+        coordinator = Coordinator(island_count, transport, string_size, target_fitness)
+        islands = [Island(island_id, island_count, transport) for island_id in range(island_count)]
+        for island in islands:
+            island.start()
+        coordinator.poll()
+        while not all(island.finished for island in islands):
+            for island in islands:
+                if not island.finished:
+                    island.step()
+            coordinator.poll()
+        coordinator.poll()
+    else:
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        queues = None
+        if transport_kind == ISLAND_TRANSPORT_QUEUES:
+            queues = [context.Queue() for endpoint in range(island_count + 1)]
+            transport = QueueTransport(queues)
+        else:
+            transport = TcpTransport(island_addresses(island_count), island_count)
+        coordinator = Coordinator(island_count, transport, string_size, target_fitness)
+        processes = [context.Process(target=run_island_process, args=(island_id, island_count, transport_kind, queues))
+                     for island_id in range(island_count)]
+        for process in processes:
+            process.start()
+        coordinator.run(processes)
+        for process in processes:
+            process.join()
+        transport.close()
+    coordinator.print_summary()
+    return coordinator
+
+
+if __name__ == "__main__":
+    """
+    Runs one part of an island model spread over several hosts with islandTransport 2:
+    python3 island.py island <id> settings.dat on the host of each island, and
+    python3 island.py coordinator settings.dat on the coordinator's host.
+    """
+    if len(sys.argv) == 4 and sys.argv[1] == "island":
+        sl.load_settings(["sga.py", sys.argv[3]])
+        count = sl.get_setting("islandCount")
+        warn_ignored_settings()
+        Island(int(sys.argv[2]), count, TcpTransport(island_addresses(count), int(sys.argv[2]))).run()
+    elif len(sys.argv) == 3 and sys.argv[1] == "coordinator":
+        sl.load_settings(["sga.py", sys.argv[2]])
+        count = sl.get_setting("islandCount")
+        coordinator_transport = TcpTransport(island_addresses(count), count)
+        island_coordinator = Coordinator(count, coordinator_transport, sl.get_setting("stringSizeN"),
+                                         Population(0).get_target_fitness())
+        island_coordinator.run()
+        coordinator_transport.close()
+        island_coordinator.print_summary()
+    else:
+        print("The command to run an island is: python3 island.py island <id> settings.dat")
+        print("The command to run the coordinator is: python3 island.py coordinator settings.dat")
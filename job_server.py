@@ -0,0 +1,537 @@
+# Author: Daniel Glauber
+# File: job_server.py
+# Description: Contains the local job server, which queues GA runs and executes them on a pool of warm worker processes.
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from individual import Individual
+from sga import SGAController
+from shared_population import SharedPopulation
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+JOB_SERVER_HOST = "127.0.0.1"
+DEFAULT_JOB_SERVER_PORT = 8765
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_FINISHED, JOB_FAILED, JOB_CANCELLED)
+MESSAGE_GENERATION = "generation"
+JSON_CONTENT_TYPE = "application/json"
+STREAM_CONTENT_TYPE = "application/x-ndjson"
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a worker to stop a run that was cancelled.
+    """
+
+
+def summarize_generation(generation_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keeps the parts of the data of a generation that are sent to clients, without the genomes.
+
+    Args:
+        generation_data (Dict[str, Any]): The data collected by SGAController for a generation.
+
+    Returns:
+        Dict[str, Any]: The summary of the generation.
+    """
+    return {
+        "generation": generation_data["generation"],
+        "best": generation_data["best"]["fitness"],
+        "average": generation_data["average"],
+        "worst": generation_data["worst"]["fitness"],
+        "duplicateRatio": generation_data["duplicateRatio"],
+        "pareto": generation_data["pareto"],
+        "surrogate": generation_data["surrogate"],
+        "message": generation_data["message"]
+    }
+
+
+def run_job(connection: Any, cancel_flag: Any, job_id: int, settings: Dict[str, Any]) -> None:
+    """
+    Runs one job in a worker and sends its generations and result to the server.
+
+    Args:
+        connection (Connection): The worker's end of the pipe to the server.
+        cancel_flag (Synchronized): Set by the server when the running job is cancelled.
+        job_id (int): The id of the job.
+        settings (Dict[str, Any]): The complete settings of the run.
+    """
+    def send_generation(generation_data: Dict[str, Any]) -> None:
+        if cancel_flag.value:
+            raise JobCancelled()
+        connection.send((MESSAGE_GENERATION, job_id, summarize_generation(generation_data)))
+
+    sl.ga_settings.clear()
+    sl.ga_settings.update(settings)
+    Individual.evaluation_count = 0
+    start = time.time()
+    controller = None
+    try:
+        # The messages printed by the run are streamed as generation summaries instead
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            controller = SGAController()
+            controller.generation_callback = send_generation
+            controller.run()
+        result = {
+            "succeeded": controller.succeeded,
+            "generations": controller.generation_number,
+            "evaluations": Individual.evaluation_count,
+            "seconds": time.time() - start
+        }
+        if controller.bisection_option == 1:
+            result["bisectionMin"] = controller.bisection_min
+            result["bisectionMax"] = controller.bisection_max
+        connection.send((JOB_FINISHED, job_id, result))
+    except JobCancelled:
+        connection.send((JOB_CANCELLED, job_id, None))
+    except Exception as e:
+        connection.send((JOB_FAILED, job_id, f"{type(e).__name__}: {e}"))
+    finally:
+        if controller is not None and controller.population_dump is not None:
+            controller.population_dump.close()
+        # The worker outlives the job, so its exit handlers would free the generation buffers too late
+        if controller is not None and isinstance(controller.population, SharedPopulation):
+            controller.population.shutdown()
+
+
+def worker_main(connection: Any, cancel_flag: Any) -> None:
+    """
+    Runs jobs sent by the server until it sends None. The modules are imported once, so jobs start warm.
+
+    Args:
+        connection (Connection): The worker's end of the pipe to the server.
+        cancel_flag (Synchronized): Set by the server when the running job is cancelled.
+    """
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        job_id, settings = message
+        run_job(connection, cancel_flag, job_id, settings)
+
+
+class Job:
+    """
+    Class Job holds the state of a queued run and the generations it has reported.
+    """
+
+    def __init__(self, job_id: int, settings: Dict[str, Any], overrides: Dict[str, Any]) -> None:
+        """
+        Initializes a queued job.
+
+        Args:
+            job_id (int): The id of the job.
+            settings (Dict[str, Any]): The complete settings of the run.
+            overrides (Dict[str, Any]): The settings the client asked for.
+        """
+        self.job_id = job_id
+        self.settings = settings
+        self.overrides = overrides
+        self.state = JOB_QUEUED
+        self.generations = []
+        self.result = None
+        self.error = None
+        self.worker = None
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Describes the job for clients.
+
+        Returns:
+            Dict[str, Any]: The id, state, settings asked for, generation count, and the result or error.
+        """
+        return {
+            "id": self.job_id,
+            "state": self.state,
+            "settings": self.overrides,
+            "generations": len(self.generations),
+            "latest": self.generations[-1] if self.generations else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobWorker:
+    """
+    Class JobWorker is the server's handle on one warm worker process.
+    """
+
+    def __init__(self, context: Any) -> None:
+        """
+        Starts the worker process.
+
+        Args:
+            context (BaseContext): The multiprocessing context to start it with.
+        """
+        self.connection, worker_connection = context.Pipe()
+        self.cancel_flag = context.Value("b", 0, lock=False)
+        # Not a daemon, so a job with populationStorage 2 can start its own worker processes; shutdown joins it
+        self.process = context.Process(target=worker_main, args=(worker_connection, self.cancel_flag))
+        self.process.start()
+        worker_connection.close()
+        self.job = None
+
+
+class JobServer:
+    """
+    Class JobServer queues jobs and runs them in order on a pool of warm worker processes.
+    Each worker has a pipe to the server and a thread in the server that reads what it reports.
+    """
+
+    def __init__(self, base_settings: Dict[str, Any], worker_count: int = 0) -> None:
+        """
+        Starts the worker pool.
+
+        Args:
+            base_settings (Dict[str, Any]): The loaded settings that jobs override.
+            worker_count (int, optional): The number of worker processes; 0 uses one per CPU. Defaults to 0.
+        """
+        self.base_settings = dict(base_settings)
+        self.lock = threading.Condition()
+        self.jobs: Dict[int, Job] = {}
+        self.pending = deque()
+        self.next_job_id = 1
+        self.context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        self.workers: List[JobWorker] = []
+        for index in range(worker_count or os.cpu_count() or 1):
+            self.start_worker()
+
+    def start_worker(self) -> JobWorker:
+        """
+        Starts a worker process and the thread that reads its reports.
+
+        Returns:
+            JobWorker: The new worker.
+        """
+        worker = JobWorker(self.context)
+        self.workers.append(worker)
+        threading.Thread(target=self.read_reports, args=(worker,), name="job-worker-reader", daemon=True).start()
+        return worker
+
+    def submit(self, overrides: Dict[str, Any], seed: Optional[int] = None) -> Job:
+        """
+        Queues a run with the given settings.
+
+        Args:
+            overrides (Dict[str, Any]): The settings that differ from the server's settings.
+            seed (int, optional): The random seed of the run. Defaults to None, which keeps randSeed.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            ValueError: If a setting is not valid.
+        """
+        if seed is not None:
+            overrides = dict(overrides, randSeed=seed)
+        settings = sl.build_settings(self.base_settings, overrides)
+        with self.lock:
+            job = Job(self.next_job_id, settings, overrides)
+            self.next_job_id += 1
+            self.jobs[job.job_id] = job
+            self.pending.append(job)
+            self.dispatch()
+        return job
+
+    def dispatch(self) -> None:
+        """
+        Sends queued jobs to idle workers. The lock must be held.
+        """
+        for worker in self.workers:
+            if not self.pending:
+                return
+            if worker.job is None and worker.process.is_alive():
+                job = self.pending.popleft()
+                job.state = JOB_RUNNING
+                job.worker = worker
+                worker.job = job
+                worker.cancel_flag.value = 0
+                worker.connection.send((job.job_id, job.settings))
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """
+        Cancels a queued job, or asks the worker running it to stop after its current generation.
+
+        Args:
+            job_id (int): The id of the job.
+
+        Returns:
+            Job: The job, or None if there is no such job.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == JOB_QUEUED:
+                self.pending.remove(job)
+                job.state = JOB_CANCELLED
+                self.lock.notify_all()
+            elif job.state == JOB_RUNNING:
+                job.worker.cancel_flag.value = 1
+            return job
+
+    def read_reports(self, worker: JobWorker) -> None:
+        """
+        Records the generations and results a worker reports, then gives it the next job.
+        A worker that dies fails its job and is replaced.
+
+        Args:
+            worker (JobWorker): The worker to read from.
+        """
+        while True:
+            try:
+                kind, job_id, payload = worker.connection.recv()
+            except (EOFError, OSError):
+                with self.lock:
+                    if worker.job is not None:
+                        worker.job.state = JOB_FAILED
+                        worker.job.error = "The worker process stopped"
+                        worker.job = None
+                    if worker in self.workers:
+                        self.workers.remove(worker)
+                        self.start_worker()
+                    self.dispatch()
+                    self.lock.notify_all()
+                return
+            with self.lock:
+                job = self.jobs[job_id]
+                if kind == MESSAGE_GENERATION:
+                    job.generations.append(payload)
+                else:
+                    job.state = kind
+                    if kind == JOB_FINISHED:
+                        job.result = payload
+                    elif kind == JOB_FAILED:
+                        job.error = payload
+                    worker.job = None
+                    self.dispatch()
+                self.lock.notify_all()
+
+    def follow(self, job_id: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the generations of a job as they are reported, then a final description of the job.
+
+        Args:
+            job_id (int): The id of the job.
+
+        Yields:
+            Dict[str, Any]: The next generation, or the description of the finished job.
+        """
+        sent = 0
+        while True:
+            with self.lock:
+                job = self.jobs[job_id]
+                while sent == len(job.generations) and job.state not in FINISHED_STATES:
+                    self.lock.wait()
+                new_generations = job.generations[sent:]
+                finished = job.state in FINISHED_STATES
+                description = job.describe()
+            sent += len(new_generations)
+            yield from new_generations
+            if finished:
+                yield description
+                return
+
+    def shutdown(self) -> None:
+        """
+        Stops the workers after their current job.
+        """
+        with self.lock:
+            workers = list(self.workers)
+            self.workers = []
+            for worker in workers:
+                worker.cancel_flag.value = 1
+                worker.connection.send(None)
+        for worker in workers:
+            worker.process.join()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Class JobRequestHandler serves the job API:
+    POST /jobs queues a run from {"settings": {...}, "seed": n}, GET /jobs lists jobs,
+    GET /jobs/<id> describes a job, GET /jobs/<id>/stream streams its generations as JSON lines,
+    and DELETE /jobs/<id> cancels it.
+    """
+    protocol_version = "HTTP/1.1"
+    job_server: JobServer = None
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Requests are not logged, since sweeps send thousands of them
+        pass
+
+    def send_json(self, status: int, body: Any) -> None:
+        """
+        Sends a JSON response.
+
+        Args:
+            status (int): The HTTP status.
+            body (Any): The body to encode.
+        """
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def find_job(self) -> Optional[int]:
+        """
+        Reads the job id from the path, sending 404 if there is no such job.
+
+        Returns:
+            int: The job id, or None if the response was already sent.
+        """
+        parts = self.path.strip("/").split("/")
+        if len(parts) >= 2 and parts[1].isdigit() and int(parts[1]) in self.job_server.jobs:
+            return int(parts[1])
+        self.send_json(404, {"error": "No such job"})
+        return None
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/jobs":
+            self.send_json(404, {"error": "Unknown path"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job = self.job_server.submit(request.get("settings", {}), request.get("seed"))
+        except (ValueError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(201, job.describe())
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/jobs":
+            with self.job_server.lock:
+                jobs = [job.describe() for job in self.job_server.jobs.values()]
+            self.send_json(200, jobs)
+            return
+        job_id = self.find_job()
+        if job_id is None:
+            return
+        if not self.path.rstrip("/").endswith("/stream"):
+            with self.job_server.lock:
+                description = self.job_server.jobs[job_id].describe()
+            self.send_json(200, description)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", STREAM_CONTENT_TYPE)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for item in self.job_server.follow(job_id):
+                line = json.dumps(item).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped following the job, which keeps running
+            self.close_connection = True
+
+    def do_DELETE(self) -> None:
+        job_id = self.find_job()
+        if job_id is not None:
+            self.send_json(200, self.job_server.cancel(job_id).describe())
+
+
+def serve(base_settings: Dict[str, Any], port: int = DEFAULT_JOB_SERVER_PORT, worker_count: int = 0) -> None:
+    """
+    Serves the job API on localhost until interrupted.
+
+    Args:
+        base_settings (Dict[str, Any]): The loaded settings that jobs override.
+        port (int, optional): The port to listen on. Defaults to DEFAULT_JOB_SERVER_PORT.
+        worker_count (int, optional): The number of worker processes; 0 uses one per CPU. Defaults to 0.
+    """
+    job_server = JobServer(base_settings, worker_count)
+    handler = type("BoundJobRequestHandler", (JobRequestHandler,), {"job_server": job_server})
+    http_server = ThreadingHTTPServer((JOB_SERVER_HOST, port), handler)
+    print(f"Job server listening on http://{JOB_SERVER_HOST}:{port} with {len(job_server.workers)} workers")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        job_server.shutdown()
+
+
+def submit_and_stream(overrides: Dict[str, Any], seed: Optional[int] = None,
+                      port: int = DEFAULT_JOB_SERVER_PORT) -> Iterator[Dict[str, Any]]:
+    """
+    Queues a run on a local job server and yields its generations, then its final description.
+
+    Args:
+        overrides (Dict[str, Any]): The settings that differ from the server's settings.
+        seed (int, optional): The random seed of the run. Defaults to None, which keeps the server's randSeed.
+        port (int, optional): The port of the server. Defaults to DEFAULT_JOB_SERVER_PORT.
+
+    Yields:
+        Dict[str, Any]: The next generation, or the description of the finished job.
+    """
+    connection = HTTPConnection(JOB_SERVER_HOST, port)
+    try:
+        connection.request("POST", "/jobs", json.dumps({"settings": overrides, "seed": seed}),
+                           {"Content-Type": JSON_CONTENT_TYPE})
+        response = connection.getresponse()
+        job = json.loads(response.read())
+        if response.status != 201:
+            raise ValueError(job["error"])
+        connection.request("GET", f"/jobs/{job['id']}/stream")
+        response = connection.getresponse()
+        for line in response:
+            yield json.loads(line)
+    finally:
+        connection.close()
+
+
+def read_setting_overrides(settings_file: str) -> Dict[str, str]:
+    """
+    Reads the settings of a settings file as text, leaving their validation to the server.
+
+    Args:
+        settings_file (str): The path to the settings file.
+
+    Returns:
+        Dict[str, str]: The settings in the file.
+    """
+    overrides = {}
+    with open(settings_file) as file:
+        for line in file:
+            split_line = line.split()
+            if len(split_line) > 1:
+                overrides.setdefault(split_line[0], split_line[1])
+    return overrides
+
+
+if __name__ == "__main__":
+    """
+    Starts a job server: python3 job_server.py serve [port] [workers] [settings.dat]
+    Runs a job on it and prints its generations: python3 job_server.py submit settings.dat [seed] [port]
+    """
+    if len(sys.argv) >= 3 and sys.argv[1] == "submit":
+        seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        port = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_JOB_SERVER_PORT
+        for item in submit_and_stream(read_setting_overrides(sys.argv[2]), seed, port):
+            print(item["message"] if "message" in item else json.dumps(item, indent=4))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_JOB_SERVER_PORT
+        worker_count = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        sl.load_settings(["sga.py"] + sys.argv[4:5])
+        serve(sl.ga_settings, port, worker_count)
+    else:
+        print("The command to start the job server is: python3 job_server.py serve [port] [workers] [settings.dat]")
+        print("The command to run a job on it is: python3 job_server.py submit settings.dat [seed] [port]")
@@ -0,0 +1,302 @@
+# Author: Daniel Glauber
+# File: mapped_population.py
+# Description: Contains the MappedPopulation class, which keeps the population in memory-mapped bit-packed files.
+import itertools
+import os
+from typing import Dict, Iterator, List
+from individual import Individual, calculate_fitness
+from population import Population, SELECTION_METHOD_TOURNAMENT
+from genome_storage import GenomeMatrix, MappedGenomeFile
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+NO_POPULATION_STORAGE_DIR = "none"
+# Generation files are named after the process and run, so runs sharing a populationStorageDir do not overwrite each other
+GENERATION_FILE_NAME = "generation_{run}_{label}.pop"
+GENERATION_FILE_LABELS = ("a", "b")
+STREAM_CHUNK_SIZE = 4096
+
+# Numbers the populations of this process, so each gets its own generation files
+run_numbers = itertools.count()
+
+
+class MatrixGeneration:
+    """
+    Read-only sequence view of a GenomeMatrix that creates Individuals on demand,
+    so code written for a list of Individuals can still read a mapped generation.
+    """
+
+    def __init__(self, matrix: GenomeMatrix, fitness_function: int) -> None:
+        """
+        Initializes the view.
+
+        Args:
+            matrix (GenomeMatrix): The matrix holding the generation.
+            fitness_function (int): The fitness function of the individuals.
+        """
+        self.matrix = matrix
+        self.fitness_function = fitness_function
+
+    def __len__(self) -> int:
+        return self.matrix.population_size
+
+    def __getitem__(self, index: int) -> Individual:
+        return Individual(self.fitness_function, self.matrix.get_solution(index), self.matrix.fitness[index], copy_solution=False)
+
+    def __iter__(self) -> Iterator[Individual]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class MappedPopulation(Population):
+    """
+    Class MappedPopulation keeps the current and next generation as bit-packed genome matrices
+    in memory-mapped files, with the fitness in a parallel array.
+    Selection, crossover and mutation stream over the next generation in chunks, so only a chunk
+    of solutions is unpacked into Python objects at a time.
+    """
+
+    def __init__(self, stream_id: int = 0):
+        """
+        Initializes the MappedPopulation.
+
+        Args:
+            stream_id (int, optional): The random stream used by this population. Defaults to 0.
+        """
+        super().__init__(stream_id)
+        self.generation_files = []
+        self._temporary_directory = None
+        self.run_name = f"{os.getpid()}_{next(run_numbers)}"
+
+    @property
+    def current_generation(self):
+        if not self.generation_files:
+            return []
+        return MatrixGeneration(self.generation_files[0].matrix, self._fitnessFunction)
+
+    @current_generation.setter
+    def current_generation(self, value):
+        # Generations live in the mapped files, so only resetting them is supported
+        pass
+
+    @property
+    def next_generation(self):
+        return []
+
+    @next_generation.setter
+    def next_generation(self, value):
+        pass
+
+    def storage_directory(self) -> str:
+        """
+        Returns the directory for the generation files.
+        Without populationStorageDir the files go in a temporary directory that is removed on exit.
+
+        Returns:
+            str: The directory path.
+        """
+        storage_dir = sl.get_setting("populationStorageDir")
+        if storage_dir != NO_POPULATION_STORAGE_DIR:
+            os.makedirs(storage_dir, exist_ok=True)
+            return storage_dir
+        if self._temporary_directory is None:
+            import tempfile
+            self._temporary_directory = tempfile.TemporaryDirectory(prefix="sga_population_")
+        return self._temporary_directory.name
+
+    def close(self) -> None:
+        """
+        Closes the generation files.
+        """
+        for generation_file in self.generation_files:
+            generation_file.close()
+        self.generation_files = []
+
+    def create_surrogate(self) -> None:
+        """
+        Surrogate pre-screening ranks bit genomes built by Population.select_mating_parents, so it is not used here.
+
+        Returns:
+            None: No surrogate model.
+        """
+        return None
+
+    def create_generation_storage(self) -> List[MappedGenomeFile]:
+        """
+        Creates the storage for the current and next generation.
+
+        Returns:
+            List[MappedGenomeFile]: The current and next generation files.
+        """
+        directory = self.storage_directory()
+        return [MappedGenomeFile(os.path.join(directory, GENERATION_FILE_NAME.format(run=self.run_name, label=label)),
+                                 self.population_size, self.string_size)
+                for label in GENERATION_FILE_LABELS]
+
+    def initialize_random_starting_population(self) -> None:
+        """
+        Initializes the starting population in the current generation file, one chunk at a time.
+        """
+        self.close()
+        self.reload_settings()
+        self.duplicate_ratio = None
+        self.generation_files = self.create_generation_storage()
+        current = self.generation_files[0].matrix
+        index = 0
+        for solution in self.seed_solutions():
+            current.set_solution(index, solution, calculate_fitness(self._fitnessFunction, solution))
+            index += 1
+        while index < self.population_size:
+            for solution in self.random_solutions(min(STREAM_CHUNK_SIZE, self.population_size - index)):
+                current.set_solution(index, solution, calculate_fitness(self._fitnessFunction, solution))
+                index += 1
+        Individual.evaluation_count += self.population_size
+
+    def fitness_chunks(self) -> Iterator[List[int]]:
+        """
+        Streams the fitness values of the current generation in chunks.
+
+        Yields:
+            List[int]: The fitness values of the next chunk.
+        """
+        fitness = self.generation_files[0].matrix.fitness
+        for start in range(0, self.population_size, STREAM_CHUNK_SIZE):
+            yield fitness[start:start + STREAM_CHUNK_SIZE].tolist()
+
+    def get_average_fitness(self) -> float:
+        self.current_average_fitness = sum(sum(chunk) for chunk in self.fitness_chunks()) / self.population_size
+        return self.current_average_fitness
+
+    def find_fitness(self, best: bool) -> Dict[str, float]:
+        """
+        Finds the best or worst individual of the current generation by scanning the fitness array.
+
+        Args:
+            best (bool): True to find the best individual, False to find the worst.
+
+        Returns:
+            Dict[str, float]: A dictionary containing the individual's fitness, solution, and index.
+        """
+        found_fitness = None
+        found_index = 0
+        offset = 0
+        for chunk in self.fitness_chunks():
+            chunk_fitness = max(chunk) if best else min(chunk)
+            if found_fitness is None or (chunk_fitness > found_fitness if best else chunk_fitness < found_fitness):
+                found_fitness = chunk_fitness
+                found_index = offset + chunk.index(chunk_fitness)
+            offset += len(chunk)
+        return {
+            "fitness": found_fitness,
+            "solution": self.generation_files[0].matrix.get_solution(found_index),
+            "index": found_index
+        }
+
+    def get_worst_fitness(self) -> Dict[str, float]:
+        return self.find_fitness(best=False)
+
+    def get_best_fitness(self) -> Dict[str, float]:
+        return self.find_fitness(best=True)
+
+    def get_diversity(self) -> float:
+        current = self.generation_files[0].matrix
+        ones_per_locus = [0] * self.string_size
+        for start in range(0, self.population_size, STREAM_CHUNK_SIZE):
+            chunk = current.iter_solutions(start, min(start + STREAM_CHUNK_SIZE, self.population_size))
+            ones_per_locus = [total + sum(locus) for total, locus in zip(ones_per_locus, zip(*chunk))]
+        size = self.population_size
+        return sum(4 * ones * (size - ones) for ones in ones_per_locus) / (size * size * self.string_size)
+
+    def snapshot(self) -> bytes:
+        """
+        Copies the current generation, which is already bit-packed, in a single block.
+
+        Returns:
+            bytes: The contents of the current generation matrix.
+        """
+        return self.generation_files[0].matrix.to_bytes()
+
+    def select_parent_index(self, fitness: memoryview) -> int:
+        """
+        Selects the index of a single parent using tournament selection on a fitness array.
+
+        Args:
+            fitness (memoryview): The fitness array of the generation to select from.
+
+        Returns:
+            int: The index of the selected parent.
+        """
+        selection = self.rng.choices(range(len(fitness)), k=self.tournament_selection_size)
+        return max(selection, key=fitness.__getitem__)
+
+    def build_children(self, current: GenomeMatrix, next_matrix: GenomeMatrix, start: int, stop: int) -> int:
+        """
+        Writes children into a range of slots of the next generation, one pair of children at a time.
+        Pairs are generated exactly as Population does, so both draw the same random numbers,
+        and the second child of a pair that would pass stop is mutated but not written.
+
+        Args:
+            current (GenomeMatrix): The generation the parents are selected from.
+            next_matrix (GenomeMatrix): The generation the children are written to.
+            start (int): The first slot to write.
+            stop (int): The slot to stop before.
+
+        Returns:
+            int: The number of fitness evaluations performed.
+        """
+        evaluations = 0
+        index = start
+        while index < stop:
+            parent_indexes = (self.select_parent_index(current.fitness), self.select_parent_index(current.fitness))
+            solution_a = current.get_solution(parent_indexes[0])
+            solution_b = current.get_solution(parent_indexes[1])
+            crossed = self.rng.random() < self.probApplyCrossover
+            if crossed:
+                children = self.crossover_operators[self.crossoverOperator](solution_a, solution_b)
+            else:
+                children = (solution_a, solution_b)
+            for child, parent_index in zip(children, parent_indexes):
+                # Unchanged parents keep their fitness instead of being evaluated again
+                fitness = None if crossed else current.fitness[parent_index]
+                if self.rng.random() < self.probApplyMutation:
+                    indexes_to_mutate = self.mutation_engine.sample_indexes(self.rng)
+                    for mutate_index in indexes_to_mutate:
+                        child[mutate_index] ^= 1
+                    if indexes_to_mutate:
+                        fitness = None
+                if index < stop:
+                    if fitness is None:
+                        fitness = calculate_fitness(self._fitnessFunction, child)
+                        evaluations += 1
+                    next_matrix.set_solution(index, child, fitness)
+                    index += 1
+        return evaluations
+
+    def select_mating_parents(self) -> None:
+        """
+        Writes the next generation into the next generation file.
+        The best individual is copied into the last slot without being unpacked.
+        """
+        current = self.generation_files[0].matrix
+        next_matrix = self.generation_files[1].matrix
+        best_index = self.get_best_fitness()["index"]
+        if self.selectionMethod == SELECTION_METHOD_TOURNAMENT:
+            Individual.evaluation_count += self.build_children(current, next_matrix, 0, self.population_size - 1)
+            # Add the best individual to the next generation
+            next_matrix.copy_row(current, best_index, self.population_size - 1)
+
+    def replace_current_population(self) -> None:
+        """
+        Swaps the current and next generation files.
+        """
+        self.generation_files.reverse()
+
+    def checkpoint(self) -> str:
+        """
+        Flushes the current generation file so it can be reopened as a checkpoint.
+
+        Returns:
+            str: The path of the current generation file.
+        """
+        self.generation_files[0].flush()
+        return self.generation_files[0].path
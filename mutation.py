@@ -0,0 +1,83 @@
+# Author: Daniel Glauber
+# File: mutation.py
+# Description: Contains the MutationEngine class, which samples the positions of a genome to mutate.
+from typing import Any, Callable, Dict, List
+
+# Constants for magic numbers and strings
+MUTATION_OPERATOR_BIT_FLIP = 0
+MUTATION_OPERATOR_FIXED_K = 1
+MUTATION_OPERATOR_BLOCK = 2
+
+
+class MutationEngine:
+    """
+    Class MutationEngine samples the indexes to flip for a mutation directly,
+    so the cost of a mutation is proportional to the number of flipped bits instead of the string size.
+    """
+
+    def __init__(self, string_size: int, mutation_operator: int = MUTATION_OPERATOR_BIT_FLIP,
+                 bits_k: int = 1, block_size: int = 4) -> None:
+        """
+        Initializes the MutationEngine.
+
+        Args:
+            string_size (int): The size of the solution string.
+            mutation_operator (int, optional): The mutation operator to use. Defaults to MUTATION_OPERATOR_BIT_FLIP.
+            bits_k (int, optional): The number of bits flipped by the fixed-k operator. Defaults to 1.
+            block_size (int, optional): The size of the blocks used by the block operator. Defaults to 4.
+        """
+        self.string_size = string_size
+        self.bits_k = min(bits_k, string_size)
+        self.block_size = block_size
+        self.block_count = -(-string_size // block_size)
+        self.mutation_rate = 1 / string_size
+        self.mutation_operators: Dict[int, Callable[[Any], List[int]]] = {
+            MUTATION_OPERATOR_BIT_FLIP: self.bit_flip_indexes,
+            MUTATION_OPERATOR_FIXED_K: self.fixed_k_indexes,
+            MUTATION_OPERATOR_BLOCK: self.block_indexes
+        }
+        self.sample_indexes = self.mutation_operators[mutation_operator]
+
+    def bit_flip_indexes(self, stream: Any) -> List[int]:
+        """
+        Flips each bit independently with probability 1/L.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+
+        Returns:
+            List[int]: The indexes to flip.
+        """
+        return stream.bernoulli_indexes(self.string_size, self.mutation_rate)
+
+    def fixed_k_indexes(self, stream: Any) -> List[int]:
+        """
+        Flips exactly k distinct bits.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+
+        Returns:
+            List[int]: The indexes to flip.
+        """
+        return stream.sample(range(self.string_size), self.bits_k)
+
+    def block_indexes(self, stream: Any) -> List[int]:
+        """
+        Mutates each block with probability 1/(number of blocks), replacing it with a different random pattern.
+        Aligned with the trap partitions, this moves a whole building block at once.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+
+        Returns:
+            List[int]: The indexes to flip.
+        """
+        indexes = []
+        for block in stream.bernoulli_indexes(self.block_count, 1 / self.block_count):
+            block_start = block * self.block_size
+            block_length = min(self.block_size, self.string_size - block_start)
+            # Any non-zero flip pattern gives a block different from the current one
+            pattern = stream.randrange(1, 1 << block_length)
+            indexes.extend(block_start + i for i in range(block_length) if pattern >> i & 1)
+        return indexes
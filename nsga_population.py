@@ -0,0 +1,257 @@
+# Author: Daniel Glauber
+# File: nsga_population.py
+# Description: Contains the NSGAPopulation class, which runs the genetic algorithm on several objectives with NSGA-II.
+from typing import Dict, List, Optional, Sequence, Tuple
+from individual import Individual
+from population import Population, DebugLogger, SELECTION_METHOD_TOURNAMENT, DEDUP_POLICY_OFF, FULL_DEBUG
+
+logger = DebugLogger(__name__)
+
+# Constants for magic numbers and strings
+BOUNDARY_CROWDING_DISTANCE = float("inf")
+TWO_OBJECTIVES = 2
+
+
+def dominates(objectives_a: Sequence[int], objectives_b: Sequence[int]) -> bool:
+    """
+    Checks if a solution dominates another: it is at least as good in every objective and better in one.
+
+    Args:
+        objectives_a (Sequence[int]): The objectives of the first solution.
+        objectives_b (Sequence[int]): The objectives of the second solution.
+
+    Returns:
+        bool: True if the first solution dominates the second, False otherwise.
+    """
+    return objectives_a != objectives_b and all(a >= b for a, b in zip(objectives_a, objectives_b))
+
+
+def fast_non_dominated_sort(objectives: Sequence[Tuple[int, ...]]) -> List[List[int]]:
+    """
+    Sorts solutions into non-dominated fronts with the O(MN^2) fast non-dominated sort of NSGA-II.
+    Two objectives use two_objective_sort instead, which is O(N log N).
+
+    Args:
+        objectives (Sequence[Tuple[int, ...]]): The objectives of each solution, all maximized.
+
+    Returns:
+        List[List[int]]: The indexes of the solutions in each front, best front first.
+    """
+    if objectives and len(objectives[0]) == TWO_OBJECTIVES:
+        return two_objective_sort(objectives)
+    size = len(objectives)
+    dominated_solutions = [[] for index in range(size)]
+    domination_counts = [0] * size
+    fronts = [[]]
+    for p in range(size):
+        for q in range(p + 1, size):
+            if dominates(objectives[p], objectives[q]):
+                dominated_solutions[p].append(q)
+                domination_counts[q] += 1
+            elif dominates(objectives[q], objectives[p]):
+                dominated_solutions[q].append(p)
+                domination_counts[p] += 1
+    fronts[0] = [p for p in range(size) if domination_counts[p] == 0]
+    while fronts[-1]:
+        next_front = []
+        for p in fronts[-1]:
+            for q in dominated_solutions[p]:
+                domination_counts[q] -= 1
+                if domination_counts[q] == 0:
+                    next_front.append(q)
+        fronts.append(next_front)
+    return fronts[:-1]
+
+
+def two_objective_sort(objectives: Sequence[Tuple[int, ...]]) -> List[List[int]]:
+    """
+    Sorts solutions with two objectives into non-dominated fronts in O(N log N).
+    Solutions are visited in decreasing order of the objectives, so every solution of a front is at least
+    as good in the first objective, and only the last solution added to a front, which is the best of the
+    front in the second objective, has to be checked. Each solution joins the first front that does not
+    dominate it, found by binary search.
+
+    Args:
+        objectives (Sequence[Tuple[int, ...]]): The objectives of each solution, all maximized.
+
+    Returns:
+        List[List[int]]: The indexes of the solutions in each front, best front first.
+    """
+    fronts = []
+    front_last = []
+    for index in sorted(range(len(objectives)), key=objectives.__getitem__, reverse=True):
+        point = objectives[index]
+        low, high = 0, len(fronts)
+        while low < high:
+            middle = (low + high) // 2
+            last = front_last[middle]
+            if last[1] >= point[1] and last != point:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(fronts):
+            fronts.append([index])
+            front_last.append(point)
+        else:
+            fronts[low].append(index)
+            front_last[low] = point
+    return fronts
+
+
+def crowding_distances(objectives: Sequence[Tuple[int, ...]], front: List[int]) -> Dict[int, float]:
+    """
+    Calculates the crowding distance of every solution in a front.
+    The solutions at the ends of each objective get an infinite distance so they are always kept.
+
+    Args:
+        objectives (Sequence[Tuple[int, ...]]): The objectives of each solution.
+        front (List[int]): The indexes of the solutions in the front.
+
+    Returns:
+        Dict[int, float]: The crowding distance of each solution in the front.
+    """
+    distances = dict.fromkeys(front, 0.0)
+    for objective in range(len(objectives[front[0]])):
+        ordered = sorted(front, key=lambda index: objectives[index][objective])
+        lowest = objectives[ordered[0]][objective]
+        highest = objectives[ordered[-1]][objective]
+        distances[ordered[0]] = distances[ordered[-1]] = BOUNDARY_CROWDING_DISTANCE
+        if highest == lowest:
+            continue
+        for position in range(1, len(ordered) - 1):
+            gap = objectives[ordered[position + 1]][objective] - objectives[ordered[position - 1]][objective]
+            distances[ordered[position]] += gap / (highest - lowest)
+    return distances
+
+
+def hypervolume_2d(front_objectives: Sequence[Tuple[int, ...]]) -> float:
+    """
+    Calculates the area dominated by a front of two maximized objectives, measured from the origin.
+
+    Args:
+        front_objectives (Sequence[Tuple[int, ...]]): The objectives of the solutions in the front.
+
+    Returns:
+        float: The hypervolume of the front.
+    """
+    volume = 0
+    previous_second = 0
+    for first, second in sorted(set(front_objectives), reverse=True):
+        if second > previous_second:
+            volume += first * (second - previous_second)
+            previous_second = second
+    return volume
+
+
+class NSGAPopulation(Population):
+    """
+    Class NSGAPopulation optimizes several objectives at once with NSGA-II.
+    Parents are picked by tournament on non-domination rank and crowding distance, and each new generation
+    is chosen from the parents and children together, front by front, so the best front is never lost.
+    The scalar fitness is still the first objective, so the generation summary and success check are unchanged.
+    """
+
+    def __init__(self, stream_id: int = 0):
+        """
+        Initializes the NSGAPopulation.
+
+        Args:
+            stream_id (int, optional): The random stream used by this population. Defaults to 0.
+        """
+        super().__init__(stream_id)
+        self.ranks = []
+        self.crowding = []
+
+    def create_surrogate(self) -> None:
+        """
+        Surrogate pre-screening ranks bit genomes built by Population.select_mating_parents, so it is not used here.
+
+        Returns:
+            None: No surrogate model.
+        """
+        return None
+
+    def initialize_random_starting_population(self) -> None:
+        super().initialize_random_starting_population()
+        self.rank_current_generation()
+
+    def rank_current_generation(self) -> None:
+        """
+        Sorts the current generation into fronts and stores the rank and crowding distance of every individual.
+        """
+        objectives = [individual.get_objectives() for individual in self.current_generation]
+        self.ranks = [0] * len(objectives)
+        self.crowding = [0.0] * len(objectives)
+        for rank, front in enumerate(fast_non_dominated_sort(objectives)):
+            for index, distance in crowding_distances(objectives, front).items():
+                self.ranks[index] = rank
+                self.crowding[index] = distance
+
+    def single_parent_selection(self) -> Individual:
+        """
+        Selects a single parent by tournament on the lowest rank, then the largest crowding distance.
+
+        Returns:
+            Individual: The selected parent.
+        """
+        selection = self.rng.choices(range(len(self.current_generation)), k=self.tournament_selection_size)
+        best_index = max(selection, key=lambda index: (-self.ranks[index], self.crowding[index]))
+        best_parent = self.current_generation[best_index]
+        if self.full_debug == FULL_DEBUG:
+            logger.info("Selecting parent")
+            logger.info('\n'.join([(f"{self.current_generation[index].solution_as_string()}, "
+                                    f"Rank: {self.ranks[index]}, Crowding: {self.crowding[index]}") for index in selection]))
+            logger.info(f"Selected parent: {best_parent.solution_as_string()}\n")
+        return best_parent
+
+    def select_mating_parents(self) -> None:
+        """
+        Generates a full generation of children. The elite is kept by replace_current_population instead.
+        """
+        if self.dedup_policy != DEDUP_POLICY_OFF:
+            self.remove_duplicate_individuals()
+            self.rank_current_generation()
+        if self.selectionMethod == SELECTION_METHOD_TOURNAMENT:
+            for pair in range(-(-self.population_size // 2)):
+                for child in self.tournament_selection(pair):
+                    if len(self.next_generation) < self.population_size:
+                        self.next_generation.append(child)
+
+    def replace_current_population(self) -> None:
+        """
+        Chooses the next generation from the parents and children together.
+        Whole fronts are taken in order of rank, and the front that does not fit is cut by crowding distance.
+        """
+        combined = self.current_generation + self.next_generation
+        objectives = [individual.get_objectives() for individual in combined]
+        survivors = []
+        ranks = []
+        crowding = []
+        for rank, front in enumerate(fast_non_dominated_sort(objectives)):
+            distances = crowding_distances(objectives, front)
+            if len(survivors) + len(front) > self.population_size:
+                front = sorted(front, key=distances.__getitem__, reverse=True)[:self.population_size - len(survivors)]
+            survivors.extend(front)
+            ranks.extend([rank] * len(front))
+            crowding.extend(distances[index] for index in front)
+            if len(survivors) == self.population_size:
+                break
+        self.current_generation = [combined[index] for index in survivors]
+        self.next_generation = []
+        self.ranks = ranks
+        self.crowding = crowding
+
+    def get_pareto_statistics(self) -> Optional[Dict[str, float]]:
+        """
+        Summarizes the Pareto front of the current generation.
+
+        Returns:
+            Dict[str, float]: The size of the first front, the number of fronts and, for two objectives,
+                the hypervolume of the first front.
+        """
+        front = [individual.get_objectives() for individual, rank in zip(self.current_generation, self.ranks) if rank == 0]
+        return {
+            "frontSize": len(front),
+            "frontCount": max(self.ranks) + 1,
+            "hypervolume": hypervolume_2d(front) if len(front[0]) == TWO_OBJECTIVES else None
+        }
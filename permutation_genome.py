@@ -0,0 +1,374 @@
+# Author: Daniel Glauber
+# File: permutation_genome.py
+# Description: Contains the PermutationGenomeEngine class, which creates, varies and scores tours of cities.
+import math
+import random
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Constants for magic numbers and strings
+GENOME_TYPE_PERMUTATION = 3
+PERMUTATION_TYPECODE = "i"
+PERMUTATION_CROSSOVER_OX = 0
+PERMUTATION_CROSSOVER_PMX = 1
+PERMUTATION_CROSSOVER_CYCLE = 2
+PERMUTATION_MUTATION_SWAP = 0
+PERMUTATION_MUTATION_INVERSION = 1
+PERMUTATION_MUTATION_SCRAMBLE = 2
+NO_DISTANCE_MATRIX_FILE = "none"
+# Radius of the generated instance, whose cities lie on a circle
+CIRCLE_INSTANCE_RADIUS = 1000
+COORDINATE_COLUMNS = 2
+CIRCLE_INSTANCE_SEED_SUFFIX = "circle"
+
+
+def euclidean_distance_matrix(coordinates: List[Tuple[float, float]]) -> List[List[int]]:
+    """
+    Builds a distance matrix from city coordinates, rounding distances to the nearest integer as TSPLIB does.
+
+    Args:
+        coordinates (List[Tuple[float, float]]): The x and y coordinates of each city.
+
+    Returns:
+        List[List[int]]: The distance between every pair of cities.
+    """
+    return [[round(math.dist(a, b)) for b in coordinates] for a in coordinates]
+
+
+def circle_instance(city_count: int, seed: int) -> Tuple[List[List[int]], int]:
+    """
+    Creates an instance with the cities on a circle, in a shuffled order, so the optimal tour is known:
+    it visits the cities around the circle.
+
+    Args:
+        city_count (int): The number of cities.
+        seed (int): The seed used to shuffle the cities.
+
+    Returns:
+        Tuple[List[List[int]], int]: The distance matrix and the length of the optimal tour.
+    """
+    order = list(range(city_count))
+    # A string seed keeps the city order independent of the streams used by the population
+    random.Random(f"{seed}/{CIRCLE_INSTANCE_SEED_SUFFIX}").shuffle(order)
+    coordinates = [(0.0, 0.0)] * city_count
+    for position, city in enumerate(order):
+        angle = 2 * math.pi * position / city_count
+        coordinates[city] = (CIRCLE_INSTANCE_RADIUS * math.cos(angle), CIRCLE_INSTANCE_RADIUS * math.sin(angle))
+    distances = euclidean_distance_matrix(coordinates)
+    optimal_length = sum(distances[order[i - 1]][order[i]] for i in range(city_count))
+    return distances, optimal_length
+
+
+def read_distance_matrix(distance_matrix_file: str, city_count: int) -> List[List[int]]:
+    """
+    Reads an instance with one line per city: either the x and y coordinates of the city,
+    or its row of the distance matrix.
+
+    Args:
+        distance_matrix_file (str): The path to the instance file.
+        city_count (int): The number of cities, which is stringSizeN.
+
+    Returns:
+        List[List[int]]: The distance between every pair of cities.
+    """
+    try:
+        with open(distance_matrix_file) as file:
+            rows = [[float(value) for value in line.replace(",", " ").split()] for line in file if line.strip()]
+    except (IOError, ValueError) as e:
+        print(f"Error reading distance matrix file {distance_matrix_file}: {e}")
+        quit()
+    if len(rows) != city_count:
+        print(f"Distance matrix file {distance_matrix_file} has {len(rows)} cities, expected stringSizeN = {city_count}")
+        quit()
+    if city_count != COORDINATE_COLUMNS and all(len(row) == COORDINATE_COLUMNS for row in rows):
+        return euclidean_distance_matrix([(row[0], row[1]) for row in rows])
+    if any(len(row) != city_count for row in rows):
+        print(f"Each line of {distance_matrix_file} must hold 2 coordinates or {city_count} distances")
+        quit()
+    return [[round(value) for value in row] for row in rows]
+
+
+class PermutationGenomeEngine:
+    """
+    Class PermutationGenomeEngine holds the operators for permutation genomes stored in integer arrays,
+    scored by the length of the closed tour they describe.
+    The crossover operators look cities up in position index arrays instead of scanning the parents,
+    so each crossover is O(L) instead of O(L^2).
+    """
+
+    def __init__(self, distances: List[List[int]], optimal_length: Optional[int] = None,
+                 crossover_operator: int = PERMUTATION_CROSSOVER_OX,
+                 mutation_operator: int = PERMUTATION_MUTATION_SWAP) -> None:
+        """
+        Initializes the PermutationGenomeEngine.
+
+        Args:
+            distances (List[List[int]]): The distance between every pair of cities.
+            optimal_length (int, optional): The length of the optimal tour, if it is known. Defaults to None.
+            crossover_operator (int, optional): The crossover operator. Defaults to PERMUTATION_CROSSOVER_OX.
+            mutation_operator (int, optional): The mutation operator. Defaults to PERMUTATION_MUTATION_SWAP.
+        """
+        self.distances = distances
+        self.optimal_length = optimal_length
+        self.string_size = len(distances)
+        self.crossover_operators: Dict[int, Callable[[Any, array, array], Tuple[array, array]]] = {
+            PERMUTATION_CROSSOVER_OX: self.order_crossover,
+            PERMUTATION_CROSSOVER_PMX: self.partially_mapped_crossover,
+            PERMUTATION_CROSSOVER_CYCLE: self.cycle_crossover
+        }
+        self.mutation_operators: Dict[int, Callable[[Any, array], None]] = {
+            PERMUTATION_MUTATION_SWAP: self.swap_mutation,
+            PERMUTATION_MUTATION_INVERSION: self.inversion_mutation,
+            PERMUTATION_MUTATION_SCRAMBLE: self.scramble_mutation
+        }
+        self.crossover = self.crossover_operators[crossover_operator]
+        self.mutate_in_place = self.mutation_operators[mutation_operator]
+
+    def random_solutions(self, stream: Any, count: int) -> List[array]:
+        """
+        Generates random tours.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            count (int): The number of tours.
+
+        Returns:
+            List[array]: The random tours.
+        """
+        solutions = []
+        for tour in range(count):
+            cities = list(range(self.string_size))
+            stream.shuffle(cities)
+            solutions.append(array(PERMUTATION_TYPECODE, cities))
+        return solutions
+
+    def tour_length(self, solution: array) -> int:
+        """
+        Calculates the length of a closed tour.
+
+        Args:
+            solution (array): The tour.
+
+        Returns:
+            int: The length of the tour.
+        """
+        distances = self.distances
+        previous = solution[-1]
+        length = 0
+        for city in solution:
+            length += distances[previous][city]
+            previous = city
+        return length
+
+    def batch_tour_lengths(self, solutions: List[array]) -> List[int]:
+        """
+        Calculates the lengths of many tours in one pass, looking up each step in the precomputed matrix.
+
+        Args:
+            solutions (List[array]): The tours.
+
+        Returns:
+            List[int]: The length of each tour.
+        """
+        rows = self.distances
+        return [sum(map(list.__getitem__, map(rows.__getitem__, solution[-1:] + solution[:-1]), solution))
+                for solution in solutions]
+
+    def fitness(self, fitness_function: int, solution: array) -> int:
+        """
+        Returns the fitness of a tour, which is its length negated so that shorter tours are fitter.
+
+        Args:
+            fitness_function (int): Unused, tours are always scored by their length.
+            solution (array): The tour.
+
+        Returns:
+            int: The fitness of the tour.
+        """
+        return -self.tour_length(solution)
+
+    def target_fitness(self) -> Optional[int]:
+        """
+        Returns the fitness of the optimal tour, or None when it is not known.
+
+        Returns:
+            int: The fitness that counts as success.
+        """
+        return None if self.optimal_length is None else -self.optimal_length
+
+    def mutate(self, stream: Any, solution: array) -> array:
+        """
+        Applies the mutation operator to a copy of a tour.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution (array): The tour to mutate.
+
+        Returns:
+            array: The mutated copy of the tour.
+        """
+        mutated = solution[:]
+        self.mutate_in_place(stream, mutated)
+        return mutated
+
+    def random_segment(self, stream: Any) -> Tuple[int, int]:
+        """
+        Draws a segment of at least two positions.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+
+        Returns:
+            Tuple[int, int]: The start of the segment and the position after its end.
+        """
+        start, end = sorted(stream.sample(range(self.string_size + 1), 2))
+        if end - start < 2:
+            start, end = (start, start + 2) if start + 2 <= self.string_size else (end - 2, end)
+        return start, end
+
+    def swap_mutation(self, stream: Any, solution: array) -> None:
+        """
+        Swaps two cities.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution (array): The tour to change in place.
+        """
+        first, second = stream.sample(range(self.string_size), 2)
+        solution[first], solution[second] = solution[second], solution[first]
+
+    def inversion_mutation(self, stream: Any, solution: array) -> None:
+        """
+        Reverses a segment of the tour, the 2-opt move.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution (array): The tour to change in place.
+        """
+        start, end = self.random_segment(stream)
+        solution[start:end] = solution[start:end][::-1]
+
+    def scramble_mutation(self, stream: Any, solution: array) -> None:
+        """
+        Shuffles a segment of the tour.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution (array): The tour to change in place.
+        """
+        start, end = self.random_segment(stream)
+        segment = solution[start:end].tolist()
+        stream.shuffle(segment)
+        solution[start:end] = array(PERMUTATION_TYPECODE, segment)
+
+    def order_crossover_child(self, solution_a: array, solution_b: array, start: int, end: int) -> array:
+        """
+        Builds one order crossover (OX) child: the segment of the first parent, with the remaining cities
+        in the order they follow the segment in the second parent.
+
+        Args:
+            solution_a (array): The parent giving the segment.
+            solution_b (array): The parent giving the order of the other cities.
+            start (int): The start of the segment.
+            end (int): The position after the end of the segment.
+
+        Returns:
+            array: The child.
+        """
+        size = self.string_size
+        # Marks the cities of the segment, so each membership test is a single lookup
+        in_segment = bytearray(size)
+        for city in solution_a[start:end]:
+            in_segment[city] = 1
+        child = solution_a[:]
+        position = end % size
+        for offset in range(size):
+            city = solution_b[(end + offset) % size]
+            if not in_segment[city]:
+                child[position] = city
+                position = (position + 1) % size
+        return child
+
+    def order_crossover(self, stream: Any, solution_a: array, solution_b: array) -> Tuple[array, array]:
+        """
+        Performs order crossover (OX), which keeps a segment of each parent and the relative order of the rest.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution_a (array): The first parent's tour.
+            solution_b (array): The second parent's tour.
+
+        Returns:
+            Tuple[array, array]: The tours of the two children.
+        """
+        start, end = self.random_segment(stream)
+        return (self.order_crossover_child(solution_a, solution_b, start, end),
+                self.order_crossover_child(solution_b, solution_a, start, end))
+
+    def partially_mapped_crossover(self, stream: Any, solution_a: array, solution_b: array) -> Tuple[array, array]:
+        """
+        Performs partially mapped crossover (PMX), which swaps a segment between the parents and repairs
+        the rest of each child through the mapping defined by the segment.
+        Each child keeps a position index, so the city to swap with is found in a single lookup.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution_a (array): The first parent's tour.
+            solution_b (array): The second parent's tour.
+
+        Returns:
+            Tuple[array, array]: The tours of the two children.
+        """
+        start, end = self.random_segment(stream)
+        child_a = solution_a[:]
+        child_b = solution_b[:]
+        position_a = array(PERMUTATION_TYPECODE, bytes(self.string_size * child_a.itemsize))
+        position_b = array(PERMUTATION_TYPECODE, bytes(self.string_size * child_b.itemsize))
+        for index in range(self.string_size):
+            position_a[child_a[index]] = index
+            position_b[child_b[index]] = index
+        for index in range(start, end):
+            city_a = child_a[index]
+            city_b = child_b[index]
+            # Move city_b into place in child_a, and city_a into place in child_b, by swapping
+            other = position_a[city_b]
+            child_a[index], child_a[other] = city_b, city_a
+            position_a[city_a], position_a[city_b] = other, index
+            other = position_b[city_a]
+            child_b[index], child_b[other] = city_a, city_b
+            position_b[city_b], position_b[city_a] = other, index
+        return child_a, child_b
+
+    def cycle_crossover(self, stream: Any, solution_a: array, solution_b: array) -> Tuple[array, array]:
+        """
+        Performs cycle crossover (CX), which keeps every city at the position it has in one of the parents,
+        taking whole cycles of positions alternately from each parent.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution_a (array): The first parent's tour.
+            solution_b (array): The second parent's tour.
+
+        Returns:
+            Tuple[array, array]: The tours of the two children.
+        """
+        size = self.string_size
+        position_a = array(PERMUTATION_TYPECODE, bytes(size * solution_a.itemsize))
+        for index in range(size):
+            position_a[solution_a[index]] = index
+        child_a = solution_a[:]
+        child_b = solution_b[:]
+        visited = bytearray(size)
+        swap_cycle = False
+        for start in range(size):
+            if visited[start]:
+                continue
+            index = start
+            while not visited[index]:
+                visited[index] = 1
+                if swap_cycle:
+                    child_a[index] = solution_b[index]
+                    child_b[index] = solution_a[index]
+                index = position_a[solution_b[index]]
+            swap_cycle = not swap_cycle
+        return child_a, child_b
@@ -0,0 +1,94 @@
+# Author: Daniel Glauber
+# File: permutation_population.py
+# Description: Contains the PermutationPopulation class, which evolves tours for ordering problems.
+from collections import Counter
+from typing import Optional
+from individual import Individual
+from population import DEDUP_POLICY_RANDOM, FULL_DEBUG, LIMITED_DEBUG
+from typed_population import TypedPopulation, logger
+from permutation_genome import PermutationGenomeEngine, NO_DISTANCE_MATRIX_FILE, circle_instance, read_distance_matrix
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+UNKNOWN_TOUR_LENGTH = 0
+
+
+class PermutationPopulation(TypedPopulation):
+    """
+    Class PermutationPopulation evolves tours stored as permutations of the cities 0 to stringSizeN - 1.
+    It reuses the tournament selection, elitism and duplicate elimination of Population, with
+    crossover, mutation and the tour-length fitness coming from a PermutationGenomeEngine.
+    """
+
+    def create_genome_engine(self) -> PermutationGenomeEngine:
+        """
+        Creates the genome engine from the settings, reading the distance matrix once.
+        Without distanceMatrixFile the cities are placed on a circle, where the optimal tour is known.
+
+        Returns:
+            PermutationGenomeEngine: The genome engine.
+        """
+        distance_matrix_file = sl.get_setting("distanceMatrixFile")
+        city_count = sl.get_setting("stringSizeN")
+        engine = getattr(self, "genome_engine", None)
+        if engine is not None and engine.string_size == city_count:
+            distances, optimal_length = engine.distances, engine.optimal_length
+        elif distance_matrix_file == NO_DISTANCE_MATRIX_FILE:
+            distances, optimal_length = circle_instance(city_count, sl.get_setting("randSeed"))
+        else:
+            distances = read_distance_matrix(distance_matrix_file, city_count)
+            target_tour_length = sl.get_setting("targetTourLength")
+            optimal_length = None if target_tour_length == UNKNOWN_TOUR_LENGTH else target_tour_length
+        return PermutationGenomeEngine(distances, optimal_length, sl.get_setting("permutationCrossoverOperator"),
+                                       sl.get_setting("permutationMutationOperator"))
+
+    def get_target_fitness(self) -> Optional[int]:
+        return self.genome_engine.target_fitness()
+
+    def initialize_random_starting_population(self) -> None:
+        """
+        Initializes the starting population with random tours, measuring all of them in one batch.
+        """
+        self.current_generation = []
+        self.next_generation = []
+        self.reload_settings()
+        solutions = self.genome_engine.random_solutions(self.rng, self.population_size)
+        lengths = self.genome_engine.batch_tour_lengths(solutions)
+        Individual.evaluation_count += len(solutions)
+        self.current_generation = [Individual(self._fitnessFunction, solution, -length, copy_solution=False)
+                                   for solution, length in zip(solutions, lengths)]
+        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
+            logger.info("Initial Population")
+            for i in self.current_generation:
+                logger.info(f"{i.solution_as_string()}")
+
+    def get_diversity(self) -> float:
+        """
+        Calculates the diversity of the tours from the city visited before each city.
+        Each city contributes the fraction of tours that do not use its most common predecessor.
+
+        Returns:
+            float: The average predecessor diversity, from 0.0 (every tour is the same) towards 1.0.
+        """
+        size = len(self.current_generation)
+        predecessors = [Counter() for city in range(self.string_size)]
+        for individual in self.current_generation:
+            solution = individual.get_solution()
+            for position, city in enumerate(solution):
+                predecessors[city][solution[position - 1]] += 1
+        return sum(1 - max(counts.values()) / size for counts in predecessors) / self.string_size
+
+    def create_dedup_replacement(self, duplicate: Individual) -> Individual:
+        """
+        Creates a replacement for a duplicate tour according to the dedup policy.
+
+        Args:
+            duplicate (Individual): The duplicate individual.
+
+        Returns:
+            Individual: The replacement individual.
+        """
+        if self.dedup_policy == DEDUP_POLICY_RANDOM:
+            return self.initialize_random_individual(self.string_size)
+        # Apply the mutation operator once so the replacement stays close to the duplicate
+        return self.create_individual(self.genome_engine.mutate(self.rng, duplicate.get_solution()))
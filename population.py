@@ -1,36 +1,142 @@
 # Author: Daniel Glauber
 # File: population.py
 # Description: Contains the Population class, which represents the entire population of individual solutions.
-import copy
-import random
-import logging
+import heapq
+import math
+import os
+from itertools import chain, islice
 from operator import attrgetter
-from individual import Individual
+from individual import Individual, set_trap_function
 import settings_loader as sl
-from typing import List, Tuple, Dict
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+import rng
+from mutation import MutationEngine
+from surrogate import create_surrogate
+from genome_storage import solution_as_integer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Constants for magic numbers and strings
 SELECTION_METHOD_TOURNAMENT = 0
 CROSSOVER_OPERATOR_UNIFORM = 0
 CROSSOVER_OPERATOR_ONE_POINT = 1
 CROSSOVER_OPERATOR_TWO_POINT = 2
+CROSSOVER_OPERATOR_K_POINT = 3
+CROSSOVER_OPERATOR_BLOCK = 4
+CROSSOVER_OPERATOR_HALF_UNIFORM = 5
+CROSSOVER_OPERATOR_NAMES = {
+    CROSSOVER_OPERATOR_UNIFORM: "Uniform",
+    CROSSOVER_OPERATOR_ONE_POINT: "One-Point",
+    CROSSOVER_OPERATOR_TWO_POINT: "Two-Point",
+    CROSSOVER_OPERATOR_K_POINT: "K-Point",
+    CROSSOVER_OPERATOR_BLOCK: "Block",
+    CROSSOVER_OPERATOR_HALF_UNIFORM: "Half-Uniform"
+}
+DEDUP_POLICY_OFF = 0
+DEDUP_POLICY_MUTATE = 1
+DEDUP_POLICY_RANDOM = 2
+DEDUP_MAX_ATTEMPTS = 3
+NO_SEED_POPULATION_FILE = "none"
+INITIALIZATION_CHUNK_BITS = 1 << 20
+REPLACEMENT_GENERATIONAL = 0
+REPLACEMENT_PLUS = 1
+REPLACEMENT_COMMA = 2
+REPLACEMENT_RESTRICTED_TOURNAMENT = 3
+# rtrWindowSize that uses the smaller of the population size and the string size
+RTR_WINDOW_AUTOMATIC = 0
+# Settings that can be changed while a run is going, with the attribute that holds each one
+HOT_RELOADABLE_SETTINGS = {
+    "probApplyCrossover": "probApplyCrossover",
+    "probApplyMutation": "probApplyMutation",
+    "crossoverOperator": "crossoverOperator",
+    "tournamentSizeK": "tournament_selection_size",
+    "dedupPolicy": "dedup_policy",
+    "eliteCount": "elite_count",
+    "mutationOperator": "mutation_engine",
+    "mutationBitsK": "mutation_engine",
+    "mutationBlockSize": "mutation_engine"
+}
+CHECKPOINT_FILE_NAME = "checkpoint_population.txt"
 FULL_DEBUG = True
 LIMITED_DEBUG = True
 
+
+class DebugLogger:
+    """
+    Class DebugLogger stands in for a module logger. Debug messages are only written when debugging is on,
+    so the logging module is imported and configured when the first message is written instead of at startup.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Initializes the logger without creating the underlying logger.
+
+        Args:
+            name (str): The name of the underlying logger.
+        """
+        self.name = name
+        self._logger = None
+
+    def info(self, message: str) -> None:
+        """
+        Writes a debug message at the INFO level.
+
+        Args:
+            message (str): The message.
+        """
+        if self._logger is None:
+            import logging
+            # Does nothing if the program embedding the GA has already configured logging
+            logging.basicConfig(level=logging.INFO)
+            self._logger = logging.getLogger(self.name)
+        self._logger.info(message)
+
+
+logger = DebugLogger(__name__)
+
+
+def read_seed_solutions(seed_population_file: str, string_size: int) -> Iterator[bytearray]:
+    """
+    Streams known-good solutions from a file, one solution per line.
+    A line is either a string of 0s and 1s or the comma separated format printed by the program.
+
+    Args:
+        seed_population_file (str): The path to the file of solutions.
+        string_size (int): The size of each solution.
+
+    Yields:
+        bytearray: The next valid solution in the file.
+    """
+    try:
+        with open(seed_population_file) as file:
+            for line_number, line in enumerate(file, 1):
+                genome = line.strip().replace(",", "")
+                if not genome:
+                    continue
+                if len(genome) != string_size or genome.strip("01"):
+                    print(f"Skipping line {line_number} of {seed_population_file}: "
+                          f"expected {string_size} bits of 0 or 1")
+                    continue
+                yield bytearray(genome.encode().translate(rng.BIT_CHARACTERS_TO_BYTES))
+    except IOError as e:
+        print(f"Error reading seed population file {seed_population_file}: {e}")
+        quit()
+
 # Class Population represents the entire population of individual solutions.
 class Population:
     """
     Class Population represents the entire population of individual solutions.
     """
-    def __init__(self):
+    def __init__(self, stream_id: int = 0):
         """
         Initializes the Population with settings loaded from the settings_loader.
+
+        Args:
+            stream_id (int, optional): The random stream used by this population, so workers and islands
+                sharing a seed draw independent numbers. Defaults to 0.
         """
+        self._stream_id = stream_id
+        self.rng = rng.create_stream(sl.get_setting("randSeed"), stream_id, sl.get_setting("rngBackend"))
         self._fitnessFunction = sl.get_setting("fitnessFunction")
+        set_trap_function(sl.get_setting("trapBlockSize"), sl.get_setting("trapDeception"), sl.get_setting("trapLinkage"))
         self._current_generation = []
         self._next_generation = []
         self._full_debug = sl.get_setting("fullDebug")
@@ -43,6 +149,21 @@ class Population:
         self._probApplyMutation = sl.get_setting("probApplyMutation")
         self._tournament_selection_size = sl.get_setting("tournamentSizeK")
         self._failures_before_termination = sl.get_setting("failuresBeforeTermination")
+        self._dedup_policy = sl.get_setting("dedupPolicy")
+        self.duplicate_ratio = None
+        self.mutation_engine = self.create_mutation_engine()
+        self.crossover_points_k = sl.get_setting("crossoverPointsK")
+        self.crossover_block_size = sl.get_setting("crossoverBlockSize")
+        self.crossover_operators = self.create_crossover_operators()
+        self.surrogate_fraction = sl.get_setting("surrogateFraction")
+        self.surrogate = self.create_surrogate()
+        self.surrogate_statistics = None
+        # Summary of the model a generation was sampled from, None for engines without a model
+        self.model_statistics = None
+        self.replacement_strategy = sl.get_setting("replacementStrategy")
+        self.elite_count = sl.get_setting("eliteCount")
+        self.offspring_ratio = sl.get_setting("offspringRatio")
+        self.rtr_window_size = sl.get_setting("rtrWindowSize")
 
     # Getter and Setter methods
     @property
@@ -141,6 +262,26 @@ class Population:
     def failures_before_termination(self, value):
         self._failures_before_termination = value
 
+    @property
+    def dedup_policy(self):
+        return self._dedup_policy
+
+    @dedup_policy.setter
+    def dedup_policy(self, value):
+        self._dedup_policy = value
+
+    def create_mutation_engine(self) -> MutationEngine:
+        """
+        Creates the mutation engine for the mutation operator in the settings.
+
+        Returns:
+            MutationEngine: The mutation engine.
+        """
+        return MutationEngine(sl.get_setting("stringSizeN"),
+                              sl.get_setting("mutationOperator"),
+                              sl.get_setting("mutationBitsK"),
+                              sl.get_setting("mutationBlockSize"))
+
     def initialize_random_individual(self, string_size: int) -> Individual:
         """
         Initializes a random individual with a given string size.
@@ -152,8 +293,8 @@ class Population:
             Individual: A new individual with a random solution.
         """
         # Generate a random binary solution of the given size
-        starting_solution = [random.randint(0, 1) for i in range(0, string_size)]
-        return Individual(self._fitnessFunction, starting_solution)
+        starting_solution = bytearray(self.rng.random_bits(string_size))
+        return Individual(self._fitnessFunction, starting_solution, copy_solution=False)
 
     def initialize_random_starting_population(self) -> None:
         """
@@ -162,8 +303,27 @@ class Population:
         # Reset current and next generations
         self.current_generation = []
         self.next_generation = []
+        self.reload_settings()
+        # Initialize the current generation with seeded individuals first and random individuals after them
+        solutions = list(self.seed_solutions())
+        solutions.extend(self.random_solutions(self.population_size - len(solutions)))
+        self.current_generation = Individual.from_solutions(self._fitnessFunction, solutions)
+        Individual.evaluate_many(self.current_generation)
+        if self.surrogate is not None:
+            for individual in self.current_generation:
+                self.surrogate.train(individual.get_solution(), individual.get_solution_fitness())
+        # Log the initial population if debugging is enabled
+        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
+            logger.info("Initial Population")
+            for i in self.current_generation:
+                logger.info(f"{i.solution_as_string()}")
+
+    def reload_settings(self) -> None:
+        """
+        Reseeds the random number generator and reloads the settings before a new population is started.
+        """
         # Seed the random number generator for reproducibility
-        random.seed(sl.get_setting("randSeed"))
+        self.rng = rng.create_stream(sl.get_setting("randSeed"), self._stream_id, sl.get_setting("rngBackend"))
         # Load settings from the settings loader
         self.full_debug = sl.get_setting("fullDebug")
         self.limited_debug = sl.get_setting("limitedDebug")
@@ -175,14 +335,63 @@ class Population:
         self.probApplyMutation = sl.get_setting("probApplyMutation")
         self.tournament_selection_size = sl.get_setting("tournamentSizeK")
         self.failures_before_termination = sl.get_setting("failuresBeforeTermination")
-        # Initialize the current generation with random individuals
-        self.current_generation = [self.initialize_random_individual(self.string_size) for i in range(self.population_size)]
-        # Log the initial population if debugging is enabled
-        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
-            logger.info("Initial Population")
-            temp_population = copy.deepcopy(self.current_generation)
-            for i in temp_population:
-                logger.info(f"{i.solution_as_string()}")
+        self.dedup_policy = sl.get_setting("dedupPolicy")
+        self.duplicate_ratio = None
+        set_trap_function(sl.get_setting("trapBlockSize"), sl.get_setting("trapDeception"), sl.get_setting("trapLinkage"))
+        self.mutation_engine = self.create_mutation_engine()
+        self.crossover_points_k = sl.get_setting("crossoverPointsK")
+        self.crossover_block_size = sl.get_setting("crossoverBlockSize")
+        self.surrogate_fraction = sl.get_setting("surrogateFraction")
+        self.surrogate = self.create_surrogate()
+        self.surrogate_statistics = None
+        # Summary of the model a generation was sampled from, None for engines without a model
+        self.model_statistics = None
+        self.replacement_strategy = sl.get_setting("replacementStrategy")
+        self.elite_count = sl.get_setting("eliteCount")
+        self.offspring_ratio = sl.get_setting("offspringRatio")
+        self.rtr_window_size = sl.get_setting("rtrWindowSize")
+
+    def create_surrogate(self) -> Optional[Any]:
+        """
+        Creates a new surrogate model from the settings, so every population starts with an untrained one.
+
+        Returns:
+            PerLocusSurrogate | NearestNeighbourSurrogate: The surrogate model, or None when surrogates are off.
+        """
+        return create_surrogate(sl.get_setting("surrogateModel"), self.string_size,
+                                sl.get_setting("surrogateNeighbours"), sl.get_setting("surrogateArchiveSize"))
+
+    def seed_solutions(self) -> Iterator[bytearray]:
+        """
+        Streams the solutions from the seed population file, up to the population size.
+
+        Returns:
+            Iterator[bytearray]: The seeded solutions, or nothing when no seed population file is set.
+        """
+        seed_population_file = sl.get_setting("seedPopulationFile")
+        if seed_population_file == NO_SEED_POPULATION_FILE:
+            return iter(())
+        return islice(read_seed_solutions(seed_population_file, self.string_size), self.population_size)
+
+    def random_solutions(self, count: int) -> List[bytearray]:
+        """
+        Generates random solutions, drawing the bits for many solutions at once.
+
+        Args:
+            count (int): The number of solutions to generate.
+
+        Returns:
+            List[bytearray]: The random solutions.
+        """
+        string_size = self.string_size
+        solutions_per_chunk = max(1, INITIALIZATION_CHUNK_BITS // string_size)
+        solutions = []
+        while len(solutions) < count:
+            chunk_size = min(solutions_per_chunk, count - len(solutions))
+            # One draw covers a whole chunk of solutions, which is then sliced into genomes
+            bits = self.rng.random_bits(chunk_size * string_size)
+            solutions.extend(bytearray(bits[i:i + string_size]) for i in range(0, chunk_size * string_size, string_size))
+        return solutions
 
     def get_average_fitness(self) -> float:
         """
@@ -203,7 +412,7 @@ class Population:
             Dict[str, float]: A dictionary containing the worst individual's fitness, solution, and index.
         """
         # Find the individual with the lowest fitness
-        worst_individual = min(self.current_generation, key=attrgetter('_solution_fitness'))
+        worst_individual = min(self.current_generation, key=attrgetter('solution_fitness'))
         worst_index = self.current_generation.index(worst_individual)
         worst_data = {
             "fitness": worst_individual.get_solution_fitness(),
@@ -220,7 +429,7 @@ class Population:
             Dict[str, float]: A dictionary containing the best individual's fitness, solution, and index.
         """
         # Find the individual with the highest fitness
-        best_individual = max(self.current_generation, key=attrgetter('_solution_fitness'))
+        best_individual = max(self.current_generation, key=attrgetter('solution_fitness'))
         best_index = self.current_generation.index(best_individual)
         best_data = {
             "fitness": best_individual.get_solution_fitness(),
@@ -229,6 +438,72 @@ class Population:
         }
         return best_data
 
+    def get_diversity(self) -> float:
+        """
+        Calculates the genetic diversity of the current generation.
+        Each locus contributes 4p(1-p), where p is the fraction of individuals with a 1 at that locus.
+
+        Returns:
+            float: The average locus diversity, from 0.0 (fully converged) to 1.0.
+        """
+        # Count the ones at every locus in a single pass over the population
+        ones_per_locus = [sum(locus) for locus in zip(*(individual.get_solution() for individual in self.current_generation))]
+        size = len(self.current_generation)
+        return sum(4 * ones * (size - ones) for ones in ones_per_locus) / (size * size * len(ones_per_locus))
+
+    def get_target_fitness(self) -> Optional[int]:
+        """
+        Returns the fitness that counts as solving the problem.
+
+        Returns:
+            int: The optimal fitness, which is the string size for the one-max and trap-4 fitness functions.
+        """
+        return self.string_size
+
+    def get_pareto_statistics(self) -> Optional[Dict[str, float]]:
+        """
+        Summarizes the Pareto front of the current generation in multi-objective mode.
+
+        Returns:
+            Dict[str, float]: None, since a single-objective population has no Pareto front.
+        """
+        return None
+
+    def snapshot(self) -> Tuple[List[bytes], List[int]]:
+        """
+        Copies the solutions and fitness values of the current generation, so they can be written out
+        by another thread while the next generation is built.
+
+        Returns:
+            Tuple[List[bytes], List[int]]: The solutions and their fitness values.
+        """
+        return ([bytes(individual.get_solution()) for individual in self.current_generation],
+                [individual.get_solution_fitness() for individual in self.current_generation])
+
+    def apply_setting(self, key: str, value: Any) -> None:
+        """
+        Changes a hot-reloadable setting between generations, without restarting the population.
+
+        Args:
+            key (str): The setting, one of HOT_RELOADABLE_SETTINGS.
+            value (Any): The new value, already converted.
+        """
+        sl.set_setting(key, value)
+        attribute = HOT_RELOADABLE_SETTINGS[key]
+        setattr(self, attribute, self.create_mutation_engine() if attribute == "mutation_engine" else value)
+
+    def checkpoint(self) -> str:
+        """
+        Writes the current generation as a seed population file, so a run can be started again from it
+        by setting seedPopulationFile.
+
+        Returns:
+            str: The path of the checkpoint file.
+        """
+        with open(CHECKPOINT_FILE_NAME, "w") as file:
+            file.write("\n".join(individual.solution_as_string() for individual in self.current_generation))
+        return os.path.abspath(CHECKPOINT_FILE_NAME)
+
     def single_tournament_selection(self) -> Tuple[Individual, Individual]:
         """
         Selects two parents using tournament selection.
@@ -247,9 +522,9 @@ class Population:
             Individual: The selected parent.
         """
         # Randomly select a subset of individuals for the tournament
-        selection = random.choices(self.current_generation, k=self.tournament_selection_size)
+        selection = self.rng.choices(self.current_generation, k=self.tournament_selection_size)
         # Choose the individual with the best fitness from the selection
-        best_parent = max(selection, key=attrgetter('_solution_fitness'))
+        best_parent = max(selection, key=attrgetter('solution_fitness'))
         if self.full_debug == FULL_DEBUG:
             logger.info("Selecting parent")
             logger.info('\n'.join([(f"{parent.solution_as_string()}, Fitness: {parent.solution_fitness}") for parent in selection]))
@@ -281,35 +556,32 @@ class Population:
             child (Individual): The child to mutate.
         """
         # Mutate the child with a certain probability
-        if random.random() < self.probApplyMutation:
-            indexes_to_mutate_bool_list = [random.random() < 1/self.string_size for i in range(self.string_size)]
-            if self.full_debug:
-                child.mutate_solution(indexes_to_mutate_bool_list, True)
-            else:
-                child.mutate_solution(indexes_to_mutate_bool_list)
+        if self.rng.random() < self.probApplyMutation:
+            # Only the positions to flip are drawn, so the cost follows the number of flips
+            indexes_to_mutate = self.mutation_engine.sample_indexes(self.rng)
+            if indexes_to_mutate:
+                child.mutate_solution(indexes_to_mutate, self.full_debug)
 
-    def crossover_controller(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
+    def create_crossover_operators(self) -> Dict[int, Callable[[bytearray, bytearray], Tuple[bytearray, bytearray]]]:
         """
-        Controls the crossover process based on the selected crossover operator.
-
-        Args:
-            parents_tuple (Tuple[Individual, Individual]): A tuple containing two parent individuals.
+        Creates the registry mapping crossover operator settings to their functions.
+        The registry is built once per population instead of on every crossover.
 
         Returns:
-            List[Individual]: A list of generated children.
+            Dict[int, Callable]: A dictionary mapping crossover operators to their functions.
         """
-        # Dictionary mapping crossover operators to their respective functions
-        crossover_functions = {
+        return {
             CROSSOVER_OPERATOR_UNIFORM: self.uniform_crossover,
             CROSSOVER_OPERATOR_ONE_POINT: self.one_point_crossover,
-            CROSSOVER_OPERATOR_TWO_POINT: self.two_point_crossover
+            CROSSOVER_OPERATOR_TWO_POINT: self.two_point_crossover,
+            CROSSOVER_OPERATOR_K_POINT: self.k_point_crossover,
+            CROSSOVER_OPERATOR_BLOCK: self.block_crossover,
+            CROSSOVER_OPERATOR_HALF_UNIFORM: self.half_uniform_crossover
         }
-        # Perform the selected crossover operation
-        return crossover_functions[self.crossoverOperator](parents_tuple)
 
-    def one_point_crossover(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
+    def crossover_controller(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
         """
-        Performs one-point crossover on the given parents.
+        Controls the crossover process based on the selected crossover operator.
 
         Args:
             parents_tuple (Tuple[Individual, Individual]): A tuple containing two parent individuals.
@@ -317,137 +589,399 @@ class Population:
         Returns:
             List[Individual]: A list of generated children.
         """
-        # Extract solutions from parents
-        parents_solution_tuple = (parents_tuple[0]._solution, parents_tuple[1]._solution)
+        operator_name = CROSSOVER_OPERATOR_NAMES[self.crossoverOperator]
         if self.full_debug == FULL_DEBUG:
-            logger.info("Before One-Point Crossover")
+            logger.info(f"Before {operator_name} Crossover")
             logger.info(f"p1: {parents_tuple[0].solution_as_string()}")
             logger.info(f"p2: {parents_tuple[1].solution_as_string()}")
 
-        if random.random() < self.probApplyCrossover:
-            # Select a crossover point and create children by swapping segments
-            crossover_index = random.randrange(0, self.string_size)
-            if self.full_debug == FULL_DEBUG:
-                logger.info(f"Crossover Point: {crossover_index}")
-            child_a = (parents_solution_tuple[0][0:crossover_index] + parents_solution_tuple[1][crossover_index::])
-            child_b = (parents_solution_tuple[1][0:crossover_index] + parents_solution_tuple[0][crossover_index::])
-            children = [Individual(self._fitnessFunction, child_a), Individual(self._fitnessFunction, child_b)]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After One-Point Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
+        if self.rng.random() < self.probApplyCrossover:
+            # Perform the selected crossover operation on the parents' solutions
+            child_a, child_b = self.crossover_operators[self.crossoverOperator](parents_tuple[0]._solution, parents_tuple[1]._solution)
+            # The child solutions are new buffers, so the children take ownership of them
+            children = [Individual(self._fitnessFunction, child_a, copy_solution=False),
+                        Individual(self._fitnessFunction, child_b, copy_solution=False)]
         else:
-            # If crossover is not applied, return copies of the parents
-            children = [(Individual(self._fitnessFunction, parents_tuple[0]._solution, parents_tuple[0]._solution_fitness)),
-                        (Individual(self._fitnessFunction, parents_tuple[1]._solution, parents_tuple[1]._solution_fitness))]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After One-Point Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
+            children = self.passthrough_parents(parents_tuple)
+        if self.full_debug == FULL_DEBUG:
+            logger.info(f"After {operator_name} Crossover")
+            logger.info(f"c1: {children[0].solution_as_string()}")
+            logger.info(f"c2: {children[1].solution_as_string()}\n")
+        return children
 
-    def two_point_crossover(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
+    def passthrough_parents(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
         """
-        Performs two-point crossover on the given parents.
+        Creates the children when crossover is not applied, shared by every crossover operator.
 
         Args:
             parents_tuple (Tuple[Individual, Individual]): A tuple containing two parent individuals.
 
         Returns:
-            List[Individual]: A list of generated children.
+            List[Individual]: Copy-on-write clones of the parents, keeping their evaluated fitness.
+        """
+        return [Individual.clone(parents_tuple[0]), Individual.clone(parents_tuple[1])]
+
+    def one_point_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
         """
-        # Extract solutions from parents
-        parents_solution_tuple = (parents_tuple[0]._solution, parents_tuple[1]._solution)
+        Performs one-point crossover on the given parent solutions.
+
+        Args:
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
+
+        Returns:
+            Tuple[bytearray, bytearray]: The solutions of the two children.
+        """
+        # Select a crossover point and create children by swapping segments
+        crossover_index = self.rng.randrange(0, self.string_size)
         if self.full_debug == FULL_DEBUG:
-            logger.info("Before Two-Point Crossover")
-            logger.info(f"p1: {parents_tuple[0].solution_as_string()}")
-            logger.info(f"p2: {parents_tuple[1].solution_as_string()}")
+            logger.info(f"Crossover Point: {crossover_index}")
+        # Copy each parent once and overwrite the swapped tail in place
+        child_a = solution_a.copy()
+        child_b = solution_b.copy()
+        child_a[crossover_index:] = solution_b[crossover_index:]
+        child_b[crossover_index:] = solution_a[crossover_index:]
+        return child_a, child_b
 
-        if random.random() < self.probApplyCrossover:
-            # Select two crossover points and create children by swapping segments
-            crossover_indexes = [random.randrange(0, self.string_size), random.randrange(0, self.string_size)]
-            crossover_indexes.sort()
-            if self.full_debug == FULL_DEBUG:
-                logger.info(("Crossover Points: " + ", ".join([str(index) for index in crossover_indexes])))
-            child_a = (parents_solution_tuple[0][0:crossover_indexes[0]] + parents_solution_tuple[1][crossover_indexes[0]:crossover_indexes[1]] + parents_solution_tuple[0][crossover_indexes[1]::])
-            child_b = (parents_solution_tuple[1][0:crossover_indexes[0]] + parents_solution_tuple[0][crossover_indexes[0]:crossover_indexes[1]] + parents_solution_tuple[1][crossover_indexes[1]::])
-            children = [Individual(self._fitnessFunction, child_a), Individual(self._fitnessFunction, child_b)]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After Two-Point Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
-        else:
-            # If crossover is not applied, return copies of the parents
-            children = [(Individual(self._fitnessFunction, parents_tuple[0]._solution, parents_tuple[0]._solution_fitness)),
-                        (Individual(self._fitnessFunction, parents_tuple[1]._solution, parents_tuple[1]._solution_fitness))]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After Two-Point Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
+    def two_point_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
+        """
+        Performs two-point crossover on the given parent solutions.
 
-    def uniform_crossover(self, parents_tuple: Tuple[Individual, Individual]) -> List[Individual]:
+        Args:
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
+
+        Returns:
+            Tuple[bytearray, bytearray]: The solutions of the two children.
+        """
+        # Select two crossover points and create children by swapping segments
+        crossover_indexes = [self.rng.randrange(0, self.string_size), self.rng.randrange(0, self.string_size)]
+        crossover_indexes.sort()
+        if self.full_debug == FULL_DEBUG:
+            logger.info(("Crossover Points: " + ", ".join([str(index) for index in crossover_indexes])))
+        # Copy each parent once and overwrite the swapped middle segment in place
+        child_a = solution_a.copy()
+        child_b = solution_b.copy()
+        child_a[crossover_indexes[0]:crossover_indexes[1]] = solution_b[crossover_indexes[0]:crossover_indexes[1]]
+        child_b[crossover_indexes[0]:crossover_indexes[1]] = solution_a[crossover_indexes[0]:crossover_indexes[1]]
+        return child_a, child_b
+
+    def k_point_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
         """
-        Performs uniform crossover on the given parents.
+        Performs k-point crossover on the given parent solutions, with k taken from crossoverPointsK.
 
         Args:
-            parents_tuple (Tuple[Individual, Individual]): A tuple containing two parent individuals.
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
 
         Returns:
-            List[Individual]: A list of generated children.
+            Tuple[bytearray, bytearray]: The solutions of the two children.
         """
-        # Extract solutions from parents
-        parents_solution_tuple = (parents_tuple[0].get_solution(), parents_tuple[1].get_solution())
+        # Select k distinct crossover points and swap every other segment
+        crossover_indexes = sorted(self.rng.sample(range(1, self.string_size), min(self.crossover_points_k, self.string_size - 1)))
         if self.full_debug == FULL_DEBUG:
-            logger.info("Before Uniform Crossover")
-            logger.info(f"p1: {parents_tuple[0].solution_as_string()}")
-            logger.info(f"p2: {parents_tuple[1].solution_as_string()}")
+            logger.info(("Crossover Points: " + ", ".join([str(index) for index in crossover_indexes])))
+        # Copy each parent once and overwrite every other segment in place
+        child_a = solution_a.copy()
+        child_b = solution_b.copy()
+        segment_bounds = crossover_indexes + [self.string_size]
+        for segment_start, segment_end in zip(segment_bounds[0::2], segment_bounds[1::2]):
+            child_a[segment_start:segment_end] = solution_b[segment_start:segment_end]
+            child_b[segment_start:segment_end] = solution_a[segment_start:segment_end]
+        return child_a, child_b
+
+    def block_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
+        """
+        Performs block-aligned uniform crossover on the given parent solutions.
+        Whole blocks of crossoverBlockSize bits are taken from one parent or the other,
+        so the trap partitions are never cut.
 
-        if random.random() < self.probApplyCrossover:
-            # Create children by randomly selecting genes from each parent
-            res = [(i, i ^ 1) for i in (random.choice([0, 1]) for i in range(self.string_size))]
-            child_a = [parents_solution_tuple[parent[0]][index] for index, parent in enumerate(res)]
-            child_b = [parents_solution_tuple[parent[1]][index] for index, parent in enumerate(res)]
-            children = [Individual(self._fitnessFunction, child_a), Individual(self._fitnessFunction, child_b)]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After Uniform Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
-        else:
-            # If crossover is not applied, return copies of the parents
-            children = [(Individual(self._fitnessFunction, parents_tuple[0].get_solution(), parents_tuple[0].get_solution_fitness())),
-                        (Individual(self._fitnessFunction, parents_tuple[1].get_solution(), parents_tuple[1].get_solution_fitness()))]
-            if self.full_debug == FULL_DEBUG:
-                logger.info("After Uniform Crossover")
-                logger.info(f"c1: {children[0].solution_as_string()}")
-                logger.info(f"c2: {children[1].solution_as_string()}\n")
-            return children
+        Args:
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
+
+        Returns:
+            Tuple[bytearray, bytearray]: The solutions of the two children.
+        """
+        block_size = self.crossover_block_size
+        mask = self.rng.random_bits(-(-self.string_size // block_size))
+        if self.full_debug == FULL_DEBUG:
+            logger.info(f"Block Mask: {','.join(str(bit) for bit in mask)}")
+        # Copy each parent once and overwrite the swapped blocks in place
+        child_a = solution_a.copy()
+        child_b = solution_b.copy()
+        for block, bit in enumerate(mask):
+            if bit:
+                block_start = block * block_size
+                child_a[block_start:block_start + block_size] = solution_b[block_start:block_start + block_size]
+                child_b[block_start:block_start + block_size] = solution_a[block_start:block_start + block_size]
+        return child_a, child_b
+
+    def uniform_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
+        """
+        Performs uniform crossover on the given parent solutions.
+
+        Args:
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
+
+        Returns:
+            Tuple[bytearray, bytearray]: The solutions of the two children.
+        """
+        # Create children by randomly selecting genes from each parent using one random bit mask
+        mask = self.rng.random_bits(self.string_size)
+        child_a = bytearray([gene_b if bit else gene_a for gene_a, gene_b, bit in zip(solution_a, solution_b, mask)])
+        child_b = bytearray([gene_a if bit else gene_b for gene_a, gene_b, bit in zip(solution_a, solution_b, mask)])
+        return child_a, child_b
+
+    def half_uniform_crossover(self, solution_a: bytearray, solution_b: bytearray) -> Tuple[bytearray, bytearray]:
+        """
+        Performs half-uniform crossover (HUX) on the given parent solutions.
+        Exactly half of the bits where the parents differ are swapped.
+
+        Args:
+            solution_a (bytearray): The first parent's solution.
+            solution_b (bytearray): The second parent's solution.
+
+        Returns:
+            Tuple[bytearray, bytearray]: The solutions of the two children.
+        """
+        differing_indexes = [index for index, (gene_a, gene_b) in enumerate(zip(solution_a, solution_b)) if gene_a != gene_b]
+        swap_indexes = self.rng.sample(differing_indexes, len(differing_indexes) // 2)
+        if self.full_debug == FULL_DEBUG:
+            logger.info(("Swapped Indexes: " + ", ".join([str(index) for index in sorted(swap_indexes)])))
+        child_a = solution_a.copy()
+        child_b = solution_b.copy()
+        for index in swap_indexes:
+            child_a[index] = solution_b[index]
+            child_b[index] = solution_a[index]
+        return child_a, child_b
+
+    def create_dedup_replacement(self, duplicate: Individual) -> Individual:
+        """
+        Creates the individual that replaces a duplicate genome, based on the dedup policy.
+
+        Args:
+            duplicate (Individual): The duplicate individual to replace.
+
+        Returns:
+            Individual: A mutated copy of the duplicate or a new random individual.
+        """
+        if self.dedup_policy == DEDUP_POLICY_RANDOM:
+            return self.initialize_random_individual(self.string_size)
+        # Flip a single random bit so the replacement stays close to the duplicate
+        replacement = Individual.clone(duplicate)
+        replacement.mutate_solution([self.rng.randrange(self.string_size)])
+        return replacement
+
+    def remove_duplicate_individuals(self) -> None:
+        """
+        Replaces duplicate genomes in the current generation, keeping the first copy of each genome.
+        Duplicates are found by hashing each genome once, and the duplicate ratio is saved in duplicate_ratio.
+        """
+        seen_solutions = set()
+        duplicates = 0
+        for index, individual in enumerate(self.current_generation):
+            solution_key = bytes(individual.get_solution())
+            if solution_key in seen_solutions:
+                duplicates += 1
+                # Retry a few times in case the replacement is itself a duplicate
+                for attempt in range(DEDUP_MAX_ATTEMPTS):
+                    individual = self.create_dedup_replacement(individual)
+                    solution_key = bytes(individual.get_solution())
+                    if solution_key not in seen_solutions:
+                        break
+                self.current_generation[index] = individual
+                if self.full_debug == FULL_DEBUG:
+                    logger.info(f"Replaced duplicate at index {index}: {individual.solution_as_string()}")
+            seen_solutions.add(solution_key)
+        self.duplicate_ratio = duplicates / len(self.current_generation)
+
+    def prescreen_offspring(self, count: int) -> List[Individual]:
+        """
+        Generates count / surrogateFraction candidate children, ranks them with the surrogate model and
+        keeps the best count of them. Only the kept children are evaluated, and their true fitness trains the model.
+        Unchanged copies of a parent keep its true fitness, so only the first copy of each genome is ranked;
+        the other copies only fill places no other candidate is left for.
+        The accuracy of the predictions and the evaluations skipped are recorded in surrogate_statistics.
+
+        Args:
+            count (int): The number of children to keep.
+
+        Returns:
+            List[Individual]: The kept children, in the order they were generated.
+        """
+        pairs = math.ceil(count / (2 * self.surrogate_fraction))
+        candidates = [child for pair in map(self.tournament_selection, range(pairs)) for child in pair]
+        # Children that were not varied keep their parent's true fitness
+        scores = [candidate.get_solution_fitness() if candidate.fitness_evaluated
+                  else self.surrogate.predict(candidate.get_solution()) for candidate in candidates]
+        ranked = []
+        spare_copies = []
+        copied_solutions = set()
+        for index, candidate in enumerate(candidates):
+            if candidate.fitness_evaluated:
+                solution_key = bytes(candidate.get_solution())
+                if solution_key in copied_solutions:
+                    spare_copies.append(index)
+                    continue
+                copied_solutions.add(solution_key)
+            ranked.append(index)
+        kept = heapq.nlargest(count, ranked, key=scores.__getitem__)
+        kept = sorted(kept + spare_copies[:count - len(kept)])
+        evaluated = [index for index in kept if not candidates[index].fitness_evaluated]
+        Individual.evaluate_many(candidates[index] for index in evaluated)
+        for index in evaluated:
+            self.surrogate.train(candidates[index].get_solution(), candidates[index].get_solution_fitness())
+        predictions = [scores[index] for index in evaluated]
+        fitness_values = [candidates[index].get_solution_fitness() for index in evaluated]
+        # The statistics module is slow to import and only surrogate runs need it
+        import statistics
+        try:
+            accuracy = statistics.correlation(predictions, fitness_values)
+        except statistics.StatisticsError:
+            # Fewer than two evaluations, or constant predictions or fitness values
+            accuracy = None
+        unevaluated = sum(1 for candidate in candidates if not candidate.fitness_evaluated)
+        self.surrogate_statistics = {
+            "candidates": len(candidates),
+            "evaluated": len(evaluated),
+            "skipped": unevaluated,
+            "accuracy": accuracy,
+            "meanAbsoluteError": (sum(abs(prediction - fitness) for prediction, fitness in zip(predictions, fitness_values))
+                                  / len(evaluated) if evaluated else None)
+        }
+        if self.full_debug == FULL_DEBUG:
+            logger.info(f"Surrogate kept {len(kept)} of {len(candidates)} candidates, evaluating {len(evaluated)}")
+        return [candidates[index] for index in kept]
 
     def replace_current_population(self) -> None:
         """
         Replaces the current generation with the next generation.
         """
-        # Replace the current generation with the next generation
-        self.current_generation = []
-        self.current_generation = copy.deepcopy(self.next_generation)
+        # Replace the current generation with the next generation.
+        # The next generation only holds new or copy-on-write individuals, so no copy is needed.
+        self.current_generation = self.next_generation
         self.next_generation = []
 
+    def select_elites(self, count: int) -> List[Individual]:
+        """
+        Selects the best individuals of the current generation by partial sort, without sorting the whole generation.
+
+        Args:
+            count (int): The number of elites.
+
+        Returns:
+            List[Individual]: Copy-on-write clones of the elites, best first.
+        """
+        return [Individual.clone(elite) for elite in heapq.nlargest(count, self.current_generation,
+                                                                    key=attrgetter('solution_fitness'))]
+
+    def breed_children(self, count: int) -> List[Individual]:
+        """
+        Creates children by tournament selection, crossover and mutation, pre-screened by the surrogate model if there is one.
+
+        Args:
+            count (int): The number of children.
+
+        Returns:
+            List[Individual]: The children, in the order they were created.
+        """
+        if self.surrogate is not None:
+            return self.prescreen_offspring(count)
+        # Children come in pairs; the second child of an odd last pair is dropped
+        offspring = chain.from_iterable(map(self.tournament_selection, range((count + 1) // 2)))
+        return list(islice(offspring, count))
+
+    def offspring_count(self) -> int:
+        """
+        Returns the number of children bred by the (mu+lambda) and (mu,lambda) replacement strategies.
+
+        Returns:
+            int: offspringRatio times the population size, and at least the population size for (mu,lambda).
+        """
+        count = max(1, round(self.population_size * self.offspring_ratio))
+        if self.replacement_strategy == REPLACEMENT_COMMA:
+            return max(count, self.population_size)
+        return count
+
+    def genome_distance_keys(self, individuals: List[Individual]) -> List[Any]:
+        """
+        Converts genomes into the keys compared by genome_distance, once per generation.
+
+        Args:
+            individuals (List[Individual]): The individuals.
+
+        Returns:
+            List[int]: The genomes packed into integers.
+        """
+        return [solution_as_integer(individual.get_solution()) for individual in individuals]
+
+    def genome_distance(self, key_a: Any, key_b: Any) -> int:
+        """
+        Measures how different two genomes are.
+
+        Args:
+            key_a (int): The key of the first genome.
+            key_b (int): The key of the second genome.
+
+        Returns:
+            int: The Hamming distance between the genomes.
+        """
+        return (key_a ^ key_b).bit_count()
+
+    def restricted_tournament_replacement(self, children: List[Individual]) -> List[Individual]:
+        """
+        Inserts each child into a copy of the current generation by restricted tournament replacement:
+        the child competes with the most similar of rtrWindowSize random individuals and replaces it if fitter.
+        Similar genomes compete with each other, so different niches survive side by side.
+
+        Args:
+            children (List[Individual]): The children to insert.
+
+        Returns:
+            List[Individual]: The next generation.
+        """
+        next_generation = self.current_generation[:]
+        keys = self.genome_distance_keys(next_generation)
+        child_keys = self.genome_distance_keys(children)
+        size = len(next_generation)
+        window_size = self.rtr_window_size
+        if window_size == RTR_WINDOW_AUTOMATIC:
+            window_size = min(size, self.string_size)
+        window_size = min(size, window_size)
+        for child, child_key in zip(children, child_keys):
+            window = self.rng.sample(range(size), window_size)
+            closest = min(window, key=lambda index: self.genome_distance(child_key, keys[index]))
+            if child.get_solution_fitness() > next_generation[closest].get_solution_fitness():
+                next_generation[closest] = child
+                keys[closest] = child_key
+        return next_generation
+
     def select_mating_parents(self) -> None:
         """
-        Selects mating parents and generates the next generation.
-        """
-        # Preserve the best individual from the current generation
-        best_individual_data = self.get_best_fitness()
-        best_individual = (Individual(self._fitnessFunction, best_individual_data["solution"], best_individual_data["fitness"]))
-        if self.selectionMethod == SELECTION_METHOD_TOURNAMENT:
-            # Generate new offspring using tournament selection
-            new_offspring = map(self.tournament_selection, (i for i in range(self.population_size // 2)))
-            for items in new_offspring:
-                for child in items:
-                    if len(self.next_generation) < self.population_size - 1:
-                        self.next_generation.append(child)
-            # Add the best individual to the next generation
-            self.next_generation.append(best_individual)
+        Selects mating parents and generates the next generation with the replacement strategy.
+        Generational replacement fills preallocated slots with the children followed by the eliteCount best parents.
+        """
+        elite_count = min(self.elite_count, self.population_size - 1)
+        # Preserve the best individuals from the current generation before duplicates are replaced
+        elites = self.select_elites(elite_count) if self.replacement_strategy == REPLACEMENT_GENERATIONAL else []
+        if self.dedup_policy != DEDUP_POLICY_OFF:
+            # Spend selection and evaluation on distinct genomes only
+            self.remove_duplicate_individuals()
+        if self.selectionMethod != SELECTION_METHOD_TOURNAMENT:
+            return
+        if self.replacement_strategy == REPLACEMENT_GENERATIONAL:
+            child_count = self.population_size - elite_count
+            self.next_generation = [None] * self.population_size
+            self.next_generation[:child_count] = self.breed_children(child_count)
+            self.next_generation[child_count:] = elites
+        elif self.replacement_strategy == REPLACEMENT_RESTRICTED_TOURNAMENT:
+            self.next_generation = self.restricted_tournament_replacement(self.breed_children(self.population_size))
+        else:
+            # (mu+lambda) keeps the best of parents and children, (mu,lambda) the best children only
+            pool = self.breed_children(self.offspring_count())
+            if self.replacement_strategy == REPLACEMENT_PLUS:
+                pool.extend(self.current_generation)
+            Individual.evaluate_many(pool)
+            self.next_generation = heapq.nlargest(self.population_size, pool, key=attrgetter('solution_fitness'))
@@ -0,0 +1,165 @@
+# Author: Daniel Glauber
+# File: population_dump.py
+# Description: Contains the population dump sink, which appends sampled generations to a compact binary file, and its reader.
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from typing import Any, Iterator, List, Tuple, Union
+from genome_storage import GenomeMatrix, FITNESS_ITEM_FORMAT, pack_solution
+
+# Constants for magic numbers and strings
+DUMP_MAGIC = b"SGAD"
+DUMP_VERSION = 1
+# Magic, version and compression
+DUMP_FILE_HEADER = struct.Struct("<4sBB")
+# Generation number and payload size
+DUMP_RECORD_HEADER = struct.Struct("<II")
+DUMP_COMPRESSION_NONE = 0
+DUMP_COMPRESSION_ZLIB = 1
+DUMP_COMPRESSION_LEVEL = 6
+# Snapshots waiting to be written, beyond which the run waits for the writer
+DUMP_QUEUE_SIZE = 8
+NO_POPULATION_DUMP_FILE = "none"
+
+
+def build_dump_payload(snapshot: Union[bytes, Tuple[List[bytes], List[int]]]) -> bytes:
+    """
+    Converts a population snapshot into the contents of a GenomeMatrix.
+
+    Args:
+        snapshot (bytes | Tuple[List[bytes], List[int]]): The contents of a matrix, or the solutions
+            and fitness values of a population of Individuals.
+
+    Returns:
+        bytes: The contents of a GenomeMatrix holding the population.
+    """
+    if isinstance(snapshot, bytes):
+        return snapshot
+    solutions, fitness_values = snapshot
+    string_size = len(solutions[0])
+    matrix = GenomeMatrix(bytearray(GenomeMatrix.required_size(len(solutions), string_size)), len(solutions), string_size)
+    matrix.genomes[:] = b"".join(pack_solution(solution) for solution in solutions)
+    matrix.fitness[:] = array(FITNESS_ITEM_FORMAT, fitness_values)
+    data = matrix.to_bytes()
+    matrix.release()
+    return data
+
+
+class PopulationDumpWriter:
+    """
+    Class PopulationDumpWriter appends every K-th generation to a binary dump file.
+    Each record is a bit-packed GenomeMatrix, optionally compressed with zlib.
+    The run only copies the generation; packing, compression and writing happen on a background thread.
+    """
+
+    def __init__(self, path: str, sample_every: int = 1, compression: int = DUMP_COMPRESSION_NONE) -> None:
+        """
+        Opens the dump file for appending, writing the file header if the file is new.
+
+        Args:
+            path (str): The path of the dump file.
+            sample_every (int, optional): Dump every K-th generation. Defaults to 1.
+            compression (int, optional): The compression of new records. Defaults to DUMP_COMPRESSION_NONE.
+        """
+        self.path = path
+        self.sample_every = max(1, sample_every)
+        self.compression = compression
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                magic, version, self.compression = DUMP_FILE_HEADER.unpack(file.read(DUMP_FILE_HEADER.size))
+            if magic != DUMP_MAGIC or version != DUMP_VERSION:
+                raise ValueError(f"{path} is not a population dump file")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "ab")
+            self.file.write(DUMP_FILE_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, self.compression))
+        self.queue = queue.Queue(maxsize=DUMP_QUEUE_SIZE)
+        self.error = None
+        self.thread = threading.Thread(target=self.write_records, name="population-dump", daemon=True)
+        self.thread.start()
+
+    def write_generation(self, generation_number: int, population: Any) -> None:
+        """
+        Queues the current generation of a population if the generation is sampled.
+
+        Args:
+            generation_number (int): The number of the generation.
+            population (Population): The population to dump.
+        """
+        if generation_number % self.sample_every == 0 and self.error is None:
+            self.queue.put((generation_number, population.snapshot()))
+
+    def write_records(self) -> None:
+        """
+        Writes queued generations to the file until close is called.
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            generation_number, snapshot = item
+            try:
+                payload = build_dump_payload(snapshot)
+                if self.compression == DUMP_COMPRESSION_ZLIB:
+                    payload = zlib.compress(payload, DUMP_COMPRESSION_LEVEL)
+                self.file.write(DUMP_RECORD_HEADER.pack(generation_number, len(payload)))
+                self.file.write(payload)
+            except (IOError, ValueError) as e:
+                self.error = e
+                print(f"Error writing population dump {self.path}: {e}")
+
+    def close(self) -> None:
+        """
+        Waits for the queued generations to be written and closes the file.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.file.close()
+
+
+def read_population_dump(path: str) -> Iterator[Tuple[int, GenomeMatrix]]:
+    """
+    Streams the generations of a dump file, one record at a time.
+
+    Args:
+        path (str): The path of the dump file.
+
+    Yields:
+        Tuple[int, GenomeMatrix]: The generation number and the population of the next record.
+    """
+    with open(path, "rb") as file:
+        magic, version, compression = DUMP_FILE_HEADER.unpack(file.read(DUMP_FILE_HEADER.size))
+        if magic != DUMP_MAGIC or version != DUMP_VERSION:
+            raise ValueError(f"{path} is not a population dump file")
+        while True:
+            header = file.read(DUMP_RECORD_HEADER.size)
+            if len(header) < DUMP_RECORD_HEADER.size:
+                return
+            generation_number, payload_size = DUMP_RECORD_HEADER.unpack(header)
+            payload = file.read(payload_size)
+            if len(payload) < payload_size:
+                # The run stopped while writing the last record
+                return
+            if compression == DUMP_COMPRESSION_ZLIB:
+                payload = zlib.decompress(payload)
+            yield generation_number, GenomeMatrix.from_bytes(payload)
+
+
+if __name__ == "__main__":
+    """
+    Prints a summary of every generation in a dump file: python3 population_dump.py dump.sgad
+    """
+    if len(sys.argv) != 2:
+        print("The command to read a dump is: python3 population_dump.py dump_file")
+        quit()
+    for generation_number, matrix in read_population_dump(sys.argv[1]):
+        fitness = matrix.fitness.tolist()
+        print(f"Generation {generation_number}: N = {matrix.population_size}, "
+              f"(B: {max(fitness)}, A: {sum(fitness) / len(fitness)}, W: {min(fitness)})")
@@ -0,0 +1,222 @@
+# Author: Daniel Glauber
+# File: rng.py
+# Description: Contains the random number streams used by the genetic algorithm.
+import math
+import random
+from typing import Any, List, Sequence, Tuple, Union
+
+# Constants for magic numbers and strings
+RNG_BACKEND_PYTHON = 0
+RNG_BACKEND_PCG64 = 1
+RNG_BACKEND_PHILOX = 2
+NUMPY_BIT_GENERATORS = {
+    RNG_BACKEND_PCG64: "PCG64",
+    RNG_BACKEND_PHILOX: "Philox"
+}
+NUMPY_BUFFER_SIZE = 4096
+# A stream id is an integer, or a tuple of integers for streams derived from another stream
+StreamId = Union[int, Tuple[int, ...]]
+# Translates the characters '0' and '1' to the bytes 0 and 1
+BIT_CHARACTERS_TO_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class PythonStream(random.Random):
+    """
+    Random stream backed by the Mersenne Twister from the random module.
+    Stream 0 is seeded like random.seed(seed), but mutation and crossover draw their numbers differently from
+    earlier versions of the program, so a settings file gives different results than before this change.
+    """
+
+    def __init__(self, seed: int, stream_id: StreamId = 0) -> None:
+        """
+        Initializes the stream.
+
+        Args:
+            seed (int): The seed shared by all streams of a run.
+            stream_id (StreamId, optional): The id of the worker or island using the stream. Defaults to 0.
+        """
+        self.base_seed = seed
+        self.stream_id = stream_id
+        # String seeds are hashed with SHA-512, which gives every stream id an independent state
+        super().__init__(seed if stream_id == 0 else f"{seed}/{stream_id}")
+
+    def spawn(self, stream_id: StreamId) -> "PythonStream":
+        """
+        Creates an independent stream for a worker or island.
+
+        Args:
+            stream_id (StreamId): The id of the new stream.
+
+        Returns:
+            PythonStream: A new stream that is reproducible from the seed and stream id.
+        """
+        return PythonStream(self.base_seed, stream_id)
+
+    def random_bits(self, length: int) -> bytes:
+        """
+        Draws random bits with a single call to the generator.
+        The bits are returned one per byte, so a whole population can be drawn at once and sliced into genomes.
+
+        Args:
+            length (int): The number of bits to draw.
+
+        Returns:
+            bytes: The random bits, each one a byte with the value 0 or 1.
+        """
+        if length == 0:
+            return b""
+        return format(self.getrandbits(length), f"0{length}b").encode().translate(BIT_CHARACTERS_TO_BYTES)
+
+    def bernoulli_indexes(self, length: int, probability: float) -> List[int]:
+        """
+        Returns the indexes of a sequence where a biased coin flip came up heads.
+        The gaps between heads are drawn from a geometric distribution, so the cost is
+        proportional to the number of heads instead of the length.
+
+        Args:
+            length (int): The length of the sequence.
+            probability (float): The probability of each index being chosen.
+
+        Returns:
+            List[int]: The chosen indexes in increasing order.
+        """
+        if probability <= 0.0:
+            return []
+        if probability >= 1.0:
+            return list(range(length))
+        log_miss = math.log1p(-probability)
+        indexes = []
+        index = int(math.log(1.0 - self.random()) / log_miss)
+        while index < length:
+            indexes.append(index)
+            index += 1 + int(math.log(1.0 - self.random()) / log_miss)
+        return indexes
+
+
+class NumpyStream:
+    """
+    Random stream backed by a NumPy bit generator (PCG64 or Philox).
+    Scalar draws are served from a buffer that is refilled in blocks, and bulk draws are vectorized.
+    """
+
+    def __init__(self, seed: int, stream_id: StreamId = 0, backend: int = RNG_BACKEND_PCG64) -> None:
+        """
+        Initializes the stream.
+
+        Args:
+            seed (int): The seed shared by all streams of a run.
+            stream_id (StreamId, optional): The id of the worker or island using the stream. Defaults to 0.
+            backend (int, optional): The bit generator to use. Defaults to RNG_BACKEND_PCG64.
+        """
+        import numpy
+        self._numpy = numpy
+        self.base_seed = seed
+        self.stream_id = stream_id
+        self.backend = backend
+        spawn_key = stream_id if isinstance(stream_id, tuple) else (stream_id,)
+        seed_sequence = numpy.random.SeedSequence(seed, spawn_key=spawn_key)
+        bit_generator = getattr(numpy.random, NUMPY_BIT_GENERATORS[backend])(seed_sequence)
+        self.generator = numpy.random.Generator(bit_generator)
+        self._buffer = []
+
+    def spawn(self, stream_id: StreamId) -> "NumpyStream":
+        """
+        Creates an independent stream for a worker or island.
+
+        Args:
+            stream_id (StreamId): The id of the new stream.
+
+        Returns:
+            NumpyStream: A new stream that is reproducible from the seed and stream id.
+        """
+        return NumpyStream(self.base_seed, stream_id, self.backend)
+
+    def random(self) -> float:
+        if not self._buffer:
+            # Reversed so that pop() hands the block out in the order it was drawn
+            self._buffer = self.generator.random(NUMPY_BUFFER_SIZE).tolist()[::-1]
+        return self._buffer.pop()
+
+    def randrange(self, start: int, stop: int = None) -> int:
+        if stop is None:
+            start, stop = 0, start
+        return start + int(self.random() * (stop - start))
+
+    def randint(self, a: int, b: int) -> int:
+        return self.randrange(a, b + 1)
+
+    def choice(self, seq: Sequence[Any]) -> Any:
+        return seq[int(self.random() * len(seq))]
+
+    def choices(self, population: Sequence[Any], k: int = 1) -> List[Any]:
+        size = len(population)
+        return [population[int(self.random() * size)] for i in range(k)]
+
+    def sample(self, population: Sequence[Any], k: int) -> List[Any]:
+        return [population[i] for i in self.generator.choice(len(population), k, replace=False).tolist()]
+
+    def shuffle(self, x: List[Any]) -> None:
+        order = self.generator.permutation(len(x)).tolist()
+        x[:] = [x[i] for i in order]
+
+    def gauss(self, mu: float = 0.0, sigma: float = 1.0) -> float:
+        # Box-Muller transform on two buffered uniform draws
+        radius = math.sqrt(-2.0 * math.log(1.0 - self.random()))
+        return mu + sigma * radius * math.cos(2.0 * math.pi * self.random())
+
+    def getrandbits(self, k: int) -> int:
+        return int.from_bytes(self.generator.bytes((k + 7) // 8), "little") >> (-k % 8)
+
+    def random_bits(self, length: int) -> bytes:
+        """
+        Draws random bits in one vectorized call.
+
+        Args:
+            length (int): The number of bits to draw.
+
+        Returns:
+            bytes: The random bits, each one a byte with the value 0 or 1.
+        """
+        return self.generator.integers(0, 2, size=length, dtype=self._numpy.uint8).tobytes()
+
+    def bernoulli_indexes(self, length: int, probability: float) -> List[int]:
+        """
+        Returns the indexes of a sequence where a biased coin flip came up heads.
+        The number of heads is drawn from a binomial distribution and their positions are chosen without replacement.
+
+        Args:
+            length (int): The length of the sequence.
+            probability (float): The probability of each index being chosen.
+
+        Returns:
+            List[int]: The chosen indexes in increasing order.
+        """
+        if probability <= 0.0:
+            return []
+        if probability >= 1.0:
+            return list(range(length))
+        count = int(self.generator.binomial(length, probability))
+        if count == 0:
+            return []
+        return sorted(self.generator.choice(length, count, replace=False).tolist())
+
+
+def create_stream(seed: int, stream_id: StreamId = 0, backend: int = RNG_BACKEND_PYTHON) -> Any:
+    """
+    Creates a random stream for the given backend.
+    Falls back to the Python backend when NumPy is not installed.
+
+    Args:
+        seed (int): The seed shared by all streams of a run.
+        stream_id (StreamId, optional): The id of the worker or island using the stream. Defaults to 0.
+        backend (int, optional): The backend to use. Defaults to RNG_BACKEND_PYTHON.
+
+    Returns:
+        PythonStream | NumpyStream: The new random stream.
+    """
+    if backend in NUMPY_BIT_GENERATORS:
+        try:
+            return NumpyStream(seed, stream_id, backend)
+        except ImportError:
+            print("NumPy is not installed, using the Python random number generator instead")
+    return PythonStream(seed, stream_id)
@@ -2,8 +2,9 @@
 # File: settings_loader.py
 # Description: Contains functions to load settings from a settings file and command line arguments.
 import re
+from os import stat
 from os.path import exists
-from typing import Any, List
+from typing import Any, Dict, List
 
 # Constants for magic numbers and strings
 DEFAULT_YES = "y"
@@ -24,11 +25,113 @@ DEFAULT_BISECTION = 0
 DEFAULT_BISECTION_THRESHOLD = 0.1
 DEFAULT_BISECTION_STARTING_POPULATION = 10
 DEFAULT_BISECTION_MAX_GENERATION = 50
+DEFAULT_STAGNATION_GENERATIONS = 0
+DEFAULT_DIVERSITY_THRESHOLD = 0.0
+DEFAULT_MAX_EVALUATIONS = 0
+DEFAULT_MAX_WALL_CLOCK_SECONDS = 0.0
+DEFAULT_PLATEAU_WINDOW = 0
+DEFAULT_PLATEAU_TOLERANCE = 0.01
+DEFAULT_DEDUP_POLICY = 0
+DEFAULT_RNG_BACKEND = 0
+DEFAULT_MUTATION_OPERATOR = 0
+DEFAULT_MUTATION_BITS_K = 1
+DEFAULT_MUTATION_BLOCK_SIZE = 4
+DEFAULT_CROSSOVER_POINTS_K = 3
+DEFAULT_CROSSOVER_BLOCK_SIZE = 4
+DEFAULT_SEED_POPULATION_FILE = "none"
+DEFAULT_POPULATION_STORAGE = 0
+DEFAULT_POPULATION_STORAGE_DIR = "none"
+DEFAULT_WORKER_PROCESSES = 0
+DEFAULT_POPULATION_DUMP_FILE = "none"
+DEFAULT_POPULATION_DUMP_EVERY = 1
+DEFAULT_POPULATION_DUMP_COMPRESSION = 0
+DEFAULT_OBJECTIVE_MODE = 0
+DEFAULT_GENOME_TYPE = 0
+DEFAULT_GENE_LOWER_BOUND = 0.0
+DEFAULT_GENE_UPPER_BOUND = 1.0
+DEFAULT_NUMERIC_MUTATION_OPERATOR = 0
+DEFAULT_NUMERIC_CROSSOVER_OPERATOR = 0
+DEFAULT_MUTATION_SIGMA = 0.1
+DEFAULT_DISTRIBUTION_INDEX = 20.0
+DEFAULT_BLEND_ALPHA = 0.5
+DEFAULT_CREEP_STEP = 1
+DEFAULT_PERMUTATION_CROSSOVER_OPERATOR = 0
+DEFAULT_PERMUTATION_MUTATION_OPERATOR = 0
+DEFAULT_DISTANCE_MATRIX_FILE = "none"
+DEFAULT_TARGET_TOUR_LENGTH = 0
+DEFAULT_SURROGATE_MODEL = 0
+DEFAULT_SURROGATE_FRACTION = 0.5
+DEFAULT_SURROGATE_NEIGHBOURS = 5
+DEFAULT_SURROGATE_ARCHIVE_SIZE = 1024
+DEFAULT_ISLAND_COUNT = 0
+DEFAULT_ISLAND_TRANSPORT = 0
+DEFAULT_MIGRATION_INTERVAL = 5
+DEFAULT_MIGRATION_SIZE = 2
+DEFAULT_ISLAND_MAX_GENERATIONS = 200
+DEFAULT_ISLAND_BASE_PORT = 47000
+DEFAULT_ISLAND_HOSTS = "none"
+DEFAULT_TUNE_CONFIGURATIONS = 27
+DEFAULT_TUNE_MIN_GENERATIONS = 10
+DEFAULT_TUNE_ETA = 3
+DEFAULT_TUNE_SEEDS = 3
+DEFAULT_TUNE_MAX_POPULATION = 1000
+DEFAULT_TUNE_WORKERS = 0
+DEFAULT_TUNE_OUTPUT_FILE = "tuned_settings.dat"
+DEFAULT_REPLACEMENT_STRATEGY = 0
+DEFAULT_ELITE_COUNT = 1
+DEFAULT_OFFSPRING_RATIO = 1.0
+DEFAULT_RTR_WINDOW_SIZE = 0
+DEFAULT_TRAP_BLOCK_SIZE = 4
+DEFAULT_TRAP_DECEPTION = 3
+DEFAULT_TRAP_LINKAGE = 0
+DEFAULT_EDA_MODEL = 0
+DEFAULT_CONTROL_FILE = "none"
+CROSSOVER_OPERATOR_K_POINT = 3
 
 SETTINGS_THAT_MUST_BE_ONE_OR_LESS = [
     "probApplyCrossover",
     "probApplyMutation",
-    "bisectionThreshold"
+    "bisectionThreshold",
+    "diversityThreshold"
+]
+SETTINGS_THAT_ARE_FRACTIONS = [
+    "surrogateFraction"
+]
+SETTINGS_THAT_ARE_STRINGS = [
+    "seedPopulationFile",
+    "populationStorageDir",
+    "populationDumpFile",
+    "distanceMatrixFile",
+    "islandHosts",
+    "tuneOutputFile",
+    "controlFile"
+]
+SETTINGS_THAT_ARE_DECIMALS = [
+    "maxWallClockSeconds",
+    "plateauTolerance",
+    "mutationSigma",
+    "distributionIndex",
+    "blendAlpha",
+    "offspringRatio"
+]
+SETTINGS_THAT_ARE_SIGNED_DECIMALS = [
+    "geneLowerBound",
+    "geneUpperBound"
+]
+SETTINGS_THAT_MUST_BE_ONE_OR_MORE = [
+    "mutationBitsK",
+    "mutationBlockSize",
+    "crossoverPointsK",
+    "crossoverBlockSize",
+    "creepStep",
+    "tournamentSizeK"
+]
+SETTINGS_THAT_MUST_BE_ZERO_OR_MORE = [
+    "eliteCount",
+    "rtrWindowSize",
+    "stagnationGenerations",
+    "maxEvaluations",
+    "plateauWindow"
 ]
 SETTINGS_THAT_MUST_BE_TWO_OR_MORE = [
     "populationSizeN",
@@ -36,7 +139,7 @@ SETTINGS_THAT_MUST_BE_TWO_OR_MORE = [
     "bisectionMaxGeneration"
 ]
 POSSIBLE_CROSSOVER_OPERATORS = [
-    0, 1, 2
+    0, 1, 2, 3, 4, 5
 ]
 POSSIBLE_FITNESS_EQUATIONS = [
     0, 1
@@ -44,10 +147,75 @@ POSSIBLE_FITNESS_EQUATIONS = [
 POSSIBLE_BISECTION_OPTIONS = [
     0, 1
 ]
+POSSIBLE_DEDUP_POLICIES = [
+    0, 1, 2
+]
+POSSIBLE_RNG_BACKENDS = [
+    0, 1, 2
+]
+POSSIBLE_MUTATION_OPERATORS = [
+    0, 1, 2
+]
+POSSIBLE_POPULATION_STORAGES = [
+    0, 1, 2
+]
+POSSIBLE_DUMP_COMPRESSIONS = [
+    0, 1
+]
+POSSIBLE_OBJECTIVE_MODES = [
+    0, 1
+]
+POSSIBLE_GENOME_TYPES = [
+    0, 1, 2, 3
+]
+POSSIBLE_PERMUTATION_OPERATORS = [
+    0, 1, 2
+]
+POSSIBLE_NUMERIC_MUTATION_OPERATORS = [
+    0, 1, 2
+]
+POSSIBLE_NUMERIC_CROSSOVER_OPERATORS = [
+    0, 1
+]
+POSSIBLE_SURROGATE_MODELS = [
+    0, 1, 2
+]
+POSSIBLE_ISLAND_TRANSPORTS = [
+    0, 1, 2
+]
+POSSIBLE_REPLACEMENT_STRATEGIES = [
+    0, 1, 2, 3
+]
+POSSIBLE_TRAP_BLOCK_SIZES = [
+    2, 3, 4, 5, 6, 7, 8
+]
+POSSIBLE_TRAP_LINKAGES = [
+    0, 1
+]
+POSSIBLE_EDA_MODELS = [
+    0, 1, 2, 3
+]
 POSSIBLE_SETTINGS_LOOKUP = {
     "bisection": POSSIBLE_BISECTION_OPTIONS,
     "crossoverOperator": POSSIBLE_CROSSOVER_OPERATORS,
     "fitnessFunction": POSSIBLE_FITNESS_EQUATIONS,
+    "dedupPolicy": POSSIBLE_DEDUP_POLICIES,
+    "rngBackend": POSSIBLE_RNG_BACKENDS,
+    "mutationOperator": POSSIBLE_MUTATION_OPERATORS,
+    "populationStorage": POSSIBLE_POPULATION_STORAGES,
+    "populationDumpCompression": POSSIBLE_DUMP_COMPRESSIONS,
+    "objectiveMode": POSSIBLE_OBJECTIVE_MODES,
+    "genomeType": POSSIBLE_GENOME_TYPES,
+    "numericMutationOperator": POSSIBLE_NUMERIC_MUTATION_OPERATORS,
+    "numericCrossoverOperator": POSSIBLE_NUMERIC_CROSSOVER_OPERATORS,
+    "permutationCrossoverOperator": POSSIBLE_PERMUTATION_OPERATORS,
+    "permutationMutationOperator": POSSIBLE_PERMUTATION_OPERATORS,
+    "surrogateModel": POSSIBLE_SURROGATE_MODELS,
+    "islandTransport": POSSIBLE_ISLAND_TRANSPORTS,
+    "replacementStrategy": POSSIBLE_REPLACEMENT_STRATEGIES,
+    "trapBlockSize": POSSIBLE_TRAP_BLOCK_SIZES,
+    "trapLinkage": POSSIBLE_TRAP_LINKAGES,
+    "edaModel": POSSIBLE_EDA_MODELS
 }
 DEFAULT_SETTINGS = {
     "randSeed": DEFAULT_RAND_SEED,
@@ -64,11 +232,74 @@ DEFAULT_SETTINGS = {
     "bisection": DEFAULT_BISECTION,
     "bisectionThreshold": DEFAULT_BISECTION_THRESHOLD,
     "bisectionStartingPopulation": DEFAULT_BISECTION_STARTING_POPULATION,
-    "bisectionMaxGeneration": DEFAULT_BISECTION_MAX_GENERATION
+    "bisectionMaxGeneration": DEFAULT_BISECTION_MAX_GENERATION,
+    "stagnationGenerations": DEFAULT_STAGNATION_GENERATIONS,
+    "diversityThreshold": DEFAULT_DIVERSITY_THRESHOLD,
+    "maxEvaluations": DEFAULT_MAX_EVALUATIONS,
+    "maxWallClockSeconds": DEFAULT_MAX_WALL_CLOCK_SECONDS,
+    "plateauWindow": DEFAULT_PLATEAU_WINDOW,
+    "plateauTolerance": DEFAULT_PLATEAU_TOLERANCE,
+    "dedupPolicy": DEFAULT_DEDUP_POLICY,
+    "rngBackend": DEFAULT_RNG_BACKEND,
+    "mutationOperator": DEFAULT_MUTATION_OPERATOR,
+    "mutationBitsK": DEFAULT_MUTATION_BITS_K,
+    "mutationBlockSize": DEFAULT_MUTATION_BLOCK_SIZE,
+    "crossoverPointsK": DEFAULT_CROSSOVER_POINTS_K,
+    "crossoverBlockSize": DEFAULT_CROSSOVER_BLOCK_SIZE,
+    "seedPopulationFile": DEFAULT_SEED_POPULATION_FILE,
+    "populationStorage": DEFAULT_POPULATION_STORAGE,
+    "populationStorageDir": DEFAULT_POPULATION_STORAGE_DIR,
+    "workerProcesses": DEFAULT_WORKER_PROCESSES,
+    "populationDumpFile": DEFAULT_POPULATION_DUMP_FILE,
+    "populationDumpEvery": DEFAULT_POPULATION_DUMP_EVERY,
+    "populationDumpCompression": DEFAULT_POPULATION_DUMP_COMPRESSION,
+    "objectiveMode": DEFAULT_OBJECTIVE_MODE,
+    "genomeType": DEFAULT_GENOME_TYPE,
+    "geneLowerBound": DEFAULT_GENE_LOWER_BOUND,
+    "geneUpperBound": DEFAULT_GENE_UPPER_BOUND,
+    "numericMutationOperator": DEFAULT_NUMERIC_MUTATION_OPERATOR,
+    "numericCrossoverOperator": DEFAULT_NUMERIC_CROSSOVER_OPERATOR,
+    "mutationSigma": DEFAULT_MUTATION_SIGMA,
+    "distributionIndex": DEFAULT_DISTRIBUTION_INDEX,
+    "blendAlpha": DEFAULT_BLEND_ALPHA,
+    "creepStep": DEFAULT_CREEP_STEP,
+    "permutationCrossoverOperator": DEFAULT_PERMUTATION_CROSSOVER_OPERATOR,
+    "permutationMutationOperator": DEFAULT_PERMUTATION_MUTATION_OPERATOR,
+    "distanceMatrixFile": DEFAULT_DISTANCE_MATRIX_FILE,
+    "targetTourLength": DEFAULT_TARGET_TOUR_LENGTH,
+    "surrogateModel": DEFAULT_SURROGATE_MODEL,
+    "surrogateFraction": DEFAULT_SURROGATE_FRACTION,
+    "surrogateNeighbours": DEFAULT_SURROGATE_NEIGHBOURS,
+    "surrogateArchiveSize": DEFAULT_SURROGATE_ARCHIVE_SIZE,
+    "islandCount": DEFAULT_ISLAND_COUNT,
+    "islandTransport": DEFAULT_ISLAND_TRANSPORT,
+    "migrationInterval": DEFAULT_MIGRATION_INTERVAL,
+    "migrationSize": DEFAULT_MIGRATION_SIZE,
+    "islandMaxGenerations": DEFAULT_ISLAND_MAX_GENERATIONS,
+    "islandBasePort": DEFAULT_ISLAND_BASE_PORT,
+    "islandHosts": DEFAULT_ISLAND_HOSTS,
+    "tuneConfigurations": DEFAULT_TUNE_CONFIGURATIONS,
+    "tuneMinGenerations": DEFAULT_TUNE_MIN_GENERATIONS,
+    "tuneEta": DEFAULT_TUNE_ETA,
+    "tuneSeeds": DEFAULT_TUNE_SEEDS,
+    "tuneMaxPopulation": DEFAULT_TUNE_MAX_POPULATION,
+    "tuneWorkers": DEFAULT_TUNE_WORKERS,
+    "tuneOutputFile": DEFAULT_TUNE_OUTPUT_FILE,
+    "replacementStrategy": DEFAULT_REPLACEMENT_STRATEGY,
+    "eliteCount": DEFAULT_ELITE_COUNT,
+    "offspringRatio": DEFAULT_OFFSPRING_RATIO,
+    "rtrWindowSize": DEFAULT_RTR_WINDOW_SIZE,
+    "trapBlockSize": DEFAULT_TRAP_BLOCK_SIZE,
+    "trapDeception": DEFAULT_TRAP_DECEPTION,
+    "trapLinkage": DEFAULT_TRAP_LINKAGE,
+    "edaModel": DEFAULT_EDA_MODEL,
+    "controlFile": DEFAULT_CONTROL_FILE
 }
 
 ga_settings = {}
 user_settings_file = DEFAULT_SETTINGS_FILE
+# Settings parsed from each file, with the modification time and size of the file when it was parsed
+parsed_settings_cache = {}
 
 def display_help_message() -> None:
     """
@@ -144,14 +375,25 @@ def parse_settings_file(settings_file: str, default_settings_file: str = DEFAULT
         settings_file (str): The path to the settings file.
         default_settings_file (str, optional): The path to the default settings file. Defaults to DEFAULT_SETTINGS_FILE.
     """
-    global ga_settings
+    try:
+        file_status = stat(settings_file)
+        cache_key = (file_status.st_mtime_ns, file_status.st_size)
+    except OSError:
+        cache_key = None
+    cached = parsed_settings_cache.get(settings_file)
+    if cache_key is not None and cached is not None and cached[0] == cache_key:
+        # The file has not changed since it was last parsed without errors
+        for key, value in cached[1].items():
+            ga_settings.setdefault(key, value)
+        return
     default_settings_needs_fix = False
     is_default_file = settings_file == default_settings_file
     finished_parsing = False
-    saved_ga_settings = ga_settings.copy()  # Save current settings in case we need to revert
+    had_error = False
     while not finished_parsing:
+        # Settings read from this file, which only take effect where an earlier file has not set them
+        file_settings = {}
         if default_settings_needs_fix:
-            ga_settings = saved_ga_settings  # Revert to saved settings
             create_default_settings_file(default_settings_file)  # Create default settings file
             default_settings_needs_fix = False
 
@@ -161,67 +403,16 @@ def parse_settings_file(settings_file: str, default_settings_file: str = DEFAULT
                     split_line = re.split(r'\s+', line)  # Split line by whitespace
                     if len(split_line) > 1:
                         setting_with_error = split_line[0]
-                        error_reason = ""
                         try:
-                            # Check if stringSizeN is divisible by 4 when fitnessFunction is 1
-                            if "stringSizeN" in ga_settings and "fitnessFunction" in ga_settings:
-                                if (ga_settings["fitnessFunction"] == 1 and
-                                        ga_settings["stringSizeN"] % 4 != 0):
-                                    setting_with_error = "stringSizeN"
-                                    error_reason = ("evenly divisible by 4 " +
-                                                    "when using fitnessFunction 1")
-                                    raise ValueError(error_reason)
-                            # Validate settings that must be one or less
-                            if split_line[0] in SETTINGS_THAT_MUST_BE_ONE_OR_LESS:
-                                error_reason = (
-                                    ("a decimal number that is" +
-                                     " less than or equal 1.0"))
-                                float_value = float(split_line[1])
-                                if float_value > 1.0:
-                                    raise ValueError(("Value cannot be" +
-                                                      " greater than 1.0"))
-                                if split_line[0] not in ga_settings:
-                                    ga_settings[split_line[0]] = float_value
-                            # Validate settings that have specific possible values
-                            elif split_line[0] in POSSIBLE_SETTINGS_LOOKUP:
-                                integer = int(split_line[1])
-                                if integer not in POSSIBLE_SETTINGS_LOOKUP[split_line[0]]:
-                                    error_reason = ("one of the following values: " +
-                                                    ", ".join([str(x)
-                                                               for x in
-                                                               POSSIBLE_SETTINGS_LOOKUP[split_line[0]]]))
-                                    raise ValueError(error_reason)
-                                elif (split_line[0] == "fitnessFunction" and
-                                      integer == 1):
-                                    if "stringSizeN" in ga_settings:
-                                        if ga_settings["stringSizeN"] % 4 != 0:
-                                            setting_with_error = "stringSizeN"
-                                            error_reason = ("evenly divisible by 4 " +
-                                                            "when using fitnessFunction 1")
-                                            raise ValueError(error_reason)
-                                        elif split_line[0] not in ga_settings:
-                                            ga_settings[split_line[0]] = integer
-                                elif split_line[0] not in ga_settings:
-                                    ga_settings[split_line[0]] = integer
-                            # Validate settings that must be two or more
-                            elif split_line[0] in SETTINGS_THAT_MUST_BE_TWO_OR_MORE:
-                                error_reason = ("an integer that is" +
-                                                " greater than or equal 2")
-                                integer = int(split_line[1])
-                                if integer < 2:
-                                    raise ValueError(("Value cannot be" +
-                                                      " less than 2"))
-                                if split_line[0] not in ga_settings:
-                                    ga_settings[split_line[0]] = integer
-                            else:
-                                error_reason = "an integer"
-                                integer = int(split_line[1])
-                                if split_line[0] not in ga_settings:
-                                    ga_settings[split_line[0]] = integer
+                            # Settings that are not known are read as integers instead of rejected
+                            value = convert_setting(split_line[0], split_line[1], allow_unknown=True)
+                            if split_line[0] not in file_settings:
+                                file_settings[split_line[0]] = value
                         except ValueError as ve:
+                            had_error = True
                             if not is_default_file:
                                 print(f"Error parsing settings file {settings_file}")
-                                print(f"The value for {setting_with_error} must be {error_reason}")
+                                print(ve)
                                 user_question = (f"Do you want to continue with the default value for "
                                                  f"{setting_with_error} from {default_settings_file}?")
                                 ask_user_continue_question(user_question)
@@ -231,6 +422,7 @@ def parse_settings_file(settings_file: str, default_settings_file: str = DEFAULT
                                 break
         except FileNotFoundError:
             print(f"Settings file {settings_file} not found.")
+            had_error = True
             if not is_default_file:
                 user_question = (f"Do you want to use the default settings from {default_settings_file} instead?")
                 ask_user_continue_question(user_question)
@@ -243,6 +435,10 @@ def parse_settings_file(settings_file: str, default_settings_file: str = DEFAULT
 
         if not default_settings_needs_fix:
             finished_parsing = True
+    for key, value in file_settings.items():
+        ga_settings.setdefault(key, value)
+    if cache_key is not None and not had_error:
+        parsed_settings_cache[settings_file] = (cache_key, file_settings)
 
 def load_settings(argv: List[str], default_settings_file: str = DEFAULT_SETTINGS_FILE) -> None:
     """
@@ -268,8 +464,7 @@ def load_settings(argv: List[str], default_settings_file: str = DEFAULT_SETTINGS
 
         if argv[-1] not in ["sga.py", "-h", "-g", "-G"]:
             user_settings_file = argv[-1]
-    if not exists(default_settings_file):
-        create_default_settings_file(default_settings_file)
+    using_default_file = user_settings_file == default_settings_file
     if user_settings_file != default_settings_file:
         if exists(user_settings_file):
             parse_settings_file(user_settings_file, default_settings_file)
@@ -277,4 +472,150 @@ def load_settings(argv: List[str], default_settings_file: str = DEFAULT_SETTINGS
             print(f"Could not find settings file {user_settings_file}")
             user_question = (f"Do you want to use the default settings from {default_settings_file} instead?")
             ask_user_continue_question(user_question)
-    parse_settings_file(default_settings_file, default_settings_file)
+            using_default_file = True
+    # A run with its own settings file does not need the default file, since missing settings fall back to
+    # DEFAULT_SETTINGS below, so the default file is only written when the run uses it
+    if exists(default_settings_file):
+        parse_settings_file(default_settings_file, default_settings_file)
+    elif using_default_file:
+        create_default_settings_file(default_settings_file)
+        parse_settings_file(default_settings_file, default_settings_file)
+    # Settings added after the default settings file was created fall back to their default value
+    for key, value in DEFAULT_SETTINGS.items():
+        if key not in ga_settings:
+            ga_settings[key] = value
+    try:
+        check_trap_settings(ga_settings)
+        check_string_size_limits(ga_settings)
+    except ValueError as ve:
+        print(f"Error parsing settings file {user_settings_file}")
+        print(ve)
+        print("Stopped")
+        quit()
+
+
+def check_trap_settings(settings: Dict[str, Any]) -> None:
+    """
+    Checks that the trap blocks fit the genome. This depends on several settings, so it runs once they are all read.
+
+    Args:
+        settings (Dict[str, Any]): The complete settings.
+
+    Raises:
+        ValueError: If stringSizeN is not a multiple of trapBlockSize or trapDeception is out of range.
+    """
+    if settings["fitnessFunction"] != 1:
+        return
+    if settings["stringSizeN"] % settings["trapBlockSize"] != 0:
+        raise ValueError(f"The value for stringSizeN must be evenly divisible by trapBlockSize ({settings['trapBlockSize']}) "
+                         "when using fitnessFunction 1")
+    if not 0 <= settings["trapDeception"] < settings["trapBlockSize"]:
+        raise ValueError("The value for trapDeception must be at least 0 and less than trapBlockSize")
+
+
+def check_string_size_limits(settings: Dict[str, Any]) -> None:
+    """
+    Checks the settings that count positions of a genome against its size, once all settings are read.
+
+    Args:
+        settings (Dict[str, Any]): The complete settings, or the current settings with a changed value.
+
+    Raises:
+        ValueError: If mutationBitsK is larger than stringSizeN, or k-point crossover uses crossoverPointsK
+            that is not smaller than stringSizeN.
+    """
+    if settings["mutationBitsK"] > settings["stringSizeN"]:
+        raise ValueError(f"The value for mutationBitsK must be at most stringSizeN ({settings['stringSizeN']})")
+    # A genome of stringSizeN bits has stringSizeN - 1 places to cut it
+    if (settings["crossoverOperator"] == CROSSOVER_OPERATOR_K_POINT and
+            settings["crossoverPointsK"] > settings["stringSizeN"] - 1):
+        raise ValueError(f"The value for crossoverPointsK must be at most stringSizeN - 1 ({settings['stringSizeN'] - 1})")
+
+
+def convert_setting(key: str, value: Any, allow_unknown: bool = False) -> Any:
+    """
+    Converts a setting given as text or a number to the type it is stored as, and checks that the value is valid.
+    Settings files, the control file and the job server all read settings through this function.
+
+    Args:
+        key (str): The name of the setting.
+        value (Any): The value of the setting.
+        allow_unknown (bool, optional): Whether a setting that is not known is read as an integer instead of rejected.
+            Defaults to False.
+
+    Returns:
+        Any: The converted value.
+
+    Raises:
+        ValueError: If the setting is unknown or the value is not valid for it.
+    """
+    if key not in DEFAULT_SETTINGS and not allow_unknown:
+        raise ValueError(f"Unknown setting {key}")
+    text = str(value)
+    if key in SETTINGS_THAT_ARE_STRINGS:
+        return text
+    try:
+        if key in SETTINGS_THAT_ARE_FRACTIONS:
+            error_reason = "a decimal number that is greater than 0.0 and less than or equal 1.0"
+            converted = float(text)
+            valid = 0.0 < converted <= 1.0
+        elif key in SETTINGS_THAT_MUST_BE_ONE_OR_LESS:
+            error_reason = "a decimal number that is less than or equal 1.0"
+            converted = float(text)
+            valid = converted <= 1.0
+        elif key in SETTINGS_THAT_ARE_DECIMALS:
+            error_reason = "a decimal number that is greater than or equal 0.0"
+            converted = float(text)
+            valid = converted >= 0.0
+        elif key in SETTINGS_THAT_ARE_SIGNED_DECIMALS:
+            error_reason = "a decimal number"
+            converted = float(text)
+            valid = True
+        elif key in POSSIBLE_SETTINGS_LOOKUP:
+            error_reason = "one of the following values: " + ", ".join([str(x) for x in POSSIBLE_SETTINGS_LOOKUP[key]])
+            converted = int(text)
+            valid = converted in POSSIBLE_SETTINGS_LOOKUP[key]
+        elif key in SETTINGS_THAT_MUST_BE_ZERO_OR_MORE:
+            error_reason = "an integer that is greater than or equal 0"
+            converted = int(text)
+            valid = converted >= 0
+        elif key in SETTINGS_THAT_MUST_BE_ONE_OR_MORE:
+            error_reason = "an integer that is greater than or equal 1"
+            converted = int(text)
+            valid = converted >= 1
+        elif key in SETTINGS_THAT_MUST_BE_TWO_OR_MORE:
+            error_reason = "an integer that is greater than or equal 2"
+            converted = int(text)
+            valid = converted >= 2
+        else:
+            error_reason = "an integer"
+            converted = int(text)
+            valid = True
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"The value for {key} must be {error_reason}")
+    return converted
+
+
+def build_settings(base_settings: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds a complete set of settings from already loaded settings and overrides, without reading any file.
+
+    Args:
+        base_settings (Dict[str, Any]): The loaded settings.
+        overrides (Dict[str, Any]): The settings to change, as text or numbers.
+
+    Returns:
+        Dict[str, Any]: The new settings.
+
+    Raises:
+        ValueError: If an override is not valid.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(base_settings)
+    for key, value in overrides.items():
+        settings[key] = convert_setting(key, value)
+    check_trap_settings(settings)
+    check_string_size_limits(settings)
+    return settings
@@ -2,7 +2,22 @@
 # File: sga.py
 # Description: This script runs the simple genetic algorithm (SGA) based on the settings provided.
 import sys
-from population import Population
+from population import (Population, REPLACEMENT_GENERATIONAL, REPLACEMENT_PLUS, REPLACEMENT_RESTRICTED_TOURNAMENT,
+                        DEDUP_POLICY_OFF, HOT_RELOADABLE_SETTINGS)
+from mapped_population import MappedPopulation
+from shared_population import SharedPopulation
+from nsga_population import NSGAPopulation
+from typed_population import TypedPopulation
+from typed_genome import GENOME_TYPE_BIT
+from permutation_population import PermutationPopulation
+from permutation_genome import GENOME_TYPE_PERMUTATION
+from eda_population import EDAPopulation, EDA_MODEL_OFF, EDA_MODEL_COMPACT
+from compact_population import CompactPopulation
+from individual import Individual
+from termination import TerminationController, ConvergenceCriterion, StagnationCriterion, STAGNATION_GENERATIONS, CRITERION_DISABLED
+from population_dump import PopulationDumpWriter, NO_POPULATION_DUMP_FILE
+from surrogate import SURROGATE_OFF
+from control import ControlChannel, NO_CONTROL_FILE, COMMAND_STOP, COMMAND_CHECKPOINT, COMMAND_STATS
 import settings_loader as sl
 import json
 import time
@@ -18,9 +33,31 @@ BISECTION_STARTING_POPULATION = "bisectionStartingPopulation"
 BISECTION_MAX_GENERATION = "bisectionMaxGeneration"
 LIMITED_DEBUG = "limitedDebug"
 POPULATION_SIZE_N = "populationSizeN"
+POPULATION_STORAGE = "populationStorage"
+POPULATION_STORAGE_MAPPED = 1
+POPULATION_STORAGE_SHARED = 2
+GENOME_TYPE = "genomeType"
+OBJECTIVE_MODE = "objectiveMode"
+OBJECTIVE_MODE_NSGA = 1
+POPULATION_DUMP_FILE = "populationDumpFile"
+POPULATION_DUMP_EVERY = "populationDumpEvery"
+POPULATION_DUMP_COMPRESSION = "populationDumpCompression"
+SURROGATE_MODEL = "surrogateModel"
+ISLAND_COUNT = "islandCount"
+ISLAND_TRANSPORT = "islandTransport"
+ISLAND_TRANSPORT_IN_PROCESS = 0
+REPLACEMENT_STRATEGY = "replacementStrategy"
+ELITE_COUNT = "eliteCount"
+DEDUP_POLICY = "dedupPolicy"
+EDA_MODEL = "edaModel"
+CONTROL_FILE = "controlFile"
 SUCCESS = "SUCCESS\n"
 FAILED = "FAILED\n"
 FAILURES_REMAINING_MSG = "Failures remaining before termination "
+# Replacement strategies that keep a parent unless a child beats it, so the average fitness never falls
+PARENT_KEEPING_REPLACEMENTS = (REPLACEMENT_PLUS, REPLACEMENT_RESTRICTED_TOURNAMENT)
+# Generations without a better best fitness after which such a run fails when stagnationGenerations is 0
+STUCK_RUN_STAGNATION_GENERATIONS = 50
 
 
 class SGAController:
@@ -34,7 +71,22 @@ class SGAController:
         """
         # Initialize variables and load settings
         self.saved_generation_data = []
-        self.population = Population()
+        if sl.get_setting(GENOME_TYPE) == GENOME_TYPE_PERMUTATION:
+            self.population = PermutationPopulation()
+        elif sl.get_setting(GENOME_TYPE) != GENOME_TYPE_BIT:
+            self.population = TypedPopulation()
+        elif sl.get_setting(EDA_MODEL) == EDA_MODEL_COMPACT:
+            self.population = CompactPopulation()
+        elif sl.get_setting(EDA_MODEL) != EDA_MODEL_OFF:
+            self.population = EDAPopulation()
+        elif sl.get_setting(OBJECTIVE_MODE) == OBJECTIVE_MODE_NSGA:
+            self.population = NSGAPopulation()
+        elif sl.get_setting(POPULATION_STORAGE) == POPULATION_STORAGE_MAPPED:
+            self.population = MappedPopulation()
+        elif sl.get_setting(POPULATION_STORAGE) == POPULATION_STORAGE_SHARED:
+            self.population = SharedPopulation()
+        else:
+            self.population = Population()
         self.terminate_on_failure = sl.get_setting(TERMINATE_ON_FAILURE) == 1
         self.failures_remaining = sl.get_setting(FAILURES_BEFORE_TERMINATION)
         self.string_size = sl.get_setting(STRING_SIZE_N)
@@ -48,6 +100,126 @@ class SGAController:
             BISECTION_MAX_GENERATION)
         self.limited_debug = sl.get_setting(LIMITED_DEBUG)
         self.terminate_run = False
+        self.termination = TerminationController()
+        if isinstance(self.population, (EDAPopulation, CompactPopulation)):
+            # A converged model samples the same genome forever
+            self.termination.criteria.append(ConvergenceCriterion())
+        elif isinstance(self.population, NSGAPopulation):
+            # Parents and children compete for survival, so the average fitness rarely falls
+            self.add_stuck_run_criteria()
+        elif isinstance(self.population, TypedPopulation):
+            # Once the genes agree, small mutations of a converged population rarely find anything better
+            self.add_stuck_run_criteria()
+        elif self.population.surrogate is not None:
+            # Only the most promising children are kept, so the average fitness rarely falls
+            self.add_stuck_run_criteria()
+        elif (sl.get_setting(REPLACEMENT_STRATEGY) in PARENT_KEEPING_REPLACEMENTS and
+              not isinstance(self.population, MappedPopulation)):
+            self.add_stuck_run_criteria()
+        self.declared_failure = False
+        self.population_dump = None
+        # Called with the data of every generation, so a caller such as the job server can stream it
+        self.generation_callback = None
+        self.succeeded = False
+        self.stop_requested = False
+        self.start_time = time.time()
+        self.control = None
+        if sl.get_setting(CONTROL_FILE) != NO_CONTROL_FILE:
+            self.control = ControlChannel(sl.get_setting(CONTROL_FILE))
+        if sl.get_setting(SURROGATE_MODEL) != SURROGATE_OFF and self.population.surrogate is None:
+            print("Surrogate pre-screening needs bit genomes in a single-objective, in-memory population, so surrogateModel is ignored")
+        if ((sl.get_setting(REPLACEMENT_STRATEGY) != REPLACEMENT_GENERATIONAL or sl.get_setting(ELITE_COUNT) != 1) and
+                isinstance(self.population, (MappedPopulation, NSGAPopulation))):
+            print("Multi-objective and file-backed populations keep their own replacement, so replacementStrategy and eliteCount are ignored")
+        if sl.get_setting(DEDUP_POLICY) != DEDUP_POLICY_OFF and isinstance(self.population, MappedPopulation):
+            print("File-backed populations do not remove duplicates, so dedupPolicy is ignored")
+        if isinstance(self.population, (EDAPopulation, CompactPopulation)) and (sl.get_setting(OBJECTIVE_MODE) == OBJECTIVE_MODE_NSGA or
+                                                            sl.get_setting(POPULATION_STORAGE) != 0 or
+                                                            sl.get_setting(REPLACEMENT_STRATEGY) != REPLACEMENT_GENERATIONAL):
+            print("The estimation of distribution engine samples whole generations of a single-objective, in-memory population, "
+                  "so objectiveMode, populationStorage and replacementStrategy are ignored")
+        elif sl.get_setting(EDA_MODEL) != EDA_MODEL_OFF and sl.get_setting(GENOME_TYPE) != GENOME_TYPE_BIT:
+            print("The estimation of distribution engine models bit genomes only, so edaModel is ignored")
+        if sl.get_setting(POPULATION_DUMP_FILE) != NO_POPULATION_DUMP_FILE and sl.get_setting(GENOME_TYPE) != GENOME_TYPE_BIT:
+            print("Population dumps hold bit genomes only, so populationDumpFile is ignored")
+        elif sl.get_setting(POPULATION_DUMP_FILE) != NO_POPULATION_DUMP_FILE:
+            self.population_dump = PopulationDumpWriter(sl.get_setting(POPULATION_DUMP_FILE),
+                                                        sl.get_setting(POPULATION_DUMP_EVERY),
+                                                        sl.get_setting(POPULATION_DUMP_COMPRESSION))
+
+    def add_stuck_run_criteria(self):
+        """
+        Adds the criteria that end a run whose population can never get worse.
+        terminateOnFailure waits for the average fitness to fall, so without them such a run goes on forever
+        once it is stuck.
+        """
+        self.termination.criteria.append(ConvergenceCriterion())
+        if sl.get_setting(STAGNATION_GENERATIONS) == CRITERION_DISABLED:
+            self.termination.criteria.append(StagnationCriterion(STUCK_RUN_STAGNATION_GENERATIONS))
+
+    def initialize_population(self):
+        """
+        Initializes a new random population and resets the termination criteria for it.
+        """
+        self.termination.reset()
+        self.declared_failure = False
+        self.population.initialize_random_starting_population()
+
+    def check_termination_criteria(self):
+        """
+        Checks the enabled termination criteria against the current generation.
+
+        Returns:
+            bool: True if a criterion declared the run failed, False otherwise.
+        """
+        if self.termination and self.termination.check(self.generation_data, self.population):
+            print(f"Terminated by {self.termination.triggered.name} criterion: {self.termination.triggered.reason}")
+            print(FAILED)
+            return True
+        return False
+
+    def check_control_channel(self):
+        """
+        Carries out the commands sent through the control file since the last generation.
+        """
+        for command, arguments in self.control.poll():
+            if command == COMMAND_STOP:
+                print("Stop requested through the control file")
+                self.stop_requested = True
+            elif command == COMMAND_CHECKPOINT:
+                print(f"Checkpoint written to {self.population.checkpoint()}")
+            elif command == COMMAND_STATS:
+                self.print_statistics()
+            elif command in HOT_RELOADABLE_SETTINGS:
+                try:
+                    value = sl.convert_setting(command, arguments[0])
+                    sl.check_string_size_limits(dict(sl.ga_settings, **{command: value}))
+                except IndexError:
+                    print(f"Ignored control command {command}: it needs a value")
+                    continue
+                except ValueError as error:
+                    print(f"Ignored control command {command}: {error}")
+                    continue
+                self.population.apply_setting(command, value)
+                print(f"{command} set to {value}")
+            else:
+                print(f"Ignored control command {command}: it is not a command or a setting that can change during a run")
+
+    def print_statistics(self):
+        """
+        Prints the progress of the run and the current values of the settings that can change during it.
+        """
+        statistics_array = [
+            f"Statistics at generation {self.generation_number}:",
+            f"population size {sl.get_setting(POPULATION_SIZE_N)},",
+            f"evaluations {Individual.evaluation_count},",
+            f"elapsed {time.time() - self.start_time:.1f} seconds,",
+            f"best {self.generation_data['best']['fitness']},",
+            f"average {self.generation_data['average']},",
+            f"diversity {self.population.get_diversity():.5f}"
+        ]
+        print(' '.join(statistics_array))
+        print(' '.join(f"{key} {sl.get_setting(key)}" for key in HOT_RELOADABLE_SETTINGS))
 
     def get_generation_data(self):
         """
@@ -59,6 +231,16 @@ class SGAController:
         self.generation_data["best"] = self.population.get_best_fitness()
         self.generation_data["average"] = self.population.get_average_fitness()
         self.generation_data["worst"] = self.population.get_worst_fitness()
+        # Duplicate ratio of the parents of this generation, None when dedup is off
+        self.generation_data["duplicateRatio"] = self.population.duplicate_ratio
+        # Pareto front of this generation, None in single-objective mode
+        self.generation_data["pareto"] = self.population.get_pareto_statistics()
+        # Surrogate accuracy and evaluations saved while building this generation, None when surrogates are off
+        self.generation_data["surrogate"] = self.population.surrogate_statistics
+        # Linkage groups of the model this generation was sampled from, None outside the estimation of distribution engine
+        self.generation_data["model"] = self.population.model_statistics
+        if self.population_dump is not None:
+            self.population_dump.write_generation(self.generation_number, self.population)
 
     def save_generation_data(self):
         """
@@ -74,9 +256,25 @@ class SGAController:
                          f"(B: {self.generation_data['best']['fitness']},",
                          f"A: {self.generation_data['average']},",
                          f"W: {self.generation_data['worst']['fitness']})"]
+        if self.generation_data["duplicateRatio"] is not None:
+            message_array.append(f"D: {self.generation_data['duplicateRatio']}")
+        if self.generation_data["pareto"] is not None:
+            message_array.append(f"F: {self.generation_data['pareto']['frontSize']}/{self.generation_data['pareto']['frontCount']}")
+            if self.generation_data["pareto"]["hypervolume"] is not None:
+                message_array.append(f"HV: {self.generation_data['pareto']['hypervolume']}")
+        if self.generation_data["surrogate"] is not None:
+            message_array.append(f"S: {self.generation_data['surrogate']['evaluated']}/{self.generation_data['surrogate']['candidates']}")
+            if self.generation_data["surrogate"]["accuracy"] is not None:
+                message_array.append(f"R: {self.generation_data['surrogate']['accuracy']}")
+        if self.generation_data["model"] is not None:
+            message_array.append(f"M: {self.generation_data['model']['groups']}/{self.generation_data['model']['largestGroup']}")
         message = ' '.join(message_array)
         self.generation_data['message'] = message
         print(message)
+        if self.generation_callback is not None:
+            self.generation_callback(self.generation_data)
+        if self.control is not None:
+            self.check_control_channel()
         # Print detailed debug information if enabled
         if self.full_debug or self.limited_debug:
             debug_array = [
@@ -93,8 +291,9 @@ class SGAController:
             print('\n'.join(debug_array))
         self.saved_generation_data.append(self.generation_data)
 
-        # Check if the best fitness matches the string size, indicating success
-        if self.string_size == self.generation_data['best']['fitness']:
+        # Check if the best fitness reaches the optimum, indicating success
+        target_fitness = self.population.get_target_fitness()
+        if target_fitness is not None and self.generation_data['best']['fitness'] >= target_fitness:
             success_array = [
                 ' '.join(["Global Best Fitness =",
                           str(self.generation_data['best']['fitness'])]),
@@ -112,6 +311,11 @@ class SGAController:
             ]
             print('\n'.join(success_array))
             print(SUCCESS)
+            self.succeeded = True
+            needs_termination = True
+        elif self.check_termination_criteria():
+            needs_termination = True
+        elif self.stop_requested:
             needs_termination = True
 
         # Check for termination conditions based on failure criteria
@@ -173,9 +377,10 @@ class SGAController:
     def save_generation_data_bisection(self):
         """
         Saves the current generation data for bisection and checks for termination conditions.
+        A population that meets a termination criterion sets declared_failure instead of returning True.
         
         Returns:
-            bool: True if the run needs to be terminated, False otherwise.
+            bool: True if the population succeeded, False otherwise.
         """
         needs_termination = False
         self.get_generation_data()
@@ -184,9 +389,25 @@ class SGAController:
                          f"(B: {self.generation_data['best']['fitness']},",
                          f"A: {self.generation_data['average']},",
                          f"W: {self.generation_data['worst']['fitness']})"]
+        if self.generation_data["duplicateRatio"] is not None:
+            message_array.append(f"D: {self.generation_data['duplicateRatio']}")
+        if self.generation_data["pareto"] is not None:
+            message_array.append(f"F: {self.generation_data['pareto']['frontSize']}/{self.generation_data['pareto']['frontCount']}")
+            if self.generation_data["pareto"]["hypervolume"] is not None:
+                message_array.append(f"HV: {self.generation_data['pareto']['hypervolume']}")
+        if self.generation_data["surrogate"] is not None:
+            message_array.append(f"S: {self.generation_data['surrogate']['evaluated']}/{self.generation_data['surrogate']['candidates']}")
+            if self.generation_data["surrogate"]["accuracy"] is not None:
+                message_array.append(f"R: {self.generation_data['surrogate']['accuracy']}")
+        if self.generation_data["model"] is not None:
+            message_array.append(f"M: {self.generation_data['model']['groups']}/{self.generation_data['model']['largestGroup']}")
         message = ' '.join(message_array)
         self.generation_data['message'] = message
         print(message)
+        if self.generation_callback is not None:
+            self.generation_callback(self.generation_data)
+        if self.control is not None:
+            self.check_control_channel()
         # Print detailed debug information if enabled
         if self.full_debug or self.limited_debug:
             debug_array = [
@@ -203,8 +424,9 @@ class SGAController:
             print('\n'.join(debug_array))
         self.saved_generation_data.append(self.generation_data)
 
-        # Check if the best fitness matches the string size, indicating success
-        if self.string_size == self.generation_data['best']['fitness']:
+        # Check if the best fitness reaches the optimum, indicating success
+        target_fitness = self.population.get_target_fitness()
+        if target_fitness is not None and self.generation_data['best']['fitness'] >= target_fitness:
             success_array = [
                 ' '.join(["Global Best Fitness =",
                           str(self.generation_data['best']['fitness'])]),
@@ -222,7 +444,11 @@ class SGAController:
             ]
             print('\n'.join(success_array))
             print(SUCCESS)
+            self.succeeded = True
             needs_termination = True
+        elif self.check_termination_criteria():
+            # The population is declared failed without counting as a success
+            self.declared_failure = True
 
         # Maintain a sliding window of the last 4 generations
         if len(self.saved_generation_data) == 4:
@@ -238,7 +464,7 @@ class SGAController:
         print("bisection_option: ", self.bisection_option)
         if self.bisection_option == 0:
             # Standard genetic algorithm run
-            self.population.initialize_random_starting_population()
+            self.initialize_population()
             terminate_run = self.save_generation_data()
             self.generation_number += 1
             while True:
@@ -255,19 +481,24 @@ class SGAController:
                                self.bisection_starting_population)
                 print("\nRunning bisection with population size: " +
                       str(self.bisection_starting_population))
-                self.population.initialize_random_starting_population()
+                self.initialize_population()
                 terminate_run = self.save_generation_data_bisection()
                 self.generation_number += 1
                 while True:
                     self.population.select_mating_parents()
                     self.population.replace_current_population()
                     terminate_run = self.save_generation_data_bisection()
-                    if self.generation_number >= self.bisection_max_generation:
+                    if self.stop_requested:
+                        break
+                    if (self.generation_number >= self.bisection_max_generation or
+                            self.declared_failure):
                         self.bisection_starting_population *= 2
                         break
                     if terminate_run:
                         break
                     self.generation_number += 1
+                if self.stop_requested:
+                    break
                 if terminate_run:
                     print(f"Max N = {self.bisection_starting_population}")
                     print(f"Min N = {self.bisection_starting_population//2}")
@@ -279,19 +510,22 @@ class SGAController:
                     break
                 self.generation_number = 1
 
-            while True:
+            while not self.stop_requested:
                 sl.set_setting(POPULATION_SIZE_N,
                                self.bisection_starting_population)
                 print("\nRunning bisection with population size: " +
                       str(self.bisection_starting_population))
-                self.population.initialize_random_starting_population()
+                self.initialize_population()
                 terminate_run = self.save_generation_data_bisection()
                 self.generation_number += 1
                 while True:
                     self.population.select_mating_parents()
                     self.population.replace_current_population()
                     terminate_run = self.save_generation_data_bisection()
-                    if self.generation_number >= self.bisection_max_generation:
+                    if self.stop_requested:
+                        break
+                    if (self.generation_number >= self.bisection_max_generation or
+                            self.declared_failure):
                         self.bisection_min = self.bisection_starting_population
                         self.bisection_starting_population = (
                             (self.bisection_max + self.bisection_min) // 2)
@@ -299,6 +533,8 @@ class SGAController:
                     if terminate_run:
                         break
                     self.generation_number += 1
+                if self.stop_requested:
+                    break
                 if terminate_run:
                     print(f"Max N = {self.bisection_starting_population}")
                     print(f"Min N = {self.bisection_min}")
@@ -316,6 +552,11 @@ class SGAController:
                     print(f"Final Threshold = {final_threshold}")
                     break
                 self.generation_number = 1
+        if self.population_dump is not None:
+            # Wait for the queued generations to reach the dump file
+            self.population_dump.close()
+        if self.control is not None:
+            self.control.close()
 
 
 if __name__ == "__main__":
@@ -324,7 +565,16 @@ if __name__ == "__main__":
     """
     start = time.time()
     sl.load_settings(sys.argv)
-    sga_controller = SGAController()
-    sga_controller.run()
+    if sl.get_setting(ISLAND_COUNT) > 1:
+        # The island model needs sockets and processes, so it is only imported when it is selected
+        from island import run_island_model
+        run_island_model()
+    else:
+        sga_controller = SGAController()
+        sga_controller.run()
     end = time.time()
     print(f"Execution time: {end-start} seconds")
+    # Islands in other processes copy their solutions there, so the counts of this process only cover in-process runs
+    in_process = sl.get_setting(ISLAND_COUNT) <= 1 or sl.get_setting(ISLAND_TRANSPORT) == ISLAND_TRANSPORT_IN_PROCESS
+    if (sl.get_setting(FULL_DEBUG) or sl.get_setting(LIMITED_DEBUG)) and in_process:
+        print(f"Solution copies: {Individual.solution_copies}, copies avoided by sharing: {Individual.solution_shares}")
@@ -0,0 +1,185 @@
+# Author: Daniel Glauber
+# File: shared_population.py
+# Description: Contains the SharedPopulation class, which builds each generation in parallel worker processes.
+import atexit
+import os
+from typing import Any, Dict, List, Tuple
+from individual import Individual
+from population import SELECTION_METHOD_TOURNAMENT
+from mapped_population import MappedPopulation
+from genome_storage import MappedGenomeFile, SharedGenomeMemory, GenomeMatrix
+import settings_loader as sl
+import rng
+
+# Constants for magic numbers and strings
+WORKER_PROCESSES_PER_CPU = 0
+CHECKPOINT_FILE_NAME = "checkpoint_{run}.pop"
+
+# State of a worker process, set up once by initialize_worker
+worker_population = None
+worker_buffers: Dict[str, SharedGenomeMemory] = {}
+
+
+def initialize_worker(settings: Dict[str, Any]) -> None:
+    """
+    Sets up a worker process with the settings of the parent, so it builds the same operators.
+
+    Args:
+        settings (Dict[str, Any]): The settings of the parent process.
+    """
+    global worker_population
+    sl.ga_settings.update(settings)
+    worker_population = MappedPopulation()
+
+
+def attach_worker_buffers(names: Tuple[str, str]) -> List[GenomeMatrix]:
+    """
+    Attaches a worker to the shared generation buffers, reusing the attachments of earlier generations.
+    Buffers of an earlier population are detached once the parent has replaced them.
+
+    Args:
+        names (Tuple[str, str]): The names of the current and next generation buffers.
+
+    Returns:
+        List[GenomeMatrix]: The current and next generation matrices.
+    """
+    for name in [name for name in worker_buffers if name not in names]:
+        worker_buffers.pop(name).close()
+    for name in names:
+        if name not in worker_buffers:
+            worker_buffers[name] = SharedGenomeMemory(name)
+    return [worker_buffers[name].matrix for name in names]
+
+
+def build_slice(names: Tuple[str, str], start: int, stop: int, stream_id: rng.StreamId) -> int:
+    """
+    Builds the children in a slice of the next generation inside a worker process.
+
+    Args:
+        names (Tuple[str, str]): The names of the current and next generation buffers.
+        start (int): The first slot of the slice.
+        stop (int): The slot to stop before.
+        stream_id (StreamId): The random stream of the slice.
+
+    Returns:
+        int: The number of fitness evaluations performed.
+    """
+    current, next_matrix = attach_worker_buffers(names)
+    worker_population.rng = rng.create_stream(sl.get_setting("randSeed"), stream_id, sl.get_setting("rngBackend"))
+    return worker_population.build_children(current, next_matrix, start, stop)
+
+
+class SharedPopulation(MappedPopulation):
+    """
+    Class SharedPopulation keeps the current and next generation in shared memory and builds the
+    next generation in a pool of worker processes.
+    Each worker attaches to the buffers by name and builds a disjoint slice of the next generation
+    with its own random stream, so no individuals are pickled and the parent only swaps the buffers.
+    """
+
+    def __init__(self, stream_id: int = 0):
+        """
+        Initializes the SharedPopulation.
+
+        Args:
+            stream_id (int, optional): The random stream used by this population. Defaults to 0.
+        """
+        super().__init__(stream_id)
+        worker_processes = sl.get_setting("workerProcesses")
+        self.worker_processes = os.cpu_count() if worker_processes == WORKER_PROCESSES_PER_CPU else worker_processes
+        self.executor = None
+        self.generations_built = 0
+        atexit.register(self.shutdown)
+
+    def create_generation_storage(self) -> List[SharedGenomeMemory]:
+        """
+        Creates the shared memory blocks for the current and next generation.
+
+        Returns:
+            List[SharedGenomeMemory]: The current and next generation blocks.
+        """
+        return [SharedGenomeMemory(population_size=self.population_size, string_size=self.string_size)
+                for generation in range(2)]
+
+    def close(self) -> None:
+        """
+        Removes the shared memory blocks of the generations.
+        """
+        for generation_memory in self.generation_files:
+            generation_memory.close(delete=True)
+        self.generation_files = []
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes and removes the shared memory blocks.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.close()
+
+    def slice_bounds(self) -> List[Tuple[int, int]]:
+        """
+        Splits the slots of the children into one slice per worker.
+        Slices start on an even slot so every pair of children is built by a single worker.
+
+        Returns:
+            List[Tuple[int, int]]: The start and stop slot of each non-empty slice.
+        """
+        children = self.population_size - 1
+        pairs = -(-children // 2)
+        bounds = []
+        for worker in range(self.worker_processes):
+            start = 2 * (pairs * worker // self.worker_processes)
+            stop = min(2 * (pairs * (worker + 1) // self.worker_processes), children)
+            if start < stop:
+                bounds.append((start, stop))
+        return bounds
+
+    def select_mating_parents(self) -> None:
+        """
+        Builds the next generation in the worker processes, one slice per worker.
+        The best individual is copied into the last slot by the parent.
+        """
+        current = self.generation_files[0].matrix
+        next_matrix = self.generation_files[1].matrix
+        best_index = self.get_best_fitness()["index"]
+        if self.selectionMethod == SELECTION_METHOD_TOURNAMENT:
+            if self.executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.executor = ProcessPoolExecutor(self.worker_processes, initializer=initialize_worker,
+                                                    initargs=(dict(sl.ga_settings),))
+            names = (self.generation_files[0].name, self.generation_files[1].name)
+            # Streams depend on the slice and not on the worker that runs it, so runs are reproducible
+            futures = [self.executor.submit(build_slice, names, start, stop, (self._stream_id, self.generations_built, slice_index))
+                       for slice_index, (start, stop) in enumerate(self.slice_bounds())]
+            Individual.evaluation_count += sum(future.result() for future in futures)
+            self.generations_built += 1
+            # Add the best individual to the next generation
+            next_matrix.copy_row(current, best_index, self.population_size - 1)
+
+    def apply_setting(self, key: str, value: Any) -> None:
+        """
+        Changes a hot-reloadable setting, restarting the workers so they build children with it.
+
+        Args:
+            key (str): The setting, one of HOT_RELOADABLE_SETTINGS.
+            value (Any): The new value, already converted.
+        """
+        super().apply_setting(key, value)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def checkpoint(self) -> str:
+        """
+        Copies the current generation into a mapped file so it can be reopened as a checkpoint.
+
+        Returns:
+            str: The path of the checkpoint file.
+        """
+        path = os.path.join(self.storage_directory(), CHECKPOINT_FILE_NAME.format(run=self.run_name))
+        checkpoint_file = MappedGenomeFile(path, self.population_size, self.string_size)
+        checkpoint_file.mmap[:] = self.generation_files[0].shared_memory.buf[:len(checkpoint_file.mmap)]
+        checkpoint_file.close()
+        return path
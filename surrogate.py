@@ -0,0 +1,130 @@
+# Author: Daniel Glauber
+# File: surrogate.py
+# Description: Contains the surrogate models that predict the fitness of children before they are evaluated.
+import heapq
+from collections import deque
+from itertools import compress
+from typing import Any, Optional
+from genome_storage import solution_as_integer
+
+# Constants for magic numbers and strings
+SURROGATE_OFF = 0
+SURROGATE_PER_LOCUS = 1
+SURROGATE_NEAREST_NEIGHBOURS = 2
+# Fraction of the prediction error corrected by each training step of the per-locus model
+SURROGATE_LEARNING_RATE = 0.5
+
+
+class PerLocusSurrogate:
+    """
+    Class PerLocusSurrogate predicts the fitness of a genome as a bias plus one weight for every locus set to 1.
+    The weights are fitted online by normalized least mean squares, so each evaluation updates them in O(L)
+    and the model follows the population as it moves.
+    """
+
+    def __init__(self, string_size: int, learning_rate: float = SURROGATE_LEARNING_RATE) -> None:
+        """
+        Initializes an untrained model.
+
+        Args:
+            string_size (int): The size of the genomes.
+            learning_rate (float, optional): The fraction of each prediction error corrected. Defaults to SURROGATE_LEARNING_RATE.
+        """
+        self.string_size = string_size
+        self.learning_rate = learning_rate
+        self.bias = 0.0
+        self.weights = [0.0] * string_size
+
+    def train(self, solution: bytearray, fitness: float) -> None:
+        """
+        Moves the weights of the loci set to 1 and the bias towards the true fitness of a genome.
+
+        Args:
+            solution (bytearray): The genome.
+            fitness (float): Its true fitness.
+        """
+        ones = list(compress(range(self.string_size), solution))
+        step = self.learning_rate * (fitness - self.predict(solution)) / (len(ones) + 1)
+        self.bias += step
+        weights = self.weights
+        for index in ones:
+            weights[index] += step
+
+    def predict(self, solution: bytearray) -> float:
+        """
+        Predicts the fitness of a genome.
+
+        Args:
+            solution (bytearray): The genome.
+
+        Returns:
+            float: The predicted fitness.
+        """
+        return self.bias + sum(compress(self.weights, solution))
+
+
+class NearestNeighbourSurrogate:
+    """
+    Class NearestNeighbourSurrogate predicts the fitness of a genome as the mean fitness of the k closest
+    genomes in an archive of recent evaluations, by Hamming distance.
+    Genomes are kept bit-packed in integers, so a distance is one XOR and a bit count.
+    """
+
+    def __init__(self, string_size: int, neighbours: int = 5, archive_size: int = 1024) -> None:
+        """
+        Initializes an empty model.
+
+        Args:
+            string_size (int): The size of the genomes.
+            neighbours (int, optional): The number of neighbours averaged. Defaults to 5.
+            archive_size (int, optional): The number of recent evaluations kept. Defaults to 1024.
+        """
+        self.string_size = string_size
+        self.neighbours = max(1, neighbours)
+        self.archive = deque(maxlen=max(1, archive_size))
+
+    def train(self, solution: bytearray, fitness: float) -> None:
+        """
+        Adds an evaluated genome to the archive, dropping the oldest one when it is full.
+
+        Args:
+            solution (bytearray): The genome.
+            fitness (float): Its true fitness.
+        """
+        self.archive.append((solution_as_integer(solution), fitness))
+
+    def predict(self, solution: bytearray) -> float:
+        """
+        Predicts the fitness of a genome.
+
+        Args:
+            solution (bytearray): The genome.
+
+        Returns:
+            float: The predicted fitness.
+        """
+        if not self.archive:
+            return 0.0
+        packed = solution_as_integer(solution)
+        nearest = heapq.nsmallest(self.neighbours, self.archive, key=lambda entry: (entry[0] ^ packed).bit_count())
+        return sum(fitness for genome, fitness in nearest) / len(nearest)
+
+
+def create_surrogate(surrogate_model: int, string_size: int, neighbours: int, archive_size: int) -> Optional[Any]:
+    """
+    Creates the surrogate model selected in the settings.
+
+    Args:
+        surrogate_model (int): The model to create.
+        string_size (int): The size of the genomes.
+        neighbours (int): The number of neighbours of the nearest neighbour model.
+        archive_size (int): The archive size of the nearest neighbour model.
+
+    Returns:
+        PerLocusSurrogate | NearestNeighbourSurrogate: The model, or None when surrogates are off.
+    """
+    if surrogate_model == SURROGATE_PER_LOCUS:
+        return PerLocusSurrogate(string_size)
+    if surrogate_model == SURROGATE_NEAREST_NEIGHBOURS:
+        return NearestNeighbourSurrogate(string_size, neighbours, archive_size)
+    return None
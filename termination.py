@@ -0,0 +1,300 @@
+# Author: Daniel Glauber
+# File: termination.py
+# Description: Contains the termination criteria used to declare a run failed before its generation limit.
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from individual import Individual
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+STAGNATION_GENERATIONS = "stagnationGenerations"
+DIVERSITY_THRESHOLD = "diversityThreshold"
+MAX_EVALUATIONS = "maxEvaluations"
+MAX_WALL_CLOCK_SECONDS = "maxWallClockSeconds"
+PLATEAU_WINDOW = "plateauWindow"
+PLATEAU_TOLERANCE = "plateauTolerance"
+CRITERION_DISABLED = 0
+PLATEAU_CONFIDENCE_Z = 1.96
+MIN_PLATEAU_WINDOW = 3
+
+
+class TerminationCriterion(ABC):
+    """
+    Base class for a single termination criterion.
+    A criterion is reset whenever a new population is started and checked once per generation.
+    """
+    name = "criterion"
+
+    def __init__(self) -> None:
+        """
+        Initializes the criterion with an empty reason.
+        """
+        self.reason = ""
+
+    def reset(self) -> None:
+        """
+        Resets any state kept from a previous population.
+        """
+        self.reason = ""
+
+    @abstractmethod
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        """
+        Checks whether the run should be declared failed.
+
+        Args:
+            generation_data (Dict[str, Any]): The data collected for the current generation.
+            population (Population): The population being evolved.
+
+        Returns:
+            bool: True if the criterion is met and the run should stop, False otherwise.
+        """
+
+
+class StagnationCriterion(TerminationCriterion):
+    """
+    Fails the run when the best fitness has not improved for a number of generations.
+    """
+    name = "stagnation"
+
+    def __init__(self, generations: int) -> None:
+        """
+        Initializes the stagnation criterion.
+
+        Args:
+            generations (int): The number of generations without improvement allowed.
+        """
+        super().__init__()
+        self.generations = generations
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.best_fitness = None
+        self.generations_without_improvement = 0
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        best_fitness = generation_data["best"]["fitness"]
+        if self.best_fitness is None or best_fitness > self.best_fitness:
+            self.best_fitness = best_fitness
+            self.generations_without_improvement = 0
+            return False
+        self.generations_without_improvement += 1
+        if self.generations_without_improvement >= self.generations:
+            self.reason = (f"Best fitness {self.best_fitness} did not improve for "
+                           f"{self.generations_without_improvement} generations")
+            return True
+        return False
+
+
+class DiversityCollapseCriterion(TerminationCriterion):
+    """
+    Fails the run when the genetic diversity of the population drops below a threshold.
+    """
+    name = "diversity"
+
+    def __init__(self, threshold: float) -> None:
+        """
+        Initializes the diversity collapse criterion.
+
+        Args:
+            threshold (float): The diversity (0.0 to 1.0) below which the population has collapsed.
+        """
+        super().__init__()
+        self.threshold = threshold
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        diversity = population.get_diversity()
+        generation_data["diversity"] = diversity
+        if diversity < self.threshold:
+            self.reason = f"Diversity {diversity:.5f} fell below {self.threshold}"
+            return True
+        return False
+
+
+class EvaluationBudgetCriterion(TerminationCriterion):
+    """
+    Fails the run when the number of fitness evaluations exceeds a budget.
+    """
+    name = "evaluations"
+
+    def __init__(self, max_evaluations: int) -> None:
+        """
+        Initializes the evaluation budget criterion.
+
+        Args:
+            max_evaluations (int): The number of fitness evaluations allowed per population.
+        """
+        super().__init__()
+        self.max_evaluations = max_evaluations
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.starting_evaluations = Individual.evaluation_count
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        evaluations = Individual.evaluation_count - self.starting_evaluations
+        generation_data["evaluations"] = evaluations
+        if evaluations >= self.max_evaluations:
+            self.reason = f"Evaluation budget used ({evaluations} of {self.max_evaluations})"
+            return True
+        return False
+
+
+class WallClockCriterion(TerminationCriterion):
+    """
+    Fails the run when it has been running longer than a time budget.
+    """
+    name = "wallClock"
+
+    def __init__(self, max_seconds: float) -> None:
+        """
+        Initializes the wall-clock criterion.
+
+        Args:
+            max_seconds (float): The number of seconds allowed per population.
+        """
+        super().__init__()
+        self.max_seconds = max_seconds
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.start_time = time.perf_counter()
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        elapsed = time.perf_counter() - self.start_time
+        if elapsed >= self.max_seconds:
+            self.reason = f"Wall-clock budget used ({elapsed:.3f} of {self.max_seconds} seconds)"
+            return True
+        return False
+
+
+class PlateauCriterion(TerminationCriterion):
+    """
+    Fails the run when the average fitness has statistically stopped rising.
+    A least squares line is fitted to the average fitness of the last window of generations,
+    and the run has plateaued when the upper 95% confidence bound of the slope is below the tolerance.
+    """
+    name = "plateau"
+
+    def __init__(self, window: int, tolerance: float) -> None:
+        """
+        Initializes the plateau criterion.
+
+        Args:
+            window (int): The number of generations to fit the trend over.
+            tolerance (float): The smallest average fitness gain per generation counted as progress.
+        """
+        super().__init__()
+        self.window = max(window, MIN_PLATEAU_WINDOW)
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.averages = []
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        self.averages.append(generation_data["average"])
+        if len(self.averages) > self.window:
+            self.averages.pop(0)
+        if len(self.averages) < self.window:
+            return False
+        # Only the plateau criterion needs the statistics module, so it is imported here to keep startup short
+        import statistics
+        generations = range(self.window)
+        slope, intercept = statistics.linear_regression(generations, self.averages)
+        residuals = [average - (slope * x + intercept) for x, average in zip(generations, self.averages)]
+        x_mean = (self.window - 1) / 2
+        x_spread = sum((x - x_mean) ** 2 for x in generations)
+        slope_error = math.sqrt(sum(r * r for r in residuals) / (self.window - 2) / x_spread)
+        upper_bound = slope + PLATEAU_CONFIDENCE_Z * slope_error
+        if upper_bound < self.tolerance:
+            self.reason = (f"Average fitness plateaued over {self.window} generations "
+                           f"(slope {slope:.5f}, upper bound {upper_bound:.5f})")
+            return True
+        return False
+
+
+class TerminationController:
+    """
+    Holds the enabled termination criteria and checks them together each generation.
+    """
+
+    def __init__(self, criteria: Optional[List[TerminationCriterion]] = None) -> None:
+        """
+        Initializes the controller.
+
+        Args:
+            criteria (List[TerminationCriterion], optional): The criteria to check. Defaults to the ones enabled in the settings.
+        """
+        self.criteria = build_termination_criteria() if criteria is None else criteria
+        self.triggered = None
+
+    def __bool__(self) -> bool:
+        return len(self.criteria) > 0
+
+    def reset(self) -> None:
+        """
+        Resets every criterion when a new population is started.
+        """
+        self.triggered = None
+        for criterion in self.criteria:
+            criterion.reset()
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        """
+        Checks every criterion against the current generation.
+
+        Args:
+            generation_data (Dict[str, Any]): The data collected for the current generation.
+            population (Population): The population being evolved.
+
+        Returns:
+            bool: True if any criterion is met, False otherwise.
+        """
+        for criterion in self.criteria:
+            if criterion.check(generation_data, population):
+                self.triggered = criterion
+                return True
+        return False
+
+
+class ConvergenceCriterion(TerminationCriterion):
+    """
+    Fails the run when every gene has converged, which a population that cannot introduce new genes never leaves.
+    """
+    name = "convergence"
+
+    def check(self, generation_data: Dict[str, Any], population: Any) -> bool:
+        if population.get_diversity() == 0.0:
+            self.reason = "Every gene of the population has converged"
+            return True
+        return False
+
+
+def build_termination_criteria() -> List[TerminationCriterion]:
+    """
+    Builds the termination criteria that are enabled in the settings.
+    A criterion is disabled when its setting is 0.
+
+    Returns:
+        List[TerminationCriterion]: The enabled termination criteria.
+    """
+    criteria = []
+    if sl.get_setting(STAGNATION_GENERATIONS) != CRITERION_DISABLED:
+        criteria.append(StagnationCriterion(sl.get_setting(STAGNATION_GENERATIONS)))
+    if sl.get_setting(DIVERSITY_THRESHOLD) != CRITERION_DISABLED:
+        criteria.append(DiversityCollapseCriterion(sl.get_setting(DIVERSITY_THRESHOLD)))
+    if sl.get_setting(MAX_EVALUATIONS) != CRITERION_DISABLED:
+        criteria.append(EvaluationBudgetCriterion(sl.get_setting(MAX_EVALUATIONS)))
+    if sl.get_setting(MAX_WALL_CLOCK_SECONDS) != CRITERION_DISABLED:
+        criteria.append(WallClockCriterion(sl.get_setting(MAX_WALL_CLOCK_SECONDS)))
+    if sl.get_setting(PLATEAU_WINDOW) != CRITERION_DISABLED:
+        criteria.append(PlateauCriterion(sl.get_setting(PLATEAU_WINDOW),
+                                         sl.get_setting(PLATEAU_TOLERANCE)))
+    return criteria
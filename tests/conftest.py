@@ -0,0 +1,7 @@
+# Author: Daniel Glauber
+# File: conftest.py
+# Description: Makes the modules of the package importable from the tests.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+# Author: Daniel Glauber
+# File: test_benchmark.py
+# Description: Checks the statistical comparison of the benchmark harness, and that the scenarios behave as in the recorded baseline.
+import json
+import pytest
+import benchmark
+
+
+def test_mann_whitney_identical_samples():
+    sample = [3, 5, 5, 7, 9, 11]
+    u_statistic, p_value = benchmark.mann_whitney_u(sample, sample)
+    assert u_statistic == len(sample) ** 2 / 2
+    assert p_value == 1.0
+
+
+def test_mann_whitney_separated_samples():
+    # With no overlap U is 0, and the normal approximation with continuity correction gives p = 0.0122
+    u_statistic, p_value = benchmark.mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u_statistic == 0
+    assert p_value == pytest.approx(0.0122, abs=1e-4)
+
+
+def test_mann_whitney_all_tied():
+    assert benchmark.mann_whitney_u([4, 4, 4], [4, 4]) == (3.0, 1.0)
+
+
+def test_compare_results_flags_slower_convergence():
+    baseline = [{"succeeded": True, "generations": 20 + index % 5, "evaluations": 1000, "seconds": 1.0}
+                for index in range(20)]
+    slower = [dict(result, generations=result["generations"] + 10) for result in baseline]
+    assert not benchmark.compare_results(baseline, baseline)["behaviourChanged"]
+    assert benchmark.compare_results(baseline, slower)["behaviourChanged"]
+
+
+def test_failed_runs_rank_last():
+    results = [{"succeeded": False, "generations": 50}, {"succeeded": True, "generations": 50}]
+    assert benchmark.generations_to_success(results) == [51, 50]
+
+
+@pytest.mark.parametrize("scenario", benchmark.SCENARIOS)
+def test_generations_to_success_match_baseline(scenario):
+    with open(benchmark.DEFAULT_BASELINE_FILE) as file:
+        baseline = json.load(file)[scenario]
+    current = benchmark.run_benchmark(scenario, len(baseline))
+    comparison = benchmark.compare_results(baseline, current)
+    assert not comparison["behaviourChanged"], comparison
@@ -0,0 +1,34 @@
+# Author: Daniel Glauber
+# File: test_control.py
+# Description: Checks that settings sent through the control file are validated before a running population uses them.
+import contextlib
+import io
+import pytest
+from control import ControlChannel
+import settings_loader as sl
+from test_invariants import start_controller
+
+
+@pytest.mark.parametrize("command", ["tournamentSizeK 0", "tournamentSizeK -1", "eliteCount -3", "mutationBitsK 0"])
+def test_invalid_hot_reload_is_rejected(tmp_path, command):
+    controller = start_controller("trap")
+    key = command.split()[0]
+    before = sl.get_setting(key)
+    control_file = tmp_path / "control.txt"
+    controller.control = ControlChannel(str(control_file), poll_seconds=0)
+    control_file.write_text(f"{command}\nprobApplyMutation 0.5\n")
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            controller.check_control_channel()
+    finally:
+        controller.control.close()
+    assert f"Ignored control command {key}" in output.getvalue()
+    assert sl.get_setting(key) == before
+    # The valid command in the same file still takes effect
+    assert sl.get_setting("probApplyMutation") == 0.5
+    # The run goes on with the old value
+    population = controller.population
+    population.select_mating_parents()
+    population.replace_current_population()
+    assert len(population.current_generation) == sl.get_setting("populationSizeN")
@@ -0,0 +1,123 @@
+# Author: Daniel Glauber
+# File: test_invariants.py
+# Description: Checks the invariants of every generation in fixed-seed scenarios run through the SGAController.
+import contextlib
+import os
+from typing import Any, Dict
+import pytest
+from individual import calculate_fitness
+from sga import SGAController
+import benchmark
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+INVARIANT_GENERATIONS = 30
+# Generations a stuck run may use before its stop criteria count as broken
+STUCK_RUN_MAX_GENERATIONS = 2000
+# Scenarios of the benchmark, plus variants that take other paths through the engine
+INVARIANT_SCENARIOS = {
+    "onemax": ("onemax", {}),
+    "trap": ("trap", {}),
+    "trap-plus": ("trap", {"replacementStrategy": 1}),
+    "trap-elites": ("trap", {"eliteCount": 5, "crossoverOperator": 2}),
+    "trap-dedup": ("trap", {"dedupPolicy": 1}),
+    "trap-loose": ("trap", {"trapLinkage": 1, "trapBlockSize": 3, "trapDeception": 2}),
+    "ecga": ("trap", {"edaModel": 2, "tournamentSizeK": 16}),
+}
+# Scenarios whose population can never get worse, with a population too small to solve the trap
+STUCK_RUN_SCENARIOS = {
+    "trap-plus": ("trap", {"replacementStrategy": 1, "eliteCount": 2, "populationSizeN": 100}),
+    "nsga": ("trap", {"objectiveMode": 1, "terminateOnFailure": 0, "populationSizeN": 100}),
+    "surrogate": ("trap", {"surrogateModel": 1, "terminateOnFailure": 0, "populationSizeN": 100}),
+    "typed-integer": ("trap", {"genomeType": 1, "terminateOnFailure": 0, "populationSizeN": 60}),
+    "typed-float": ("trap", {"genomeType": 2, "terminateOnFailure": 0, "populationSizeN": 60}),
+    "typed-integer-dedup": ("trap", {"genomeType": 1, "dedupPolicy": 1, "populationSizeN": 60}),
+}
+
+
+def build_controller(scenario: str, changes: Dict[str, Any]) -> SGAController:
+    """
+    Loads the settings of a benchmark scenario with some changes and builds a controller for them.
+
+    Args:
+        scenario (str): The name of the benchmark scenario.
+        changes (Dict[str, Any]): The settings changed for the test.
+
+    Returns:
+        SGAController: The controller.
+    """
+    settings = dict(benchmark.load_scenario_settings(scenario), **changes)
+    sl.check_trap_settings(settings)
+    sl.check_string_size_limits(settings)
+    sl.ga_settings.clear()
+    sl.ga_settings.update(settings)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return SGAController()
+
+
+def start_controller(name: str) -> SGAController:
+    """
+    Loads the settings of a scenario and starts a controller with its first generation.
+
+    Args:
+        name (str): The name of the invariant scenario.
+
+    Returns:
+        SGAController: The controller.
+    """
+    controller = build_controller(*INVARIANT_SCENARIOS[name])
+    controller.initialize_population()
+    return controller
+
+
+@pytest.mark.parametrize("name", INVARIANT_SCENARIOS)
+def test_generation_invariants(name):
+    controller = start_controller(name)
+    population = controller.population
+    fitness_function = sl.get_setting("fitnessFunction")
+    previous_best = None
+    for generation in range(INVARIANT_GENERATIONS):
+        individuals = population.current_generation
+        # The population keeps its size
+        assert len(individuals) == sl.get_setting("populationSizeN")
+        # Every stored fitness is the fitness of the genome
+        for individual in individuals:
+            solution = individual.get_solution()
+            assert len(solution) == sl.get_setting("stringSizeN")
+            assert set(solution) <= {0, 1}
+            assert individual.get_solution_fitness() == calculate_fitness(fitness_function, solution)
+        best = population.get_best_fitness()
+        if previous_best is not None:
+            # The elites survive, so the best fitness never drops and the best genome is still there
+            assert best["fitness"] >= previous_best["fitness"]
+            assert any(individual.get_solution() == previous_best["solution"] for individual in individuals)
+        previous_best = {"fitness": best["fitness"], "solution": bytes(best["solution"])}
+        if best["fitness"] >= population.get_target_fitness():
+            break
+        population.select_mating_parents()
+        population.replace_current_population()
+
+
+@pytest.mark.parametrize("scenario", benchmark.SCENARIOS)
+def test_runs_are_reproducible(scenario):
+    settings = benchmark.load_scenario_settings(scenario)
+    first = benchmark.run_scenario(settings)
+    second = benchmark.run_scenario(settings)
+    assert (first["generations"], first["evaluations"]) == (second["generations"], second["evaluations"])
+
+
+@pytest.mark.parametrize("name", STUCK_RUN_SCENARIOS)
+def test_stuck_runs_terminate(name):
+    controller = build_controller(*STUCK_RUN_SCENARIOS[name])
+    population = controller.population
+    # Steps the run as SGAController.run does, but gives up after a bounded number of generations
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        controller.initialize_population()
+        terminated = controller.save_generation_data()
+        while not terminated and controller.generation_number < STUCK_RUN_MAX_GENERATIONS:
+            controller.generation_number += 1
+            population.select_mating_parents()
+            population.replace_current_population()
+            terminated = controller.save_generation_data()
+    assert terminated
+    assert not controller.succeeded
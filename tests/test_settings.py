@@ -0,0 +1,46 @@
+# Author: Daniel Glauber
+# File: test_settings.py
+# Description: Checks that settings which would crash the operators are rejected when they are read.
+import pytest
+import settings_loader as sl
+
+
+@pytest.mark.parametrize("key, value", [
+    ("mutationBlockSize", 0),
+    ("mutationBitsK", 0),
+    ("mutationBitsK", -2),
+    ("crossoverBlockSize", 0),
+    ("crossoverPointsK", -1),
+    ("creepStep", 0),
+    ("tournamentSizeK", 0),
+    ("tournamentSizeK", -1),
+    ("eliteCount", -3),
+    ("eliteCount", -1),
+    ("rtrWindowSize", -1),
+    ("stagnationGenerations", -3),
+    ("maxEvaluations", -5),
+    ("plateauWindow", -1),
+    ("surrogateFraction", 0),
+    ("surrogateFraction", -0.5),
+    ("surrogateFraction", 1.5),
+])
+def test_out_of_range_values_are_rejected(key, value):
+    with pytest.raises(ValueError):
+        sl.convert_setting(key, value)
+
+
+@pytest.mark.parametrize("changes", [
+    {"mutationBitsK": 81},
+    {"crossoverPointsK": 80, "crossoverOperator": 3},
+])
+def test_values_larger_than_the_genome_are_rejected(changes):
+    with pytest.raises(ValueError):
+        sl.build_settings(sl.DEFAULT_SETTINGS, dict(changes, stringSizeN=80))
+
+
+def test_values_within_the_genome_are_accepted():
+    settings = sl.build_settings(sl.DEFAULT_SETTINGS, {"stringSizeN": 80, "mutationBitsK": 80, "mutationBlockSize": 1,
+                                                       "crossoverPointsK": 79, "crossoverBlockSize": 1,
+                                                       "crossoverOperator": 3})
+    assert (settings["mutationBitsK"], settings["mutationBlockSize"]) == (80, 1)
+    assert (settings["crossoverPointsK"], settings["crossoverBlockSize"]) == (79, 1)
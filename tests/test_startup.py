@@ -0,0 +1,49 @@
+# Author: Daniel Glauber
+# File: test_startup.py
+# Description: Checks that the program starts without the modules it only needs for optional features, and that settings are cached safely.
+import os
+import subprocess
+import sys
+import benchmark
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+# Modules that are slow to import and only needed by optional features
+DEFERRED_MODULES = ["logging", "statistics", "multiprocessing", "concurrent.futures", "socket", "tempfile"]
+
+
+def test_startup_defers_optional_modules():
+    script = (f"import sys; {benchmark.STARTUP_SCRIPT}; "
+              f"print(','.join(module for module in {DEFERRED_MODULES!r} if module in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", script], cwd=benchmark.PACKAGE_DIRECTORY,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_settings_file_does_not_write_default_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings_file = tmp_path / "run.dat"
+    settings_file.write_text("stringSizeN 12\npopulationSizeN 30")
+    sl.ga_settings.clear()
+    sl.load_settings(["sga.py", str(settings_file)])
+    assert sl.get_setting("stringSizeN") == 12
+    assert sl.get_setting("randSeed") == sl.DEFAULT_SETTINGS["randSeed"]
+    assert os.listdir(tmp_path) == ["run.dat"]
+
+
+def test_settings_cache_follows_file_changes(tmp_path):
+    settings_file = tmp_path / "run.dat"
+    settings_file.write_text("stringSizeN 12")
+    sl.ga_settings.clear()
+    sl.parse_settings_file(str(settings_file))
+    assert sl.ga_settings == {"stringSizeN": 12}
+    assert str(settings_file) in sl.parsed_settings_cache
+    # Later files only fill in settings that are not set yet, whether or not they come from the cache
+    sl.ga_settings.clear()
+    sl.ga_settings["stringSizeN"] = 20
+    sl.parse_settings_file(str(settings_file))
+    assert sl.ga_settings == {"stringSizeN": 20}
+    settings_file.write_text("stringSizeN 160")
+    sl.ga_settings.clear()
+    sl.parse_settings_file(str(settings_file))
+    assert sl.ga_settings == {"stringSizeN": 160}
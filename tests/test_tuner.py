@@ -0,0 +1,18 @@
+# Author: Daniel Glauber
+# File: test_tuner.py
+# Description: Checks that the tuner scores runs so that better runs rank higher.
+import benchmark
+import tuner
+
+# Constants for magic numbers and strings
+SHORT_RUN_GENERATIONS = 1
+LONG_RUN_GENERATIONS = 10
+
+
+def test_shorter_tours_score_higher():
+    # Permutation targets are negative, and the elite keeps the best tour, so a longer run is at least as good
+    settings = dict(benchmark.load_scenario_settings("trap"), genomeType=3, stringSizeN=12, populationSizeN=40)
+    short_run = tuner.run_configuration(settings, SHORT_RUN_GENERATIONS)
+    long_run = tuner.run_configuration(settings, LONG_RUN_GENERATIONS)
+    assert 0 < short_run[2] < long_run[2] <= 1
+    assert tuner.score_results([long_run]) > tuner.score_results([short_run])
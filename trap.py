@@ -0,0 +1,109 @@
+# Author: Daniel Glauber
+# File: trap.py
+# Description: Contains the deceptive trap functions, which score genomes block by block through a precomputed lookup table.
+from typing import List, Sequence
+
+# Constants for magic numbers and strings
+TRAP_LINKAGE_TIGHT = 0
+TRAP_LINKAGE_LOOSE = 1
+TRAP_DEFAULT_BLOCK_SIZE = 4
+TRAP_DEFAULT_DECEPTION = 3
+# Block indexes are built one byte per block, so a block holds at most 8 bits
+TRAP_MAX_BLOCK_SIZE = 8
+BITS_PER_BYTE = 8
+
+
+class TrapFunction:
+    """
+    Class TrapFunction scores a genome as the sum of a trap over its blocks of block_size bits.
+    A block with all bits set is worth block_size, and any other block is worth deception minus its number of 1s
+    (never below 0), so the slope of every block leads away from the optimum towards all 0s.
+    With tight linkage block i holds bits i * block_size to (i + 1) * block_size - 1, and with loose linkage it holds
+    bits i, i + B, i + 2 * B and so on, where B is the number of blocks.
+
+    Genomes of one byte per bit are read as one large integer, and arithmetic on that integer packs the bits of every
+    block into one byte, so a whole population is turned into block indexes without a Python loop over its blocks.
+    The indexes are then translated to block fitness values through a 256 entry lookup table.
+    """
+
+    def __init__(self, block_size: int = TRAP_DEFAULT_BLOCK_SIZE, deception: int = TRAP_DEFAULT_DECEPTION,
+                 linkage: int = TRAP_LINKAGE_TIGHT) -> None:
+        """
+        Initializes a trap function and builds its lookup table.
+
+        Args:
+            block_size (int, optional): The number of bits in a block. Defaults to TRAP_DEFAULT_BLOCK_SIZE.
+            deception (int, optional): The fitness of a block of all 0s. Defaults to TRAP_DEFAULT_DECEPTION.
+            linkage (int, optional): TRAP_LINKAGE_TIGHT or TRAP_LINKAGE_LOOSE. Defaults to TRAP_LINKAGE_TIGHT.
+
+        Raises:
+            ValueError: If the block size or deception is out of range.
+        """
+        if not 2 <= block_size <= TRAP_MAX_BLOCK_SIZE:
+            raise ValueError(f"The trap block size must be between 2 and {TRAP_MAX_BLOCK_SIZE}")
+        if not 0 <= deception < block_size:
+            raise ValueError("The trap deception must be at least 0 and less than the block size")
+        self.block_size = block_size
+        self.deception = deception
+        self.linkage = linkage
+        # Fitness of a block, indexed by its number of 1s
+        self.block_fitness = [max(0, deception - ones) for ones in range(block_size)] + [block_size]
+        # Fitness of a block, indexed by its bits packed with the first bit as the most significant
+        self.lookup_table = bytes(self.block_fitness[index.bit_count()] if index < 1 << block_size else 0
+                                  for index in range(1 << BITS_PER_BYTE))
+        # Multiplying by this adds bit j of a block, shifted left by block_size - 1 - j, into the last byte of the block.
+        # Every byte of the product is at most 2 ** block_size - 1, so no carry crosses into the next byte.
+        self.tight_multiplier = sum(1 << (BITS_PER_BYTE * offset + offset) for offset in range(block_size))
+
+    def block_indexes(self, genomes: bytes, string_size: int) -> bytes:
+        """
+        Packs the bits of every block of one or more genomes stored end to end into one byte per block.
+
+        Args:
+            genomes (bytes): The genomes, one byte per bit.
+            string_size (int): The size of each genome, a multiple of the block size.
+
+        Returns:
+            bytes: The packed blocks, with the blocks of each genome in order.
+        """
+        block_size = self.block_size
+        packed = int.from_bytes(genomes, "little")
+        if self.linkage == TRAP_LINKAGE_TIGHT:
+            product = (packed * self.tight_multiplier).to_bytes(len(genomes) + block_size, "little")
+            return product[block_size - 1:len(genomes):block_size]
+        block_count = string_size // block_size
+        # The bits of a loose block are block_count bytes apart, so shifting the genome down by block_count bytes
+        # at a time lines every bit of the block up under the first one
+        combined = 0
+        for offset in range(block_size):
+            combined += (packed >> (BITS_PER_BYTE * block_count * offset)) << (block_size - 1 - offset)
+        combined = combined.to_bytes(len(genomes), "little")
+        return b"".join([combined[start:start + block_count] for start in range(0, len(genomes), string_size)])
+
+    def evaluate(self, solution: bytearray) -> int:
+        """
+        Calculates the fitness of a single genome.
+
+        Args:
+            solution (bytearray): The genome, one byte per bit.
+
+        Returns:
+            int: The fitness of the genome.
+        """
+        return sum(self.block_indexes(solution, len(solution)).translate(self.lookup_table))
+
+    def evaluate_many(self, solutions: Sequence[bytearray]) -> List[int]:
+        """
+        Calculates the fitness of many genomes of the same size in one pass.
+
+        Args:
+            solutions (Sequence[bytearray]): The genomes, one byte per bit.
+
+        Returns:
+            List[int]: The fitness of every genome, in order.
+        """
+        if not solutions:
+            return []
+        block_count = len(solutions[0]) // self.block_size
+        values = self.block_indexes(b"".join(solutions), len(solutions[0])).translate(self.lookup_table)
+        return [sum(values[start:start + block_count]) for start in range(0, len(values), block_count)]
@@ -0,0 +1,167 @@
+# Author: Daniel Glauber
+# File: tuner.py
+# Description: Contains the successive halving tuner, which searches the main GA settings jointly and writes the best settings file.
+import contextlib
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+from individual import Individual
+from sga import SGAController
+import settings_loader as sl
+
+# Constants for magic numbers and strings
+TUNE_MIN_POPULATION = 10
+TUNE_MAX_TOURNAMENT_SIZE = 8
+# Decimal places kept for the tuned probabilities
+TUNE_PROBABILITY_DIGITS = 2
+TUNED_SETTINGS = ["populationSizeN", "tournamentSizeK", "probApplyCrossover", "probApplyMutation", "crossoverOperator"]
+
+
+def sample_configuration(stream: random.Random, max_population: int) -> Dict[str, Any]:
+    """
+    Draws a random configuration of the tuned settings. Population sizes are drawn on a log scale.
+
+    Args:
+        stream (random.Random): The random stream of the tuner.
+        max_population (int): The largest population size.
+
+    Returns:
+        Dict[str, Any]: The tuned settings.
+    """
+    population_size = round(math.exp(stream.uniform(math.log(TUNE_MIN_POPULATION), math.log(max_population))))
+    return {
+        "populationSizeN": population_size,
+        "tournamentSizeK": stream.randint(2, TUNE_MAX_TOURNAMENT_SIZE),
+        "probApplyCrossover": round(stream.random(), TUNE_PROBABILITY_DIGITS),
+        "probApplyMutation": round(stream.random(), TUNE_PROBABILITY_DIGITS),
+        "crossoverOperator": stream.choice(sl.POSSIBLE_CROSSOVER_OPERATORS)
+    }
+
+
+def run_configuration(settings: Dict[str, Any], generations: int) -> Tuple[bool, int, float]:
+    """
+    Runs one configuration on one seed for at most the given number of generations.
+
+    Args:
+        settings (Dict[str, Any]): The complete settings of the run.
+        generations (int): The generation budget.
+
+    Returns:
+        Tuple[bool, int, float]: Whether the target fitness was reached, the evaluations used,
+            and the best fitness as a fraction of the target, which grows towards 1 as the run improves.
+    """
+    sl.ga_settings.clear()
+    sl.ga_settings.update(settings)
+    evaluations = Individual.evaluation_count
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        population = SGAController().population
+    population.initialize_random_starting_population()
+    target_fitness = population.get_target_fitness()
+    best = population.get_best_fitness()["fitness"]
+    generation = 1
+    while (target_fitness is None or best < target_fitness) and generation < generations:
+        population.select_mating_parents()
+        population.replace_current_population()
+        best = population.get_best_fitness()["fitness"]
+        generation += 1
+    succeeded = target_fitness is not None and best >= target_fitness
+    if not target_fitness:
+        fraction = best
+    elif target_fitness < 0:
+        # Permutation targets are minus the optimal tour length, so a shorter tour must give the larger fraction
+        fraction = target_fitness / best
+    else:
+        fraction = best / target_fitness
+    return succeeded, Individual.evaluation_count - evaluations, fraction
+
+
+def score_results(results: List[Tuple[bool, int, float]]) -> Tuple[int, float, float]:
+    """
+    Scores a configuration from its runs on every seed; larger scores are better.
+
+    Args:
+        results (List[Tuple[bool, int, float]]): The result of every run.
+
+    Returns:
+        Tuple[int, float, float]: The number of successes, the mean best fitness fraction,
+            and minus the mean evaluations, compared in that order.
+    """
+    return (sum(result[0] for result in results),
+            sum(result[2] for result in results) / len(results),
+            -sum(result[1] for result in results) / len(results))
+
+
+def write_settings_file(settings_file: str, settings: Dict[str, Any]) -> None:
+    """
+    Writes a settings file in the format read by the settings loader.
+
+    Args:
+        settings_file (str): The path to the settings file.
+        settings (Dict[str, Any]): The settings to write.
+    """
+    lines = [f"{key} {settings[key]}" for key in sl.DEFAULT_SETTINGS]
+    with open(settings_file, "w") as file:
+        file.write('\n'.join(lines))
+
+
+def tune(base_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Searches the tuned settings by successive halving: tuneConfigurations random configurations run on
+    tuneSeeds seeds for tuneMinGenerations generations, the best 1/tuneEta of them survive, and the
+    survivors run again with tuneEta times the generations until one is left.
+    Every configuration sees the same seeds, so they are compared on the same random starts.
+    Runs that reached the target stop there for any budget, so they are not run again in later rungs.
+
+    Args:
+        base_settings (Dict[str, Any]): The loaded settings that the configurations change.
+
+    Returns:
+        Dict[str, Any]: The settings of the best configuration.
+    """
+    stream = random.Random(base_settings["randSeed"])
+    eta = max(2, base_settings["tuneEta"])
+    generations = max(1, base_settings["tuneMinGenerations"])
+    seeds = [base_settings["randSeed"] + index for index in range(max(1, base_settings["tuneSeeds"]))]
+    configurations = [sample_configuration(stream, max(TUNE_MIN_POPULATION, base_settings["tuneMaxPopulation"]))
+                      for index in range(max(1, base_settings["tuneConfigurations"]))]
+    # Bisection searches the population size itself, so the tuned runs use the fixed sizes drawn here
+    base_settings = dict(base_settings, bisection=0)
+    # Results of the runs that reached the target, by configuration and seed
+    finished_runs = {}
+    with ProcessPoolExecutor(max_workers=base_settings["tuneWorkers"] or None) as executor:
+        rung = 1
+        while True:
+            keys = [(tuple(configuration.items()), seed) for configuration in configurations for seed in seeds]
+            pending = [key for key in keys if key not in finished_runs]
+            new_results = dict(zip(pending, executor.map(
+                run_configuration, [dict(base_settings, randSeed=seed, **dict(configuration)) for configuration, seed in pending],
+                [generations] * len(pending))))
+            finished_runs.update((key, result) for key, result in new_results.items() if result[0])
+            results = [finished_runs.get(key) or new_results[key] for key in keys]
+            print(f"Rung {rung}: {len(configurations)} configurations, {generations} generations, {len(pending)} runs")
+            scores = [score_results(results[index * len(seeds):(index + 1) * len(seeds)])
+                      for index in range(len(configurations))]
+            ranking = sorted(range(len(configurations)), key=scores.__getitem__, reverse=True)
+            for index in ranking[:eta]:
+                successes, fitness, evaluations = scores[index]
+                print(f"  {configurations[index]} successes {successes}/{len(seeds)}, "
+                      f"best {fitness:.3f}, evaluations {-evaluations:.0f}")
+            if len(configurations) == 1:
+                return dict(base_settings, **configurations[0])
+            configurations = [configurations[index] for index in ranking[:max(1, len(configurations) // eta)]]
+            generations *= eta
+            rung += 1
+
+
+if __name__ == "__main__":
+    """
+    Tunes the settings in a settings file and writes the best ones: python3 tuner.py settings.dat
+    """
+    sl.load_settings(["sga.py"] + sys.argv[1:2])
+    best_settings = tune(sl.ga_settings)
+    write_settings_file(sl.get_setting("tuneOutputFile"), best_settings)
+    print(f"Best settings: {', '.join(f'{key} {best_settings[key]}' for key in TUNED_SETTINGS)}")
+    print(f"Saved to {sl.get_setting('tuneOutputFile')}")
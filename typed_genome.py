@@ -0,0 +1,271 @@
+# Author: Daniel Glauber
+# File: typed_genome.py
+# Description: Contains the TypedGenomeEngine class, which creates, varies and scores integer and real-valued genomes.
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+from individual import FITNESS_FUNCTION_SIMPLE, TRAP_PARTITION_SIZE
+
+# Constants for magic numbers and strings
+GENOME_TYPE_BIT = 0
+GENOME_TYPE_INTEGER = 1
+GENOME_TYPE_FLOAT = 2
+# Typecodes of the arrays holding each genome type
+GENOME_TYPECODES = {
+    GENOME_TYPE_INTEGER: "q",
+    GENOME_TYPE_FLOAT: "d"
+}
+NUMERIC_MUTATION_GAUSSIAN = 0
+NUMERIC_MUTATION_POLYNOMIAL = 1
+NUMERIC_MUTATION_CREEP = 2
+NUMERIC_CROSSOVER_BLEND = 0
+NUMERIC_CROSSOVER_SBX = 1
+# Probability that SBX recombines a gene instead of copying it
+SBX_GENE_PROBABILITY = 0.5
+
+
+class TypedGenomeEngine:
+    """
+    Class TypedGenomeEngine holds the operators for genomes of bounded integers or floats, stored in typed arrays.
+    Genes are scored after scaling them to [0, 1] between the bounds, so the one-max and trap-4 fitness
+    functions keep their meaning and a genome of bits is the special case of integers between 0 and 1.
+    """
+
+    def __init__(self, genome_type: int, string_size: int, lower_bound: float, upper_bound: float,
+                 mutation_operator: int = NUMERIC_MUTATION_GAUSSIAN, crossover_operator: int = NUMERIC_CROSSOVER_BLEND,
+                 mutation_sigma: float = 0.1, distribution_index: float = 20.0, blend_alpha: float = 0.5,
+                 creep_step: int = 1) -> None:
+        """
+        Initializes the TypedGenomeEngine.
+
+        Args:
+            genome_type (int): GENOME_TYPE_INTEGER or GENOME_TYPE_FLOAT.
+            string_size (int): The number of genes.
+            lower_bound (float): The smallest value of a gene.
+            upper_bound (float): The largest value of a gene.
+            mutation_operator (int, optional): The mutation operator. Defaults to NUMERIC_MUTATION_GAUSSIAN.
+            crossover_operator (int, optional): The crossover operator. Defaults to NUMERIC_CROSSOVER_BLEND.
+            mutation_sigma (float, optional): The standard deviation of Gaussian mutation, as a fraction of the range. Defaults to 0.1.
+            distribution_index (float, optional): The distribution index of SBX and polynomial mutation. Defaults to 20.0.
+            blend_alpha (float, optional): How far blend crossover reaches beyond the parents. Defaults to 0.5.
+            creep_step (int, optional): The largest change made by creep mutation. Defaults to 1.
+        """
+        if upper_bound <= lower_bound:
+            raise ValueError("geneUpperBound must be greater than geneLowerBound")
+        self.genome_type = genome_type
+        self.typecode = GENOME_TYPECODES[genome_type]
+        self.is_integer = genome_type == GENOME_TYPE_INTEGER
+        if self.is_integer:
+            lower_bound, upper_bound = int(lower_bound), int(upper_bound)
+        self.string_size = string_size
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.gene_range = upper_bound - lower_bound
+        self.mutation_rate = 1 / string_size
+        self.mutation_sigma = mutation_sigma * self.gene_range
+        self.distribution_index = distribution_index
+        self.blend_alpha = blend_alpha
+        self.creep_step = creep_step
+        self.mutation_operators: Dict[int, Callable[[Any, float], float]] = {
+            NUMERIC_MUTATION_GAUSSIAN: self.gaussian_gene,
+            NUMERIC_MUTATION_POLYNOMIAL: self.polynomial_gene,
+            NUMERIC_MUTATION_CREEP: self.creep_gene
+        }
+        self.crossover_operators: Dict[int, Callable[[Any, array, array], Tuple[array, array]]] = {
+            NUMERIC_CROSSOVER_BLEND: self.blend_crossover,
+            NUMERIC_CROSSOVER_SBX: self.sbx_crossover
+        }
+        self.mutate_gene = self.mutation_operators[mutation_operator]
+        self.crossover = self.crossover_operators[crossover_operator]
+
+    def clip(self, value: float) -> float:
+        """
+        Keeps a gene between the bounds, rounding it for integer genomes.
+
+        Args:
+            value (float): The new value of the gene.
+
+        Returns:
+            float: The value of the gene that is stored.
+        """
+        if self.is_integer:
+            value = round(value)
+        return min(self.upper_bound, max(self.lower_bound, value))
+
+    def move_gene(self, gene: float, change: float) -> float:
+        """
+        Adds a change to a gene and keeps it between the bounds.
+        An integer gene moves at least one unit in the direction of the change, since a smaller change
+        would round back to the same value and the mutation would do nothing.
+
+        Args:
+            gene (float): The gene to change.
+            change (float): The change drawn by a mutation operator.
+
+        Returns:
+            float: The value of the gene that is stored.
+        """
+        if self.is_integer and 0 < abs(change) < 1:
+            change = 1 if change > 0 else -1
+        return self.clip(gene + change)
+
+    def random_solutions(self, stream: Any, count: int) -> List[array]:
+        """
+        Generates random genomes with every gene uniform between the bounds.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            count (int): The number of genomes.
+
+        Returns:
+            List[array]: The random genomes.
+        """
+        if self.is_integer:
+            return [array(self.typecode, [stream.randint(self.lower_bound, self.upper_bound) for i in range(self.string_size)])
+                    for genome in range(count)]
+        return [array(self.typecode, [self.lower_bound + self.gene_range * stream.random() for i in range(self.string_size)])
+                for genome in range(count)]
+
+    def fitness(self, fitness_function: int, solution: array) -> float:
+        """
+        Calculates the fitness of a genome on its genes scaled to [0, 1].
+
+        Args:
+            fitness_function (int): The fitness function to use.
+            solution (array): The genome to evaluate.
+
+        Returns:
+            float: The fitness of the genome, equal to stringSizeN at the optimum.
+        """
+        lower_bound = self.lower_bound
+        gene_range = self.gene_range
+        scaled = [(gene - lower_bound) / gene_range for gene in solution]
+        if fitness_function == FITNESS_FUNCTION_SIMPLE:
+            return sum(scaled)
+        # Trap-4 on the sum of each partition: 4 at the optimum and 3 - sum elsewhere, as for bits
+        partition_sums = [sum(scaled[i:i + TRAP_PARTITION_SIZE]) for i in range(0, len(scaled), TRAP_PARTITION_SIZE)]
+        return sum([TRAP_PARTITION_SIZE if total == TRAP_PARTITION_SIZE else max(0.0, TRAP_PARTITION_SIZE - 1 - total)
+                    for total in partition_sums])
+
+    def mutate(self, stream: Any, solution: array) -> array:
+        """
+        Mutates each gene with probability 1/L. Only the positions to mutate are drawn.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution (array): The genome to mutate.
+
+        Returns:
+            array: A mutated copy of the genome, or the genome itself when no gene was chosen.
+        """
+        indexes = stream.bernoulli_indexes(self.string_size, self.mutation_rate)
+        if not indexes:
+            return solution
+        mutated = solution[:]
+        for index in indexes:
+            mutated[index] = self.mutate_gene(stream, mutated[index])
+        return mutated
+
+    def gaussian_gene(self, stream: Any, gene: float) -> float:
+        """
+        Adds Gaussian noise with a standard deviation of mutationSigma times the range.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            gene (float): The gene to mutate.
+
+        Returns:
+            float: The mutated gene.
+        """
+        return self.move_gene(gene, stream.gauss(0.0, self.mutation_sigma))
+
+    def polynomial_gene(self, stream: Any, gene: float) -> float:
+        """
+        Applies bounded polynomial mutation, which keeps most changes small and never leaves the bounds.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            gene (float): The gene to mutate.
+
+        Returns:
+            float: The mutated gene.
+        """
+        eta = self.distribution_index
+        power = 1.0 / (eta + 1.0)
+        u = stream.random()
+        if u < 0.5:
+            distance = (gene - self.lower_bound) / self.gene_range
+            value = 2.0 * u + (1.0 - 2.0 * u) * (1.0 - distance) ** (eta + 1.0)
+            delta = value ** power - 1.0
+        else:
+            distance = (self.upper_bound - gene) / self.gene_range
+            value = 2.0 * (1.0 - u) + 2.0 * (u - 0.5) * (1.0 - distance) ** (eta + 1.0)
+            delta = 1.0 - value ** power
+        return self.move_gene(gene, delta * self.gene_range)
+
+    def creep_gene(self, stream: Any, gene: float) -> float:
+        """
+        Moves a gene up or down by at most creepStep, the usual mutation for integer genomes.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            gene (float): The gene to mutate.
+
+        Returns:
+            float: The mutated gene.
+        """
+        if self.is_integer:
+            step = stream.randint(1, self.creep_step)
+        else:
+            step = self.creep_step * stream.random()
+        return self.clip(gene + step if stream.random() < 0.5 else gene - step)
+
+    def sbx_crossover(self, stream: Any, solution_a: array, solution_b: array) -> Tuple[array, array]:
+        """
+        Performs simulated binary crossover (SBX), which spreads the children around the parents
+        like one-point crossover does for bits.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution_a (array): The first parent's genome.
+            solution_b (array): The second parent's genome.
+
+        Returns:
+            Tuple[array, array]: The genomes of the two children.
+        """
+        power = 1.0 / (self.distribution_index + 1.0)
+        child_a = solution_a[:]
+        child_b = solution_b[:]
+        for index in stream.bernoulli_indexes(self.string_size, SBX_GENE_PROBABILITY):
+            gene_a = solution_a[index]
+            gene_b = solution_b[index]
+            u = stream.random()
+            beta = (2.0 * u) ** power if u <= 0.5 else (1.0 / (2.0 * (1.0 - u))) ** power
+            child_a[index] = self.clip(0.5 * ((1.0 + beta) * gene_a + (1.0 - beta) * gene_b))
+            child_b[index] = self.clip(0.5 * ((1.0 - beta) * gene_a + (1.0 + beta) * gene_b))
+        return child_a, child_b
+
+    def blend_crossover(self, stream: Any, solution_a: array, solution_b: array) -> Tuple[array, array]:
+        """
+        Performs blend crossover (BLX-alpha): each child gene is uniform in the interval spanned by the
+        parent genes, widened by blendAlpha times its length on both sides.
+
+        Args:
+            stream (PythonStream | NumpyStream): The random stream to draw from.
+            solution_a (array): The first parent's genome.
+            solution_b (array): The second parent's genome.
+
+        Returns:
+            Tuple[array, array]: The genomes of the two children.
+        """
+        alpha = self.blend_alpha
+        random = stream.random
+        clip = self.clip
+        children = ([], [])
+        for gene_a, gene_b in zip(solution_a, solution_b):
+            low = min(gene_a, gene_b)
+            spread = abs(gene_a - gene_b)
+            start = low - alpha * spread
+            width = (1.0 + 2.0 * alpha) * spread
+            children[0].append(clip(start + width * random()))
+            children[1].append(clip(start + width * random()))
+        return array(self.typecode, children[0]), array(self.typecode, children[1])
@@ -0,0 +1,172 @@
+# Author: Daniel Glauber
+# File: typed_population.py
+# Description: Contains the TypedPopulation class, which evolves integer and real-valued genomes.
+from array import array
+from operator import ne
+from typing import List
+from individual import Individual
+from population import Population, DebugLogger, DEDUP_POLICY_RANDOM, FULL_DEBUG, LIMITED_DEBUG
+from typed_genome import TypedGenomeEngine
+import settings_loader as sl
+
+logger = DebugLogger(__name__)
+
+
+class TypedPopulation(Population):
+    """
+    Class TypedPopulation evolves genomes of bounded integers or floats stored in typed arrays.
+    Selection, elitism and duplicate elimination are those of Population; initialization, crossover,
+    mutation and fitness come from a TypedGenomeEngine.
+    Genomes are never changed in place, so children that are not varied share their parent's array.
+    """
+
+    def __init__(self, stream_id: int = 0):
+        """
+        Initializes the TypedPopulation.
+
+        Args:
+            stream_id (int, optional): The random stream used by this population. Defaults to 0.
+        """
+        super().__init__(stream_id)
+        self.genome_engine = self.create_genome_engine()
+
+    def create_genome_engine(self) -> TypedGenomeEngine:
+        """
+        Creates the genome engine from the settings.
+
+        Returns:
+            TypedGenomeEngine: The genome engine.
+        """
+        return TypedGenomeEngine(sl.get_setting("genomeType"), sl.get_setting("stringSizeN"),
+                                 sl.get_setting("geneLowerBound"), sl.get_setting("geneUpperBound"),
+                                 sl.get_setting("numericMutationOperator"), sl.get_setting("numericCrossoverOperator"),
+                                 sl.get_setting("mutationSigma"), sl.get_setting("distributionIndex"),
+                                 sl.get_setting("blendAlpha"), sl.get_setting("creepStep"))
+
+    def create_surrogate(self) -> None:
+        """
+        Surrogate pre-screening ranks bit genomes built by Population.select_mating_parents, so it is not used here.
+
+        Returns:
+            None: No surrogate model.
+        """
+        return None
+
+    def reload_settings(self) -> None:
+        super().reload_settings()
+        self.genome_engine = self.create_genome_engine()
+
+    def create_individual(self, solution: array) -> Individual:
+        """
+        Creates an individual that owns a new genome, evaluating its fitness with the genome engine.
+
+        Args:
+            solution (array): The genome.
+
+        Returns:
+            Individual: The new individual.
+        """
+        Individual.evaluation_count += 1
+        return Individual(self._fitnessFunction, solution, self.genome_engine.fitness(self._fitnessFunction, solution),
+                          copy_solution=False)
+
+    def initialize_random_individual(self, string_size: int) -> Individual:
+        return self.create_individual(self.genome_engine.random_solutions(self.rng, 1)[0])
+
+    def initialize_random_starting_population(self) -> None:
+        """
+        Initializes the starting population with random genomes. Seed population files hold bits, so they are not used.
+        """
+        self.current_generation = []
+        self.next_generation = []
+        self.reload_settings()
+        self.current_generation = [self.create_individual(solution)
+                                   for solution in self.genome_engine.random_solutions(self.rng, self.population_size)]
+        if self.full_debug == FULL_DEBUG or self.limited_debug == LIMITED_DEBUG:
+            logger.info("Initial Population")
+            for i in self.current_generation:
+                logger.info(f"{i.solution_as_string()}")
+
+    def get_diversity(self) -> float:
+        """
+        Calculates the genetic diversity of the current generation.
+        Each locus contributes four times the variance of its genes scaled to [0, 1], which is 4p(1-p) for bits.
+
+        Returns:
+            float: The average locus diversity, from 0.0 (fully converged) to 1.0.
+        """
+        engine = self.genome_engine
+        size = len(self.current_generation)
+        diversity = 0.0
+        for locus in zip(*(individual.get_solution() for individual in self.current_generation)):
+            scaled = [(gene - engine.lower_bound) / engine.gene_range for gene in locus]
+            mean = sum(scaled) / size
+            diversity += 4 * sum((gene - mean) ** 2 for gene in scaled) / size
+        return diversity / engine.string_size
+
+    def tournament_selection(self, empty: int) -> List[Individual]:
+        """
+        Selects two parents, then applies the genome engine's crossover and mutation to create two children.
+
+        Args:
+            empty (int): A placeholder argument.
+
+        Returns:
+            List[Individual]: A list of generated children.
+        """
+        parents = self.single_tournament_selection()
+        crossed = self.rng.random() < self.probApplyCrossover
+        if crossed:
+            solutions = self.genome_engine.crossover(self.rng, parents[0].get_solution(), parents[1].get_solution())
+        else:
+            solutions = (parents[0].get_solution(), parents[1].get_solution())
+        children = []
+        for solution, parent in zip(solutions, parents):
+            varied = crossed
+            if self.rng.random() < self.probApplyMutation:
+                mutated = self.genome_engine.mutate(self.rng, solution)
+                varied = varied or mutated is not solution
+                solution = mutated
+            if varied:
+                children.append(self.create_individual(solution))
+            else:
+                # Unchanged parents keep their fitness and share their genome
+                children.append(Individual(self._fitnessFunction, solution, parent.get_solution_fitness(), copy_solution=False))
+        if self.full_debug == FULL_DEBUG:
+            logger.info(f"c1: {children[0].solution_as_string()}")
+            logger.info(f"c2: {children[1].solution_as_string()}\n")
+        return children
+
+    def genome_distance_keys(self, individuals: List[Individual]) -> List[array]:
+        return [individual.get_solution() for individual in individuals]
+
+    def genome_distance(self, key_a: array, key_b: array) -> int:
+        """
+        Measures how different two genomes are.
+
+        Args:
+            key_a (array): The first genome.
+            key_b (array): The second genome.
+
+        Returns:
+            int: The number of genes that differ.
+        """
+        return sum(map(ne, key_a, key_b))
+
+    def create_dedup_replacement(self, duplicate: Individual) -> Individual:
+        """
+        Creates a replacement for a duplicate genome according to the dedup policy.
+
+        Args:
+            duplicate (Individual): The duplicate individual.
+
+        Returns:
+            Individual: The replacement individual.
+        """
+        if self.dedup_policy == DEDUP_POLICY_RANDOM:
+            return self.initialize_random_individual(self.string_size)
+        # Mutate a single random gene so the replacement stays close to the duplicate
+        solution = duplicate.get_solution()[:]
+        index = self.rng.randrange(self.string_size)
+        solution[index] = self.genome_engine.mutate_gene(self.rng, solution[index])
+        return self.create_individual(solution)